@@ -0,0 +1,152 @@
+import math
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+import constants as c
+from constants import Point
+from pool_ball_list import PoolBallList
+
+
+@dataclass
+class AimPrediction:
+    contact_point: Point  # Where the center of the cue ball will be when it first hits something
+    hit_ball_num: int | None  # The number of the ball that will be hit, or None if a cushion will be hit first
+    object_ball_direction: Point | None  # The unit direction the hit ball will move in, or None if no ball is hit
+
+
+class AimPreview:
+    def __init__(self, pool_balls: PoolBallList, cue_ball_center: Point):
+        """
+        Stores the positions of the balls and cushions at the start of a turn so that the path of the cue ball
+            can be predicted every frame while aiming
+        :param pool_balls: The pool balls on the table
+        :param cue_ball_center: The center of the cue ball
+        """
+        self.cue_ball_center: Point = cue_ball_center
+
+        object_balls = [ball for ball in pool_balls.simulated_balls if ball.num != 0]
+        self.ball_nums: np.ndarray = np.array([ball.num for ball in object_balls], dtype=int)
+        self.ball_centers: np.ndarray = np.array([(ball.x_pos + c.BALL_RADIUS, ball.y_pos + c.BALL_RADIUS)
+                                                  for ball in object_balls], dtype=float).reshape(-1, 2)
+
+        cushions = pool_balls.table_geometry.cushions
+        self.cushion_starts: np.ndarray = np.array([(start.x, start.y) for start, _ in cushions],
+                                                   dtype=float).reshape(-1, 2)
+        self.cushion_ends: np.ndarray = np.array([(end.x, end.y) for _, end in cushions], dtype=float).reshape(-1, 2)
+
+        # The unit direction along each cushion, its length, and the unit direction perpendicular to it
+        cushion_vectors = self.cushion_ends - self.cushion_starts
+        self.cushion_lengths: np.ndarray = np.hypot(cushion_vectors[:, 0], cushion_vectors[:, 1])
+        self.cushion_tangents: np.ndarray = cushion_vectors / self.cushion_lengths[:, np.newaxis]
+        self.cushion_normals: np.ndarray = np.stack((-self.cushion_tangents[:, 1], self.cushion_tangents[:, 0]),
+                                                    axis=1)
+
+        min_x, min_y, max_x, max_y = pool_balls.table_geometry.felt_bounds
+        self.max_distance: float = math.hypot(max_x - min_x, max_y - min_y)
+
+        # Maps a quantized angle to its prediction, so that an unchanged aim doesn't need to be recomputed
+        self.predictions: Dict[int, AimPrediction] = {}
+
+    def predict(self, angle: float) -> AimPrediction:
+        """
+        Predicts where the cue ball will first hit something when shot at a given cue angle
+        :param angle: The angle of the cue stick
+        :return: The AimPrediction for the angle
+        """
+        angle_key = round((angle % 360) / c.AIM_PREVIEW_ANGLE_STEP)
+
+        if angle_key not in self.predictions:
+            self.predictions[angle_key] = self.cast(angle_key * c.AIM_PREVIEW_ANGLE_STEP)
+
+        return self.predictions[angle_key]
+
+    def cast(self, angle: float) -> AimPrediction:
+        """
+        Sweeps the cue ball from its position in the direction it would be shot at a given cue angle
+        :param angle: The angle of the cue stick
+        :return: The AimPrediction for the angle
+        """
+        # The cue ball moves away from the cue stick
+        direction = np.array([-math.sin(math.radians(angle)), -math.cos(math.radians(angle))])
+        origin = np.array([self.cue_ball_center.x, self.cue_ball_center.y])
+
+        ball_distances = self.sweep_circles(origin, direction, self.ball_centers, 2 * c.BALL_RADIUS)
+        cushion_distance = self.sweep_cushions(origin, direction)
+
+        travel_distance = min(cushion_distance, self.max_distance)
+        nearest_ball = None
+
+        if len(ball_distances) > 0 and np.min(ball_distances) < travel_distance:
+            nearest_ball = int(np.argmin(ball_distances))
+            travel_distance = ball_distances[nearest_ball]
+
+        contact_point = origin + travel_distance * direction
+
+        hit_ball_num = None
+        object_ball_direction = None
+
+        if nearest_ball is not None:
+            hit_ball_num = int(self.ball_nums[nearest_ball])
+
+            # The hit ball moves along the line from the cue ball's center to its center
+            offset = self.ball_centers[nearest_ball] - contact_point
+            offset /= np.hypot(offset[0], offset[1])
+            object_ball_direction = Point(float(offset[0]), float(offset[1]))
+
+        return AimPrediction(Point(float(contact_point[0]), float(contact_point[1])),
+                             hit_ball_num, object_ball_direction)
+
+    @staticmethod
+    def sweep_circles(origin: np.ndarray, direction: np.ndarray, centers: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Finds how far a point can move along a ray before it enters each of a set of circles
+        :param origin: The start of the ray
+        :param direction: The unit direction of the ray
+        :param centers: The centers of the circles
+        :param radius: The radius of the circles
+        :return: The distance along the ray to each circle, or infinity if the ray misses it
+        """
+        offsets = origin - centers
+        projections = offsets @ direction
+        discriminants = projections ** 2 - (np.sum(offsets ** 2, axis=1) - radius ** 2)
+
+        distances = np.full(len(centers), np.inf)
+        hits = discriminants >= 0
+        distances[hits] = -projections[hits] - np.sqrt(discriminants[hits])
+        distances[distances <= 0] = np.inf  # Circles the point starts inside of, or that are behind it
+
+        return distances
+
+    def sweep_cushions(self, origin: np.ndarray, direction: np.ndarray) -> float:
+        """
+        Finds how far the cue ball can move along a ray before it touches a cushion
+        :param origin: The start of the ray, at the center of the cue ball
+        :param direction: The unit direction of the ray
+        :return: The distance along the ray to the nearest cushion, or infinity if there are none in the way
+        """
+        if len(self.cushion_starts) == 0:
+            return math.inf
+
+        tangents = self.cushion_tangents
+
+        # The center of the ball touches a cushion when it is on either side of it at a distance of one radius
+        denominators = direction[0] * tangents[:, 1] - direction[1] * tangents[:, 0]
+        distances = [np.inf]
+        for side in (1, -1):
+            offsets = self.cushion_starts + side * c.BALL_RADIUS * self.cushion_normals - origin
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ray_distances = (offsets[:, 0] * tangents[:, 1] - offsets[:, 1] * tangents[:, 0]) / denominators
+                along_cushion = (offsets[:, 0] * direction[1] - offsets[:, 1] * direction[0]) / denominators
+
+            hits = ((denominators != 0) & (ray_distances > 0)
+                    & (along_cushion >= 0) & (along_cushion <= self.cushion_lengths))
+            distances.append(np.min(ray_distances[hits], initial=np.inf))
+
+        # Or when it touches one of the ends
+        for ends in (self.cushion_starts, self.cushion_ends):
+            distances.append(np.min(self.sweep_circles(origin, direction, ends, c.BALL_RADIUS), initial=np.inf))
+
+        return float(min(distances))
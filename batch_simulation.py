@@ -0,0 +1,202 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+from typing import Dict, Iterable, Iterator, List, TextIO
+
+import numpy as np
+
+import constants as c
+from constants import BallTypes, Players, Point
+from pool_ball_list import PoolBallList
+from rack import generate_rack
+from rules import GameState
+from simulation import simulate_shot
+import shots
+
+
+# The balls used by the current process, created once so that they aren't rebuilt for every shot
+process_pool_balls: PoolBallList | None = None
+
+
+def get_process_pool_balls() -> PoolBallList:
+    """
+    Gets the balls used to simulate shots in the current process, creating them on the first call
+    :return: The PoolBallList for the current process
+    """
+    global process_pool_balls
+
+    if process_pool_balls is None:
+        process_pool_balls = PoolBallList()
+        process_pool_balls.set_up_rack(generate_rack(seed=0))
+
+    return process_pool_balls
+
+
+def set_up_table(pool_balls: PoolBallList, shot_request: Dict) -> None:
+    """
+    Puts the balls where a shot request says they should be, either from a rack seed or an exact table state
+    :param pool_balls: The balls to set up
+    :param shot_request: The shot request
+    """
+    if "balls" in shot_request:
+        pool_balls.read_state(np.array(shot_request["balls"], dtype=float).reshape(16, c.BALL_STATE_SIZE))
+        return
+
+    pool_balls.set_up_rack(generate_rack(shot_request.get("seed")))
+
+    # The cue ball starts on the head string unless it's placed somewhere else
+    felt_min_x, felt_min_y, felt_max_x, felt_max_y = pool_balls.table_geometry.felt_bounds
+    cue_ball_position = shot_request.get("cue_ball", (c.TABLE_HEAD_STRING_LOCATION,
+                                                      (felt_min_y + felt_max_y) / 2 - c.BALL_RADIUS))
+
+    if (not isinstance(cue_ball_position, (list, tuple)) or len(cue_ball_position) != 2 or
+            not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in cue_ball_position)):
+        raise TypeError("The cue ball position must be a pair of numbers, not " + json.dumps(cue_ball_position))
+
+    cue_ball_x, cue_ball_y = cue_ball_position
+    # Positions are of the ball's top-left corner, so the whole ball must fit on the felt. NaN fails both checks
+    if not (felt_min_x <= cue_ball_x <= felt_max_x - 2 * c.BALL_RADIUS and
+            felt_min_y <= cue_ball_y <= felt_max_y - 2 * c.BALL_RADIUS):
+        raise ValueError("The cue ball position " + json.dumps(cue_ball_position) + " is not on the felt")
+
+    pool_balls.get(0).set_position(Point(float(cue_ball_x), float(cue_ball_y)))
+
+
+def get_game_state(pool_balls: PoolBallList, shot_request: Dict) -> GameState:
+    """
+    Creates the state of the game before a shot, counting the balls already out of play as having gone in
+    :param pool_balls: The balls, set up for the shot
+    :param shot_request: The shot request, which may give the current player and the players' ball types
+    :return: The GameState before the shot
+    """
+    game_state = GameState(current_player=Players(shot_request.get("current_player", 1) - 1))
+
+    for player_number, ball_type in shot_request.get("player_ball_types", {}).items():
+        game_state.player_ball_types[Players(int(player_number) - 1)] = BallTypes[ball_type]
+
+    for ball in pool_balls.pool_balls:
+        if not ball.in_play and ball.type in game_state.num_balls_in:
+            game_state.num_balls_in[ball.type] += 1
+
+    return game_state
+
+
+def simulate_request(line: str) -> str:
+    """
+    Simulates a single shot request
+    :param line: The shot request, as a line of JSON
+    :return: The result of the shot, as a line of JSON
+    """
+    shot_request = None
+
+    try:
+        shot_request = json.loads(line)
+
+        # Anything other than an object, such as a list or a number, has none of the fields of a request
+        if not isinstance(shot_request, dict):
+            raise TypeError("A shot request must be a JSON object, not " + type(shot_request).__name__)
+
+        pool_balls = get_process_pool_balls()
+        set_up_table(pool_balls, shot_request)
+        game_state = get_game_state(pool_balls, shot_request)
+
+        rotation_offset = shots.power_to_rotation_offset(shot_request["power"])
+        x_velocities, y_velocities = shots.shot_velocities(np.array([shot_request["angle"]]),
+                                                           np.array([rotation_offset]))
+
+        shot_result = simulate_shot(pool_balls, (float(x_velocities[0]), float(y_velocities[0])))
+
+        game_state.start_turn()
+        game_state.pocket_balls([pool_balls.get(ball_num) for ball_num in shot_result.balls_in_pocket])
+        current_player = game_state.current_player
+        next_phase = game_state.end_turn(shot_result.any_ball_collided)
+
+        result = {
+            "id": shot_request.get("id"),
+            "steps": shot_result.steps,
+            "positions": [[ball.x_pos, ball.y_pos] if ball.in_play else None for ball in pool_balls.pool_balls],
+            "pocketed": shot_result.balls_in_pocket,
+            "any_ball_collided": shot_result.any_ball_collided,
+            "outcome": {
+                "scratch": 0 in shot_result.balls_in_pocket,
+                "foul": not shot_result.any_ball_collided,
+                "winner": game_state.winner.value + 1 if game_state.winner is not None else None,
+                "player_ball_types": {str(player.value + 1): ball_type.name if ball_type is not None else None
+                                      for player, ball_type in game_state.player_ball_types.items()},
+                "turn_repeats": game_state.current_player == current_player,
+                "next_player": game_state.current_player.value + 1,
+                "next_phase": next_phase.name
+            }
+        }
+    except (ValueError, KeyError, TypeError) as error:
+        # A bad request gets an error result instead of stopping the rest of the batch
+        result = {"id": shot_request.get("id") if isinstance(shot_request, dict) else None,
+                  "error": type(error).__name__ + ": " + str(error), "request": line.strip()}
+
+    return json.dumps(result) + "\n"
+
+
+def read_batches(lines: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """
+    Splits the non-blank lines of the input into batches, reading only one batch at a time
+    :param lines: The lines of the input
+    :param batch_size: The number of lines in each batch
+    :return: An iterator over the batches
+    """
+    requests = (line for line in lines if line.strip())
+
+    while True:
+        batch = list(itertools.islice(requests, batch_size))
+        if not batch:
+            return
+
+        yield batch
+
+
+def run_batch_simulation(input_file: TextIO, output_file: TextIO, num_workers: int, batch_size: int) -> None:
+    """
+    Simulates every shot request in the input and writes the results to the output in the same order.
+    Only one batch of requests and results is held in memory at a time
+    :param input_file: The file to read shot requests from, one JSON object per line
+    :param output_file: The file to write results to, one JSON object per line
+    :param num_workers: The number of worker processes. Shots are simulated in this process if it is 1
+    :param batch_size: The number of requests read and written at a time
+    """
+    if num_workers <= 1:
+        for batch in read_batches(input_file, batch_size):
+            output_file.write("".join(simulate_request(line) for line in batch))
+        return
+
+    with multiprocessing.Pool(num_workers) as worker_pool:
+        chunk_size = max(1, batch_size // (4 * num_workers))
+
+        for batch in read_batches(input_file, batch_size):
+            output_file.write("".join(worker_pool.imap(simulate_request, batch, chunk_size)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulates shots without a window. Reads shot requests as JSON lines and writes results as "
+                    "JSON lines. A request has an `angle`, a `power` from 0 to 1, and either a rack `seed` with an "
+                    "optional `cue_ball` position or the exact `balls` state. It can also have an `id`, the "
+                    "`current_player`, and the `player_ball_types`")
+    parser.add_argument("input", nargs="?", default="-", help="The file to read requests from, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="The file to write results to, or - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="The number of worker processes")
+    parser.add_argument("-b", "--batch-size", type=int, default=1024,
+                        help="The number of requests held in memory at a time")
+    arguments = parser.parse_args()
+
+    input_stream = sys.stdin if arguments.input == "-" else open(arguments.input)
+    # Results are written a batch at a time through a large buffer
+    output_stream = open(sys.stdout.fileno() if arguments.output == "-" else arguments.output, "w",
+                         buffering=1 << 16, closefd=arguments.output != "-")
+
+    try:
+        run_batch_simulation(input_stream, output_stream, arguments.workers, arguments.batch_size)
+    finally:
+        output_stream.close()
+        if input_stream is not sys.stdin:
+            input_stream.close()
@@ -0,0 +1,85 @@
+import argparse
+import time
+from typing import Dict, List
+
+import constants as c
+from scenarios import generate_scenario, get_table_size_for_density
+
+
+def benchmark_scenario(num_balls: int, layout: str, density: float | None, num_steps: int,
+                       seed: int) -> Dict[str, float]:
+    """
+    Times the physics engine on a generated scenario
+    :param num_balls: The number of balls
+    :param layout: How the balls are placed, as passed to `generate_scenario`
+    :param density: The portion of the felt covered by balls, used to size the table.
+                        The standard table is used if None
+    :param num_steps: The number of steps to time
+    :param seed: The seed of the scenario
+    :return: A dictionary of the measurements
+    """
+    if density is None:
+        table_width, table_height = c.POOL_TABLE_WIDTH, c.POOL_TABLE_HEIGHT
+    else:
+        table_width, table_height = get_table_size_for_density(num_balls, density)
+
+    pool_balls = generate_scenario(num_balls, table_width, table_height, layout, seed=seed).build_pool_balls()
+
+    move_time = 0
+    collision_time = 0
+    total_active_balls = 0
+
+    for _ in range(num_steps):
+        total_active_balls += len(pool_balls.active_balls)
+
+        start_time = time.perf_counter()
+        pool_balls.move_balls()
+        move_end_time = time.perf_counter()
+        pool_balls.perform_collisions()
+        collision_end_time = time.perf_counter()
+
+        move_time += move_end_time - start_time
+        collision_time += collision_end_time - move_end_time
+
+    total_time = move_time + collision_time
+
+    return {"balls": num_balls,
+            "table_width": table_width,
+            "table_height": table_height,
+            "steps_per_second": num_steps / total_time,
+            "ball_steps_per_second": total_active_balls / total_time,
+            "move_share": move_time / total_time,
+            "collision_share": collision_time / total_time,
+            "average_active_balls": total_active_balls / num_steps}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures how the physics engine scales with the number of balls")
+    parser.add_argument("--balls", type=int, nargs="+", default=[16, 32, 64, 128, 256, 512])
+    parser.add_argument("--layout", choices=["random", "packed"], default="random")
+    parser.add_argument("--density", type=float, default=0.15,
+                        help="The portion of the felt covered by balls. Use 0 to keep the standard table size")
+    parser.add_argument("--steps", type=int, default=200, help="The number of steps to time for each ball count")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    results: List[Dict[str, float]] = []
+
+    print("balls | table size  | steps/s  | active ball-steps/s | move / collide | avg active")
+    for ball_count in arguments.balls:
+        result = benchmark_scenario(ball_count, arguments.layout, arguments.density or None, arguments.steps,
+                                    arguments.seed)
+        results.append(result)
+
+        print(f"{result['balls']:5d} | {result['table_width']:4.0f}x{result['table_height']:<6.0f} | "
+              f"{result['steps_per_second']:8.1f} | {result['ball_steps_per_second']:19.0f} | "
+              f"{result['move_share']:5.0%} / {result['collision_share']:<5.0%} | "
+              f"{result['average_active_balls']:.1f}")
+
+    # Per active ball, a linear engine costs the same at every size. Flag sizes where it got much more expensive
+    base_rate = results[0]["ball_steps_per_second"]
+    for result in results[1:]:
+        if result["ball_steps_per_second"] < base_rate / 2:
+            print("Super-linear: each active ball step is " +
+                  str(round(base_rate / result["ball_steps_per_second"], 1)) + "x slower with " +
+                  str(result["balls"]) + " balls than with " + str(results[0]["balls"]))
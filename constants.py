@@ -1,9 +1,7 @@
-from dataclasses import dataclass, astuple
+from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, Tuple, List
 
-import pygame
-
 
 # Enums #
 class Players(Enum):
@@ -62,13 +60,13 @@ class BallTypes(Enum):
             return self.striped
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Point:
     x: float
     y: float
 
-    def to_tuple(self) -> Tuple:
-        return astuple(self)
+    def to_tuple(self) -> Tuple[float, float]:
+        return self.x, self.y
 
     @staticmethod
     def get_point(tuple_point: Tuple[float, float]):
@@ -98,17 +96,35 @@ colors: Dict[str, Tuple[int, int, int]] = {
 
 # Operation Constants #
 DEBUGGING = True
-MAX_FRAMERATE = 60
-
-DEBUG_EVENTS: List[int] = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4,
-                                          pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8,
-                                          pygame.K_q, pygame.K_w, pygame.K_e, pygame.K_r, pygame.K_t,
-                                          pygame.K_y, pygame.K_u]
+MAX_FRAMERATE = 144  # Frames are drawn between physics steps, so high refresh rate displays show smoother motion
+PHYSICS_RATE = 60  # The number of physics steps per second. The ball speeds and friction are tuned for this rate
+FRAME_BUDGET_SECONDS = 1 / 60  # The longest a frame should take. The drawing quality is lowered if it's over this
+QUALITY_FRAMES_MEASURED = 30  # The number of frames averaged before changing the drawing quality
+QUALITY_HEADROOM = 0.5  # The quality is raised when frames take less than this portion of their budget
+RENDER_SCALE = 1  # The size of the resolution frames are drawn at compared to the window's, such as 0.5 for half
+IDLE_WAIT_MILLISECONDS = 250  # The longest to wait for an event when nothing on screen has changed
+MAX_PHYSICS_STEPS_PER_FRAME = 8  # If frames take longer than this many steps, the simulation slows instead of stalling
+TELEMETRY_FLUSH_SECONDS = 1  # The longest telemetry records wait in memory before being written
+TELEMETRY_BATCH_SIZE = 64  # Telemetry is written as soon as this many records are waiting
+TELEMETRY_MAX_BUFFERED_RECORDS = 10000  # Records past this many waiting are dropped instead of using more memory
+TELEMETRY_MAX_FILE_BYTES = 16 * 1024 * 1024  # A telemetry file is rotated once it's this big
+TELEMETRY_ROTATED_FILES = 5  # The number of old telemetry files kept
+
+# The keys for pocketing balls 1 - 15 while debugging.
+#   Pygame's key codes for digits and letters are their ASCII values, so pygame doesn't need to be imported here
+DEBUG_EVENTS: List[int] = [ord(key) for key in "12345678qwertyu"]
 
 # Physics Constants #
 FRICTION = 1 / 128
 BOUNCE_MODIFIER = .95
 
+# Simulation Constants #
+BALL_STATE_SIZE = 5  # A ball's state is stored as its x-position, y-position, x-velocity, y-velocity, and in-play flag
+SHOT_RESULT_SIZE = 2  # A shot's result is stored as the number of steps it took and whether any balls collided
+MAX_SHOT_STEPS = 20000  # Shots that haven't stopped after this many steps are cut off
+WORKER_CHECK_SECONDS = 1  # How often a simulation pool checks that its workers are still running while it waits
+OBSERVATION_SIZE = 84  # The width and height in pixels of the images of the table made for learning
+
 # Screen & Background Constants #
 SCREEN_WIDTH_PADDING = 125
 SCREEN_HEIGHT_PADDING = 125
@@ -121,10 +137,21 @@ POOL_TABLE_HEIGHT = 400
 
 TABLE_HEAD_STRING_LOCATION = (30 + SCREEN_WIDTH_PADDING) + ((POOL_TABLE_WIDTH - 60) * 0.75)
 
+# Table Geometry Constants #
+CUSHION_WIDTH = 30  # The distance from the edge of the table to the felt
+POCKET_RADIUS = 20
+CORNER_POCKET_MOUTH = 20  # How far the cushions stop from the corners of the felt
+SIDE_POCKET_MOUTH = 16  # How far the cushions stop from the center of the side pockets
+POCKET_JAW_DEPTH = 15  # How far the pocket jaws go into the rails
+GEOMETRY_CELL_SIZE = 40  # The size of the grid cells that the cushions and pockets are indexed in
+
 POCKET_LOCATIONS = [[35, 35], [35, 345], [745, 35], [745, 345], [392, 35], [392, 345]]
 
 # Ball Constants #
 BALL_RADIUS = 10
+# The farthest a ball moves along each axis between cushion checks. Under BALL_RADIUS / sqrt(2), so that a ball can't
+#   pass the line of a cushion before it's checked. Faster balls are moved in several parts in a single step
+MAX_CUSHION_STEP = 7
 
 # TODO: make locations dependent on screen size
 CUE_BALL_START_LOCATION = Point(0, 0)
@@ -155,6 +182,11 @@ MIN_ROTATION_OFFSET = EDGE_OF_BALL_OFFSET + 5
 MAX_ROTATION_OFFSET = MIN_ROTATION_OFFSET + 100
 
 MAX_CUE_BALL_VELO = 5  # The speed the cue ball should go at if hit at max draw distance
+CUE_RELEASE_SECONDS = 0.2  # The time the cue stick takes to move forward to the cue ball once released
+
+AIM_PREVIEW_ANGLE_STEP = 0.1  # The angles that the aim preview is cached at, in degrees
+AIM_PREVIEW_COLOR = colors["white"]
+AIM_PREVIEW_OBJECT_BALL_LINE_LENGTH = 40  # The length of the line showing where the hit ball will go
 
 # Text Constants #
 PLAYER_TEXT_FONT_FILENAME = "fonts/unlearn2.ttf"
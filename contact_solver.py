@@ -0,0 +1,121 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import constants as c
+from pool_ball import PoolBall
+
+
+def find_contact_clusters(touching_pairs: List[Tuple[PoolBall, PoolBall]]) \
+        -> List[Tuple[List[PoolBall], List[Tuple[int, int]]]]:
+    """
+    Groups touching balls into clusters, where every ball in a cluster is connected to the others through contacts
+    :param touching_pairs: The pairs of balls that are touching
+    :return: A list containing a tuple for each cluster of the balls in it, ordered by number,
+                and its contacts as pairs of indices into that list of balls
+    """
+    # Union-find over the ball numbers
+    parents: Dict[int, int] = {}
+
+    def find_root(ball_num: int) -> int:
+        """
+        Finds the number of the ball that represents the cluster the given ball is in
+        :param ball_num: The number of the ball
+        :return: The number of the cluster's representative ball
+        """
+        while parents[ball_num] != ball_num:
+            parents[ball_num] = parents[parents[ball_num]]
+            ball_num = parents[ball_num]
+
+        return ball_num
+
+    balls: Dict[int, PoolBall] = {}
+    for ball1, ball2 in touching_pairs:
+        for ball in (ball1, ball2):
+            if ball.num not in parents:
+                parents[ball.num] = ball.num
+                balls[ball.num] = ball
+
+        root1 = find_root(ball1.num)
+        root2 = find_root(ball2.num)
+        if root1 != root2:
+            parents[max(root1, root2)] = min(root1, root2)
+
+    cluster_balls: Dict[int, List[PoolBall]] = {}
+    for ball_num in sorted(balls):
+        cluster_balls.setdefault(find_root(ball_num), []).append(balls[ball_num])
+
+    cluster_contacts: Dict[int, List[Tuple[int, int]]] = {root: [] for root in cluster_balls}
+    for ball1, ball2 in sorted(touching_pairs, key=lambda pair: (pair[0].num, pair[1].num)):
+        root = find_root(ball1.num)
+        cluster = cluster_balls[root]
+        cluster_contacts[root].append((cluster.index(ball1), cluster.index(ball2)))
+
+    return [(cluster_balls[root], cluster_contacts[root]) for root in sorted(cluster_balls)]
+
+
+def resolve_contact_cluster(balls: List[PoolBall], contacts: List[Tuple[int, int]]) -> bool:
+    """
+    Resolves every collision in a cluster of touching balls at the same time.
+    The impulses for all the approaching contacts are solved for together so that the result does not depend on
+        the order of the contacts, then any overlapping balls are pushed apart
+    :param balls: The balls in the cluster
+    :param contacts: The contacts in the cluster as pairs of indices into `balls`
+    :return: True if any impulse was applied; False otherwise
+    """
+    num_contacts = len(contacts)
+    contact_range = np.arange(num_contacts)
+
+    positions = np.array([(ball.x_pos, ball.y_pos) for ball in balls], dtype=float)
+    velocities = np.array([(ball.x_velo, ball.y_velo) for ball in balls], dtype=float)
+
+    first_balls = np.array([contact[0] for contact in contacts])
+    second_balls = np.array([contact[1] for contact in contacts])
+
+    # Which balls take part in each contact. The first ball is pushed along the normal and the second against it
+    contact_signs = np.zeros((num_contacts, len(balls)))
+    contact_signs[contact_range, first_balls] = 1
+    contact_signs[contact_range, second_balls] = -1
+
+    # The normals point from the second ball towards the first
+    offsets = positions[first_balls] - positions[second_balls]
+    distances = np.hypot(offsets[:, 0], offsets[:, 1])
+    normals = np.zeros_like(offsets)
+    normals[:, 0] = 1  # Used when two balls are at exactly the same position
+    separated = distances > 0
+    normals[separated] = offsets[separated] / distances[separated, np.newaxis]
+
+    normal_velocities = np.sum((contact_signs @ velocities) * normals, axis=1)
+
+    # Since the masses of the balls are the same, the effect each contact's impulse has on every other contact
+    #   only depends on the balls they share and the angle between their normals
+    effect_matrix = (contact_signs @ contact_signs.T) * (normals @ normals.T)
+
+    # Only approaching contacts are given impulses. Contacts that would need to pull their balls together
+    #   are removed and the rest are solved again
+    impulses = np.zeros(num_contacts)
+    active = normal_velocities < 0
+    while np.any(active):
+        active_effects = effect_matrix[np.ix_(active, active)]
+        targets = -(1 + c.BOUNCE_MODIFIER) * normal_velocities[active]
+
+        active_impulses = np.linalg.lstsq(active_effects, targets, rcond=None)[0]
+
+        if np.all(active_impulses >= 0):
+            impulses[active] = active_impulses
+            break
+
+        active[np.flatnonzero(active)[active_impulses < 0]] = False
+
+    velocities += contact_signs.T @ (impulses[:, np.newaxis] * normals)
+
+    # Push overlapping balls apart, each by half of the overlap
+    overlaps = np.maximum(2 * c.BALL_RADIUS - distances, 0)
+    positions += contact_signs.T @ ((overlaps / 2)[:, np.newaxis] * normals)
+
+    for index, ball in enumerate(balls):
+        ball.x_pos = float(positions[index, 0])
+        ball.y_pos = float(positions[index, 1])
+        ball.set_velocity((float(velocities[index, 0]), float(velocities[index, 1])))
+
+    return bool(np.any(impulses > 0))
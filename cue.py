@@ -6,6 +6,24 @@ import utilities as util
 from constants import Point
 
 
+# The scaled image of the cue stick, loaded the first time a cue is created and shared by every cue after that
+cue_image: pygame.Surface | None = None
+
+
+def load_cue_image() -> pygame.Surface:
+    """
+    Loads and scales the image of the cue stick, or returns it if it has already been loaded
+    :return: The image of the cue stick
+    """
+    global cue_image
+
+    if cue_image is None:
+        cue_image = pygame.image.load("images/cue_stick.png")
+        cue_image = pygame.transform.scale(surface=cue_image, size=(c.CUE_WIDTH, c.CUE_HEIGHT))
+
+    return cue_image
+
+
 class Cue(pygame.sprite.Sprite):
     def __init__(self, center_of_rotation: Point):
         super().__init__()
@@ -17,8 +35,7 @@ class Cue(pygame.sprite.Sprite):
         self.rotation_offset: int = c.MIN_ROTATION_OFFSET
 
         # Initialize the image
-        self.image: pygame.surface = pygame.image.load("images/cue_stick.png")
-        self.image = pygame.transform.scale(surface=self.image, size=(c.CUE_WIDTH, c.CUE_HEIGHT))
+        self.image: pygame.surface = load_cue_image()
         self.rect: pygame.Rect = self.image.get_rect()  # Will be used to control cue movement and rotation
         self.set_rect_center(self.rotation_point)
 
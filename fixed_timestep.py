@@ -0,0 +1,103 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+import constants as c
+from pool_ball_list import PoolBallList
+
+
+class FixedTimestep:
+    def __init__(self, step_rate: float = c.PHYSICS_RATE, max_steps_per_frame: int = c.MAX_PHYSICS_STEPS_PER_FRAME,
+                 get_time: Callable[[], float] = time.perf_counter):
+        """
+        Decides how many physics steps to take on each frame so that the simulation runs at a fixed rate,
+            however quickly frames are drawn
+        :param step_rate: The number of physics steps per second
+        :param max_steps_per_frame: The most steps to take on one frame. Time beyond this is dropped
+        :param get_time: The function that gets the current time in seconds
+        """
+        self.step_time: float = 1 / step_rate
+        self.max_steps_per_frame: int = max_steps_per_frame
+        self.get_time: Callable[[], float] = get_time
+
+        self.accumulated_time: float = 0  # The time that has passed but hasn't been simulated yet
+        self.last_time: float = get_time()
+
+    def start(self) -> None:
+        """
+        Starts timing from now, discarding any time that hasn't been simulated
+        """
+        self.accumulated_time = 0
+        self.last_time = self.get_time()
+
+    def advance(self) -> int:
+        """
+        Adds the time since the last call and takes out the steps that are due
+        :return: The number of physics steps to take
+        """
+        current_time = self.get_time()
+        self.accumulated_time += current_time - self.last_time
+        self.last_time = current_time
+
+        num_steps = int(self.accumulated_time // self.step_time)
+
+        # Falling further and further behind would make every frame slower, so the extra time is dropped
+        if num_steps > self.max_steps_per_frame:
+            num_steps = self.max_steps_per_frame
+            self.accumulated_time = num_steps * self.step_time
+
+        self.accumulated_time -= num_steps * self.step_time
+
+        return num_steps
+
+    def get_interpolation_fraction(self) -> float:
+        """
+        Gets how far the current time is between the last physics step and the next one
+        :return: A fraction from 0 to 1
+        """
+        return min(self.accumulated_time / self.step_time, 1)
+
+
+class StateBuffer:
+    def __init__(self, num_balls: int = 16):
+        """
+        Holds the states of the balls after the last two physics steps, so that frames can be drawn between them
+        :param num_balls: The number of ball numbers
+        """
+        self.previous: np.ndarray = np.zeros((num_balls, c.BALL_STATE_SIZE))
+        self.current: np.ndarray = np.zeros((num_balls, c.BALL_STATE_SIZE))
+
+        self.positions: np.ndarray = np.zeros((num_balls, 2))  # The interpolated positions, reused on every frame
+
+    def reset(self, pool_balls: PoolBallList) -> None:
+        """
+        Fills both states with the current state of the balls, such as when they start moving
+        :param pool_balls: The balls
+        """
+        pool_balls.write_state(self.current)
+        self.previous[:] = self.current
+
+    def publish(self, pool_balls: PoolBallList) -> None:
+        """
+        Stores the state of the balls after a physics step, keeping the state before it
+        :param pool_balls: The balls
+        """
+        self.previous, self.current = self.current, self.previous
+        pool_balls.write_state(self.current)
+
+    def interpolate(self, fraction: float) -> np.ndarray:
+        """
+        Finds the position of each ball part way between the last two physics steps.
+        Balls that weren't in play for both steps are put at their current position
+        :param fraction: How far between the previous and current states, from 0 to 1
+        :return: An array of the x- and y-position of each ball number. It is reused by the next call
+        """
+        np.subtract(self.current[:, 0:2], self.previous[:, 0:2], out=self.positions)
+        self.positions *= fraction
+        self.positions += self.previous[:, 0:2]
+
+        was_in_play = (self.previous[:, 4] != 0) & (self.current[:, 4] != 0)
+        self.positions[~was_in_play] = self.current[~was_in_play, 0:2]
+
+        return self.positions
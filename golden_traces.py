@@ -0,0 +1,258 @@
+import argparse
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+import constants as c
+from constants import Point
+from pool_ball_list import PoolBallList
+from rack import generate_rack
+import shots
+
+
+GOLDEN_TRACES_FILENAME = "traces/golden_traces.npz"
+GOLDEN_TRACE_SHOTS = 64  # The number of shots in the committed corpus
+# The number of steps of each shot compared when the corpus was recorded with a different NumPy or BLAS.
+#   Rounding differences grow over a shot, but a change of one part in a million to the cue ball's velocity,
+#   far larger than any rounding difference, still stays within the default tolerance for this many steps
+GOLDEN_TRACE_PORTABLE_STEPS = 100
+
+
+def step_balls(pool_balls: PoolBallList) -> None:
+    """
+    Moves the balls forward by one step with the current physics engine
+    :param pool_balls: The balls on the table
+    """
+    pool_balls.move_balls()
+    pool_balls.perform_collisions()
+
+
+@dataclass
+class TraceComparison:
+    shot_index: int  # The index of the shot in the corpus
+    seed: int  # The seed of the rack the shot was taken on
+    first_divergent_step: int | None  # The first step where a ball was outside the tolerance, or None if none were
+    max_error: float  # The largest distance in either axis between a ball and its reference position
+
+
+def get_environment() -> str:
+    """
+    Describes the libraries that decide how the physics is rounded, which a corpus is only exact for
+    :return: The NumPy version and the BLAS library it uses, such as "NumPy 2.4.6, scipy-openblas 0.3.31"
+    """
+    blas = np.show_config(mode="dicts")["Build Dependencies"]["blas"]
+
+    return "NumPy " + np.__version__ + ", " + str(blas.get("name")) + " " + str(blas.get("version"))
+
+
+def set_up_shot(seed: int, cue_ball_position: Point) -> PoolBallList:
+    """
+    Racks the balls for a reference shot
+    :param seed: The seed of the rack
+    :param cue_ball_position: The position of the top-left corner of the cue ball
+    :return: The balls, ready to be hit
+    """
+    pool_balls = PoolBallList()
+    pool_balls.set_up_rack(generate_rack(seed))
+    pool_balls.get(0).set_position(cue_ball_position)
+
+    return pool_balls
+
+
+def trace_shot(pool_balls: PoolBallList, cue_ball_velocity: Tuple[float, float], max_steps: int,
+               step_function: Callable[[PoolBallList], None] = step_balls) -> np.ndarray:
+    """
+    Hits the cue ball and records the position of every ball after each step until they have all stopped
+    :param pool_balls: The racked balls
+    :param cue_ball_velocity: The velocity the cue ball is hit with
+    :param max_steps: The most steps to record
+    :param step_function: The function that moves the balls forward by one step
+    :return: An array with the x- and y-position of each ball number for every step, starting with the positions
+                before the shot. Balls that are out of play are NaN
+    """
+    pool_balls.get(0).set_velocity(cue_ball_velocity)
+    pool_balls.wake_ball(ball_num=0)
+
+    state = np.zeros((16, c.BALL_STATE_SIZE))
+    positions: List[np.ndarray] = []
+
+    while True:
+        pool_balls.write_state(state)
+        positions.append(np.where(state[:, 4:5] != 0, state[:, 0:2], np.nan))
+
+        if pool_balls.all_balls_stationary() or len(positions) > max_steps:
+            break
+
+        step_function(pool_balls)
+
+    return np.array(positions)
+
+
+def record_corpus(num_shots: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Records reference shots with random racks, cue ball positions, cue stick angles, and powers
+    :param num_shots: The number of shots to record
+    :param seed: The seed used to choose the shots
+    :return: The corpus as a dictionary of arrays, which can be saved with `np.savez_compressed`.
+                It includes the environment it was recorded with
+    """
+    generator = random.Random(seed)
+
+    felt_min_x, felt_min_y, felt_max_x, felt_max_y = PoolBallList().table_geometry.felt_bounds
+
+    seeds = np.array([generator.randrange(2 ** 31) for _ in range(num_shots)])
+    cue_ball_positions = np.array([(generator.uniform(c.TABLE_HEAD_STRING_LOCATION, felt_max_x - 2 * c.BALL_RADIUS),
+                                    generator.uniform(felt_min_y, felt_max_y - 2 * c.BALL_RADIUS))
+                                   for _ in range(num_shots)])
+    angles = np.array([generator.uniform(0, 360) for _ in range(num_shots)])
+    rotation_offsets = np.array([generator.uniform(c.MIN_ROTATION_OFFSET, c.MAX_ROTATION_OFFSET)
+                                 for _ in range(num_shots)])
+
+    traces = [trace_shot(set_up_shot(int(seeds[index]), Point(*cue_ball_positions[index])),
+                         get_cue_ball_velocity(angles[index], rotation_offsets[index]), c.MAX_SHOT_STEPS)
+              for index in range(num_shots)]
+
+    # Every trace is stored in one array, in single precision since the positions are far larger than any tolerance
+    return {"environment": np.array(get_environment()),
+            "seeds": seeds,
+            "cue_ball_positions": cue_ball_positions,
+            "angles": angles,
+            "rotation_offsets": rotation_offsets,
+            "step_counts": np.array([len(trace) for trace in traces]),
+            "positions": np.concatenate(traces).astype(np.float32)}
+
+
+def get_cue_ball_velocity(angle: float, rotation_offset: float) -> Tuple[float, float]:
+    """
+    Determines the velocity the cue stick would hit the cue ball at
+    :param angle: The angle of the cue stick
+    :param rotation_offset: How far the cue stick is from its center of rotation
+    :return: A tuple containing the x- and y-portions of the velocity
+    """
+    x_velocities, y_velocities = shots.shot_velocities(np.array([angle]), np.array([rotation_offset]))
+
+    return float(x_velocities[0]), float(y_velocities[0])
+
+
+def compare_trace(reference: np.ndarray, candidate: np.ndarray, tolerance: float,
+                  tolerance_growth: float) -> Tuple[int | None, float]:
+    """
+    Compares every step of a candidate trace against a reference trace at once
+    :param reference: The reference positions of each ball for every step
+    :param candidate: The candidate positions of each ball for every step
+    :param tolerance: The largest difference allowed in either axis on the first step
+    :param tolerance_growth: How much the allowed difference grows by each step
+    :return: A tuple containing the first step outside the tolerance, or None if there isn't one,
+                and the largest difference found
+    """
+    num_steps = max(len(reference), len(candidate))
+
+    # A trace that stops early is compared as if its balls stayed where they stopped
+    reference = np.concatenate((reference, np.repeat(reference[-1:], num_steps - len(reference), axis=0)))
+    candidate = np.concatenate((candidate, np.repeat(candidate[-1:], num_steps - len(candidate), axis=0)))
+
+    errors = np.abs(reference - candidate)
+    # Being in play in one trace but not the other can never be within the tolerance
+    errors[np.isnan(reference) != np.isnan(candidate)] = np.inf
+    errors[np.isnan(reference) & np.isnan(candidate)] = 0
+
+    step_errors = errors.reshape(num_steps, -1).max(axis=1)
+    step_tolerances = tolerance + tolerance_growth * np.arange(num_steps)
+
+    divergent_steps = np.flatnonzero(step_errors > step_tolerances)
+    first_divergent_step = int(divergent_steps[0]) if len(divergent_steps) > 0 else None
+
+    return first_divergent_step, float(step_errors.max())
+
+
+def get_comparable_steps(corpus: Dict[str, np.ndarray]) -> int | None:
+    """
+    Determines how many steps of each shot can be compared in the current environment
+    :param corpus: The corpus, as returned by `record_corpus` or loaded from a file
+    :return: None if the corpus was recorded with the same NumPy and BLAS, so whole shots can be compared,
+                otherwise `GOLDEN_TRACE_PORTABLE_STEPS`
+    """
+    if "environment" in corpus and str(corpus["environment"]) == get_environment():
+        return None
+
+    return GOLDEN_TRACE_PORTABLE_STEPS
+
+
+def check_corpus(corpus: Dict[str, np.ndarray], step_function: Callable[[PoolBallList], None] = step_balls,
+                 tolerance: float = 1e-3, tolerance_growth: float = 0,
+                 num_steps: int | None = None) -> List[TraceComparison]:
+    """
+    Replays every shot in a corpus with a physics engine and compares it against the recorded trace
+    :param corpus: The corpus, as returned by `record_corpus` or loaded from a file
+    :param step_function: The function that moves the balls forward by one step
+    :param tolerance: The largest difference allowed in either axis on the first step
+    :param tolerance_growth: How much the allowed difference grows by each step
+    :param num_steps: The number of steps of each shot to compare, including the positions before the shot.
+                        Whole shots are compared if None
+    :return: A list containing the TraceComparison for each shot
+    """
+    trace_starts = np.concatenate(([0], np.cumsum(corpus["step_counts"])))
+    comparisons: List[TraceComparison] = []
+
+    for index, seed in enumerate(corpus["seeds"]):
+        reference = corpus["positions"][trace_starts[index]:trace_starts[index + 1]][:num_steps].astype(float)
+
+        pool_balls = set_up_shot(int(seed), Point(*corpus["cue_ball_positions"][index]))
+        candidate = trace_shot(pool_balls,
+                               get_cue_ball_velocity(corpus["angles"][index], corpus["rotation_offsets"][index]),
+                               max_steps=len(reference) + c.MAX_SHOT_STEPS if num_steps is None else num_steps - 1,
+                               step_function=step_function)
+
+        first_divergent_step, max_error = compare_trace(reference, candidate, tolerance, tolerance_growth)
+        comparisons.append(TraceComparison(index, int(seed), first_divergent_step, max_error))
+
+    return comparisons
+
+
+def load_corpus(filename: str = GOLDEN_TRACES_FILENAME) -> Dict[str, np.ndarray]:
+    """
+    Loads a corpus saved by `record_corpus`
+    :param filename: The name of the file
+    :return: The corpus as a dictionary of arrays
+    """
+    with np.load(filename) as corpus_file:
+        return {name: corpus_file[name] for name in corpus_file.files}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Records or checks the golden-trace corpus of reference shots. Whole shots are only compared "
+                    "with the NumPy and BLAS the corpus was recorded with, since rounding differences grow over a "
+                    "shot. After an intended physics change, or to check whole shots with other libraries, "
+                    "record the corpus again with `python golden_traces.py record`")
+    parser.add_argument("action", choices=["record", "check"])
+    parser.add_argument("--shots", type=int, default=GOLDEN_TRACE_SHOTS, help="The number of shots to record")
+    parser.add_argument("--file", default=GOLDEN_TRACES_FILENAME)
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    parser.add_argument("--tolerance-growth", type=float, default=0)
+    parser.add_argument("--steps", type=int,
+                        help="The number of steps of each shot to compare. By default, whole shots are compared if "
+                             "the corpus was recorded with the same NumPy and BLAS, otherwise only the first " +
+                             str(GOLDEN_TRACE_PORTABLE_STEPS))
+    arguments = parser.parse_args()
+
+    if arguments.action == "record":
+        np.savez_compressed(arguments.file, **record_corpus(arguments.shots))
+    else:
+        loaded_corpus = load_corpus(arguments.file)
+        compared_steps = arguments.steps if arguments.steps is not None else get_comparable_steps(loaded_corpus)
+
+        print("Recorded with " + (str(loaded_corpus["environment"]) if "environment" in loaded_corpus else
+                                  "an unknown environment") + ", checking with " + get_environment() + ", comparing " +
+              ("whole shots" if compared_steps is None else "the first " + str(compared_steps) + " steps"))
+
+        results = check_corpus(loaded_corpus, tolerance=arguments.tolerance,
+                               tolerance_growth=arguments.tolerance_growth, num_steps=compared_steps)
+
+        for result in results:
+            status = "ok" if result.first_divergent_step is None else \
+                "diverged at step " + str(result.first_divergent_step)
+            print("Shot " + str(result.shot_index) + " (rack " + str(result.seed) + "): " + status +
+                  ", max error " + str(result.max_error))
@@ -1,20 +1,52 @@
-import random
+import argparse
 import sys
-from typing import List, Tuple, Dict
+import time
+from typing import Dict, List, Sequence, Tuple
 
+import numpy as np
 import pygame
 
 import constants as c
-from constants import Players, GamePhases, BallTypes, Point
+from aim_preview import AimPreview
+from constants import BallTypes, GamePhases, Players, Point
 from cue import Cue
+from fixed_timestep import FixedTimestep, StateBuffer
 from pool_ball import PoolBall
 from pool_ball_list import PoolBallList
 from pool_table import PoolTable
+from quality_governor import QUALITY_LEVELS, QualityGovernor, QualityLevel
+from rack import generate_rack
+from render_target import RenderTarget
+from replays import ReplayRecorder
+from rules import GameState
+from scenarios import Scenario, load_scenario
+from table_geometry import TableGeometry
+from telemetry import TelemetryWriter
+from tweens import TweenScheduler
 import utilities as util
 
 
 class GameLoop:
-    def __init__(self):
+    def __init__(self, seed: int | None = None, render_scale: float = c.RENDER_SCALE,
+                 replay_filename: str | None = None, telemetry_filename: str | None = None):
+        """
+        Creates the display and every game object, ready to start a game
+        :param seed: The seed used to generate the rack. A random rack is used if not given
+        :param render_scale: The size of the resolution frames are drawn at compared to the window's
+        :param replay_filename: The file to save a replay of every shot to when the game is quit.
+                                    Nothing is recorded if not given
+        :param telemetry_filename: The file to write a record of every shot and game to. Nothing is written if not given
+        """
+        self.seed: int | None = seed
+        self.render_scale: float = render_scale
+
+        self.replay_filename: str | None = replay_filename
+        self.replay_recorder: ReplayRecorder | None = ReplayRecorder() if replay_filename is not None else None
+
+        # Records are written from a background thread so that the game loop never waits on the disk
+        self.telemetry: TelemetryWriter | None = (TelemetryWriter(telemetry_filename)
+                                                  if telemetry_filename is not None else None)
+
         self.initialize_display()
         self.initialize_fonts()
         self.initialize_game_flags_and_trackers()
@@ -24,6 +56,21 @@ class GameLoop:
 
         self.clock = pygame.time.Clock()
 
+        # The physics runs at a fixed rate, and frames are drawn between its last two states
+        self.physics_timestep: FixedTimestep = FixedTimestep()
+        self.state_buffer: StateBuffer = StateBuffer()
+
+        # Animations that play over several frames without blocking the game loop
+        self.tweens: TweenScheduler = TweenScheduler()
+
+        # Lowers the drawing quality when frames take too long
+        self.quality_governor: QualityGovernor = QualityGovernor()
+
+        # What was on screen in the last drawn frame, used to skip drawing frames that would look the same
+        self.last_frame_signature: Tuple | None = None
+        # The event that woke the loop from waiting on an idle frame, which the phase handles before any newer events
+        self.waited_event: pygame.event.Event | None = None
+
         self.pygame_event_sets = {"action": [pygame.QUIT, pygame.MOUSEBUTTONDOWN,
                                              pygame.MOUSEBUTTONUP],
                                   "no_action": [pygame.QUIT],
@@ -42,21 +89,25 @@ class GameLoop:
 
         self.display_surface.blit(self.background, (0, 0))
 
+        # Frames are drawn at the internal resolution, then scaled up to the window
+        self.render_target: RenderTarget = RenderTarget(self.display_surface, self.render_scale)
+
     def initialize_fonts(self) -> None:
+        """
+        Initializes the font used on every frame. The winner font is only loaded once a game has been won
+        """
         pygame.font.init()
         self.player_text_font = pygame.font.Font(c.PLAYER_TEXT_FONT_FILENAME, c.PLAYER_TEXT_FONT_SIZE)
-        self.winner_text_font = pygame.font.Font(c.WINNER_TEXT_FONT_FILENAME, c.WINNER_TEXT_FONT_SIZE)
+        self.winner_text_font: pygame.font.Font | None = None
+
+        # The image of each text that has been drawn, so that it's only rendered once
+        self.text_images: Dict[Tuple[pygame.font.Font, str, Tuple[int, int, int]], pygame.Surface] = {}
 
     def initialize_sprite_groups(self) -> None:
         """
-        Initializes the groups for holding the sprites
+        Initializes the list holding the pool balls and their sprites.
+        The pool table and cue stick sprites are drawn directly through the render target
         """
-        # The pool_table_sprite and cue_sprite will only contain one sprite.
-        #   Groups are used because pygame provides simple methods for clearing and drawing sprites
-        #   that are only able to be used on groups.
-        self.pool_table_sprite: pygame.sprite.Group = pygame.sprite.Group()
-        self.cue_sprite: pygame.sprite.Group = pygame.sprite.Group()
-
         self.pool_balls: PoolBallList = PoolBallList()
 
     def initialize_game_board(self) -> None:
@@ -64,7 +115,8 @@ class GameLoop:
         Initializes the pool table sprite
         """
         self.pool_table: PoolTable = PoolTable(Point(c.SCREEN_WIDTH_PADDING, c.SCREEN_HEIGHT_PADDING))
-        self.pool_table_sprite.add(self.pool_table)
+
+        self.pool_balls.table_geometry = TableGeometry.from_pool_table(self.pool_table)
 
     def initialize_game_flags_and_trackers(self) -> None:
         """
@@ -72,42 +124,83 @@ class GameLoop:
         """
         self.current_phase: GamePhases = GamePhases.place_cue
 
-        self.current_player: Players = Players.player1
-
-        self.player_ball_types: Dict[Players, BallTypes | None] = {Players.player1: None,
-                                                                   Players.player2: None}
-
-        self.num_balls_in: Dict[BallTypes, int] = {BallTypes.solid: 0,
-                                                   BallTypes.striped: 0}
-
-        self.winner: Players | None = None
+        # The current player, their ball types, the number of balls in, and the winner
+        self.game_state: GameState = GameState()
 
         self.first_turn: bool = True  # Whether it's the first turn or not
 
-        self.need_to_place_cue_ball: bool = False
+        self.num_shots: int = 0  # The number of shots taken in the current game
+        self.game_start_time: float = time.time()
 
-        self.has_ball_gone_in_pocket: bool = False  # If a ball has gone in on the current turn
+        # How the cue ball was hit on the current shot, for its telemetry record
+        self.shot_parameters: Dict | None = None
 
     def initialize_game_objects(self) -> None:
         """
         Initialize the cue stick and the pool balls
         """
-        # Create cue ball
-        self.pool_balls.add_ball(0, c.CUE_BALL_START_LOCATION)
+        # Create the cue ball, the 8-ball, and the 14 regular pool balls
+        self.pool_balls.set_up_rack(generate_rack(self.seed))
 
-        # Create 8-ball
-        self.pool_balls.add_ball(8, c.EIGHT_BALL_START_LOCATION)
+        # Create the cue stick
+        self.cue: Cue = Cue(self.pool_balls.get(0).get_position())
 
-        # Create the 14 regular pool balls
-        for ball_number in c.REGULAR_POOL_BALL_NUMBERS:
-            ball_start_location = c.REGULAR_POOL_BALL_START_LOCATIONS.pop(
-                random.randint(0, len(c.REGULAR_POOL_BALL_START_LOCATIONS) - 1))
+        # Predicts the path of the cue ball while aiming. Created at the start of each `Hit Cue` phase
+        self.aim_preview: AimPreview | None = None
 
-            self.pool_balls.add_ball(ball_number, ball_start_location)
+    def reset_game(self, seed: int | None = None) -> None:
+        """
+        Resets the table in place to start a new game, reusing the display, fonts, and sprites of the current one
+        :param seed: The seed used to generate the new rack. A random rack is used if not given
+        """
+        self.seed = seed
 
-        # Create the cue stick
-        self.cue: Cue = Cue(self.pool_balls.get(0).get_position())
-        self.cue_sprite.add(self.cue)
+        self.initialize_game_flags_and_trackers()
+
+        self.pool_balls.set_up_rack(generate_rack(self.seed))
+        self.pool_table.visible = True
+
+        self.tweens.cancel_all()
+        self.cue.reset_rotation()
+        self.cue.visible = False
+        self.aim_preview = None
+
+    def load_scenario(self, scenario: Scenario) -> None:
+        """
+        Sets up the table and the game state from a scenario, such as to reproduce a reported bug.
+        Balls that are out of play are shown below the table, and the game continues from the phase the balls are in
+        :param scenario: The scenario to load. It must be on the table used by the game
+        :raises ValueError: If the scenario has its own table or a ball number the game doesn't have
+        """
+        scenario.check_fits_game()
+
+        self.reset_game(self.seed)
+
+        scenario.apply_to_pool_balls(self.pool_balls)
+
+        self.game_state = scenario.build_game_state()
+        self.first_turn = False
+
+        # The balls that are out of play are lined up below the table in number order
+        num_balls_shown_below = {BallTypes.solid: 0, BallTypes.striped: 0}
+        for ball in self.pool_balls.pool_balls:
+            if ball.in_play:
+                continue
+
+            if ball.num in (0, 8):
+                ball.set_velocity((0, 0))
+                self.pool_balls.hide_ball(ball.num)
+            else:
+                ball.display_ball_below(num_balls_shown_below)
+                num_balls_shown_below[ball.type] += 1
+
+        if not self.pool_balls.get(0).in_play:
+            self.game_state.need_to_place_cue_ball = True
+            self.current_phase = GamePhases.place_cue
+        elif not self.pool_balls.all_balls_stationary():
+            self.current_phase = GamePhases.ball_in_play
+        else:
+            self.current_phase = GamePhases.hit_cue
 
     def run_game(self) -> None:
         """
@@ -138,19 +231,19 @@ class GameLoop:
             Determines the limits on where the cue ball can be placed based on whether it's the first turn
             :return: A Dictionary containing the min and max x- and y-values
             """
+            felt_min_x, felt_min_y, felt_max_x, felt_max_y = self.pool_balls.table_geometry.felt_bounds
+
             limits: Dict[str, float] = {
-                "max_x":
-                    c.POOL_TABLE_WIDTH - 31 - (c.BALL_RADIUS * 2) + c.SCREEN_WIDTH_PADDING,
-                "min_y": 30 + c.SCREEN_HEIGHT_PADDING,
-                "max_y":
-                    c.POOL_TABLE_HEIGHT - 31 - (c.BALL_RADIUS * 2) + c.SCREEN_HEIGHT_PADDING}
+                "max_x": felt_max_x - (c.BALL_RADIUS * 2),
+                "min_y": felt_min_y,
+                "max_y": felt_max_y - (c.BALL_RADIUS * 2)}
 
             if self.first_turn:
                 self.first_turn = False
 
                 limits["min_x"] = c.TABLE_HEAD_STRING_LOCATION
             else:
-                limits["min_x"] = 30 + c.SCREEN_WIDTH_PADDING
+                limits["min_x"] = felt_min_x
 
             return limits
 
@@ -160,28 +253,28 @@ class GameLoop:
             """
             cursor_pos: Point = self.get_cursor_pos()
 
-            cursor_pos.x -= c.BALL_RADIUS  # Subtracts the ball radius to that the cursor is in the center of the ball,
-            cursor_pos.y -= c.BALL_RADIUS  # rather than the top-left corner
+            ball_x = cursor_pos.x - c.BALL_RADIUS  # Subtracts the ball radius to that the cursor is in the center of the ball,
+            ball_y = cursor_pos.y - c.BALL_RADIUS  # rather than the top-left corner
 
             # Bind the cue ball to the limits
-            if cursor_pos.y < pos_limits["min_y"]:
-                cursor_pos.y = pos_limits["min_y"]
-            elif cursor_pos.y > pos_limits["max_y"]:
-                cursor_pos.y = pos_limits["max_y"]
+            if ball_y < pos_limits["min_y"]:
+                ball_y = pos_limits["min_y"]
+            elif ball_y > pos_limits["max_y"]:
+                ball_y = pos_limits["max_y"]
 
-            if cursor_pos.x < pos_limits["min_x"]:
-                cursor_pos.x = pos_limits["min_x"]
-            elif cursor_pos.x > pos_limits["max_x"]:
-                cursor_pos.x = pos_limits["max_x"]
+            if ball_x < pos_limits["min_x"]:
+                ball_x = pos_limits["min_x"]
+            elif ball_x > pos_limits["max_x"]:
+                ball_x = pos_limits["max_x"]
 
-            self.pool_balls.get(0).set_position(cursor_pos)
+            self.pool_balls.get(0).set_position(Point(ball_x, ball_y))
 
         if c.DEBUGGING:
-            print("[DEBUG-main.py]: starting place cue ball phase for " + str(self.current_player))
+            print("[DEBUG-main.py]: starting place cue ball phase for " + str(self.game_state.current_player))
 
         pygame.event.set_allowed(self.pygame_event_sets["action"])
 
-        self.need_to_place_cue_ball = False
+        self.game_state.need_to_place_cue_ball = False
         self.cue.visible = False
         self.pool_balls.show_ball(ball_num=0)
 
@@ -192,13 +285,13 @@ class GameLoop:
 
             set_cue_ball_pos()
 
-            for event in pygame.event.get():
+            for event in self.get_events():
                 if event.type == pygame.QUIT:
                     self.current_phase = GamePhases.quit
                     return
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.current_phase = GamePhases.hit_cue
-                    self.pool_balls.get(0).in_play = True
+                    self.pool_balls.return_ball_to_play(ball_num=0)
                     return
 
     def hit_cue_phase(self):
@@ -208,34 +301,35 @@ class GameLoop:
         """
         def release_cue() -> None:
             """
-            Releases the cue stick and sets the velocity of the cue ball
+            Starts moving the cue stick forward to the cue ball.
+            The cue ball is hit once it gets there, while events keep being handled on every frame
             """
             cue_ball_velocity = self.cue.determine_cue_ball_velocity()
 
-            # Moves the offset to touch the cue ball over a set amount of time
-            current_frame = 0
-            frames_to_move = seconds_to_move * c.MAX_FRAMERATE
-
-            release_offset = self.cue.rotation_offset  # The offset when the cue was released
+            cue_ball = self.pool_balls.get(0)
+            self.shot_parameters = {"angle": self.cue.angle,
+                                    "rotation_offset": self.cue.rotation_offset,
+                                    "cue_ball_velocity": list(cue_ball_velocity),
+                                    "cue_ball_position": [cue_ball.x_pos, cue_ball.y_pos]}
 
-            change_in_offset_per_frame = (release_offset - c.EDGE_OF_BALL_OFFSET) / frames_to_move
+            def hit_cue_ball() -> None:
+                """
+                Sets the velocity of the cue ball and moves to the `Ball in Play` phase
+                """
+                self.pool_balls.get(0).set_velocity(cue_ball_velocity)
+                self.pool_balls.wake_ball(ball_num=0)
+                self.cue.reset_rotation()
+                self.cue.visible = False
+                self.aim_preview = None
 
-            while current_frame < frames_to_move:
-                self.cue.set_cue_power_to_offset((self.cue.rotation_offset - change_in_offset_per_frame))
+                self.current_phase = GamePhases.ball_in_play
 
-                self.tick_frame()
-
-                current_frame += 1
-
-            # Hits the cue ball
-            self.pool_balls.get(0).set_velocity(cue_ball_velocity)
-            self.cue.reset_rotation()
-            self.cue.visible = False
+            # Moves the offset to touch the cue ball over a set amount of time
+            self.tweens.add(self.cue.rotation_offset, c.EDGE_OF_BALL_OFFSET, c.CUE_RELEASE_SECONDS,
+                            self.cue.set_cue_power_to_offset, on_finish=hit_cue_ball)
 
         if c.DEBUGGING:
-            print("[DEBUG-main.py]: starting hit cue phase for " + str(self.current_player))
-
-        seconds_to_move = 0.2
+            print("[DEBUG-main.py]: starting hit cue phase for " + str(self.game_state.current_player))
 
         pygame.event.set_allowed(self.pygame_event_sets["action"])
 
@@ -244,149 +338,161 @@ class GameLoop:
                                         self.pool_balls.get(0).y_pos + c.BALL_RADIUS)
         self.cue.visible = True
 
+        # The balls don't move while aiming, so their positions only need to be indexed once per turn
+        self.aim_preview = AimPreview(self.pool_balls, self.cue.rotation_point)
+
         while True:
             self.tick_frame()
 
+            # The release animation finishes by hitting the cue ball
+            if self.current_phase != GamePhases.hit_cue:
+                return
+
+            is_releasing = self.tweens.is_running()
+
             # Rotate the cue stick to follow the mouse
             cursor_pos = self.get_cursor_pos()
             cue_angle = self.cue.point_to_angle(cursor_pos)
             self.cue.rotate(cue_angle)
 
             # Allow the cue to be drawn back if it's been locked in place
-            if self.cue.rotation_locked:
+            if self.cue.rotation_locked and not is_releasing:
                 self.cue.set_cue_power(cursor_pos)
 
-            for event in pygame.event.get():
+            for event in self.get_events():
                 if event.type == pygame.QUIT:
+                    self.tweens.cancel_all()
                     self.current_phase = GamePhases.quit
                     return
+                elif is_releasing:
+                    # The cue stick can't be aimed again once it has been released
+                    continue
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.cue.rotation_locked = True
                 elif event.type == pygame.MOUSEBUTTONUP:
                     # Only hit the cue ball if the cue stick has been pulled back
                     if self.cue.rotation_offset > c.MIN_ROTATION_OFFSET:
                         release_cue()
-                        self.current_phase = GamePhases.ball_in_play
-                        return
+                        is_releasing = True
                     else:
                         self.cue.reset_rotation()
 
     def ball_in_play_phase(self) -> None:
         """
         Controls the phase of the game while the balls are in motion.
+        The physics runs at a fixed rate, and each frame is drawn between the last two physics steps.
         Transfers to `Place Cue Ball`, `Hit Cue`, or `Quit Game` phase
         """
-        def process_balls_in_pocket() -> None:
+        def process_balls_in_pocket(balls_in_pocket: Sequence[PoolBall]) -> None:
             """
             Handles any ball going in a pocket.
-            Decides whether there was a winner, if the cue ball needs to be placed,
-                and if the current player should be swapped.
+            The rules decide whether there was a winner and if the cue ball needs to be placed,
+                then the pocketed balls are hidden or shown below the table
+            :param balls_in_pocket: The balls that went into a pocket
             """
             # If any balls went in on this turn
             if len(balls_in_pocket) > 0:
-                # If no balls have been hit in the entire game
-                if self.num_balls_in[BallTypes.solid] == self.num_balls_in[BallTypes.striped] == 0:
-                    first_ball_type = balls_in_pocket[0].type
+                balls_pocketed_this_turn.extend(ball.num for ball in balls_in_pocket)
 
-                    # Handles if the eight-ball is the first ball in
-                    if first_ball_type == BallTypes.eight:
-                        self.winner = Players.swap_player(self.current_player)
-                        return
+                # The number of each type in before these balls, used to line them up below the table
+                num_balls_shown_below = dict(self.game_state.num_balls_in)
 
-                    self.player_ball_types[self.current_player] = first_ball_type
-                    self.player_ball_types[Players.swap_player(self.current_player)] = BallTypes.swap_type(
-                        first_ball_type)
+                self.game_state.pocket_balls(balls_in_pocket)
 
-                current_player_ball_type = self.player_ball_types[self.current_player]
                 for ball in balls_in_pocket:
                     if ball.num == 0:
-                        self.need_to_place_cue_ball = True
                         ball.set_velocity((0, 0))
                         self.pool_balls.hide_ball(ball_num=0)
 
-                    elif ball.num == 8:
-                        if self.num_balls_in[current_player_ball_type] == 7:
-                            self.winner = self.current_player
-                        else:
-                            self.winner = Players.swap_player(self.current_player)
-
-                    else:
-                        ball.display_ball_below(self.num_balls_in)
-                        self.num_balls_in[ball.type] += 1
+                    elif ball.num != 8:
+                        ball.display_ball_below(num_balls_shown_below)
+                        num_balls_shown_below[ball.type] += 1
 
-        def determine_next_phase() -> GamePhases:
+        def step_physics() -> bool:
             """
-            Determines the next phase that the game should switch to and swaps the current player if needed
-            :return: The phase to switch to
+            Moves the balls forward by one physics step and publishes their new state for drawing
+            :return: Whether the turn is over
             """
-            # If no ball collisions happened, it means the cue ball did not hit anything
-            if not any_ball_collided:
-                self.need_to_place_cue_ball = True
+            nonlocal any_ball_collided, num_steps, num_collision_steps
 
-            # Swap players if the cue ball needs to be placed or no balls have gone in
-            if not self.has_ball_gone_in_pocket or self.need_to_place_cue_ball:
-                self.current_player = self.current_player.swap_player()
+            process_balls_in_pocket(self.pool_balls.move_balls())
 
-            if self.winner is not None:
-                return GamePhases.game_over
+            if self.pool_balls.perform_collisions():
+                any_ball_collided = True
+                num_collision_steps += 1
 
-            elif self.need_to_place_cue_ball:
-                return GamePhases.place_cue
+            num_steps += 1
 
-            else:
-                return GamePhases.hit_cue
+            self.state_buffer.publish(self.pool_balls)
+            if self.replay_recorder is not None:
+                self.replay_recorder.record(self.state_buffer.current, self.game_state.current_player)
+
+            return self.pool_balls.all_balls_stationary() or self.game_state.winner is not None
 
         if c.DEBUGGING:
             pygame.event.set_allowed(self.pygame_event_sets["debug"])
-            print("[DEBUG-main.py]: starting ball in play phase for " + str(self.current_player))
+            print("[DEBUG-main.py]: starting ball in play phase for " + str(self.game_state.current_player))
         else:
             pygame.event.set_allowed(self.pygame_event_sets["no_action"])
 
-        balls_in_pocket: Tuple[PoolBall]  # A list of balls that went into a pocket on this turn
         any_ball_collided: bool = False  # Stores if any balls collided on this turn
 
-        while True:
-            self.tick_frame()
+        # Tracked for the telemetry record of the shot
+        num_steps: int = 0
+        num_collision_steps: int = 0
+        balls_pocketed_this_turn: List[int] = []
+        shooting_player = self.game_state.current_player
 
-            balls_in_pocket = self.pool_balls.move_balls()
-            any_ball_collided_single_step = self.pool_balls.perform_collisions()
+        self.game_state.start_turn()
 
-            if any_ball_collided_single_step:
-                any_ball_collided = True
+        self.state_buffer.reset(self.pool_balls)
+        if self.replay_recorder is not None:
+            self.replay_recorder.record(self.state_buffer.current, self.game_state.current_player)
 
-            process_balls_in_pocket()
+        self.physics_timestep.start()
 
-            if self.pool_balls.all_balls_stationary() or self.winner is not None:
-                self.current_phase = determine_next_phase()
-                return
+        while True:
+            for _ in range(self.physics_timestep.advance()):
+                if step_physics():
+                    self.current_phase = self.game_state.end_turn(any_ball_collided)
+                    self.num_shots += 1
+
+                    if self.telemetry is not None:
+                        self.write_shot_telemetry(shooting_player, num_steps, num_collision_steps,
+                                                  balls_pocketed_this_turn)
+                    return
+
+            self.tick_frame(self.state_buffer.interpolate(self.physics_timestep.get_interpolation_fraction()))
 
-            for event in pygame.event.get():
+            for event in self.get_events():
                 if event.type == pygame.QUIT:
                     self.current_phase = GamePhases.quit
                     return
                 # If debugging, allow key presses to count as getting the balls in the pocket.
                 #   The list of key presses can be found in the README
                 if c.DEBUGGING:
-                    balls_in_pocket: List[PoolBall] = []
                     if event.type == pygame.KEYDOWN:
                         for key_num, digit_event_key in enumerate(c.DEBUG_EVENTS):
                             if event.key == digit_event_key:
                                 key_num += 1
                                 debug_ball = self.pool_balls.get(key_num)
                                 if debug_ball.in_play:
-                                    balls_in_pocket.append(self.pool_balls.get(key_num))
-                                    process_balls_in_pocket()
+                                    self.pool_balls.remove_ball_from_play(debug_ball)
+                                    process_balls_in_pocket([debug_ball])
 
     def game_over_phase(self):
         """
-        Displays a screen showing the winner of the game
-        Transfers to the `Quit Game` phase
+        Displays a screen showing the winner of the game. Clicking starts a new game
+        Transfers to the `Place Cue Ball` or `Quit Game` phase
         """
 
         if c.DEBUGGING:
-            print("[DEBUG-main.py]: starting game over phase for " + str(self.current_player))
+            print("[DEBUG-main.py]: starting game over phase for " + str(self.game_state.current_player))
 
-        pygame.event.set_allowed(self.pygame_event_sets["no_action"])
+        pygame.event.set_allowed(self.pygame_event_sets["action"])
+
+        if self.winner_text_font is None:
+            self.winner_text_font = pygame.font.Font(c.WINNER_TEXT_FONT_FILENAME, c.WINNER_TEXT_FONT_SIZE)
 
         self.pool_balls.hide_all_balls()
         self.pool_table.visible = False
@@ -394,75 +500,218 @@ class GameLoop:
         while True:
             self.tick_frame()
 
-            for event in pygame.event.get():
+            for event in self.get_events():
                 if event.type == pygame.QUIT:
                     self.current_phase = GamePhases.quit
                     return
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.reset_game()
+                    return
 
     def quit_game_phase(self) -> None:
         """
-        Quits the game
+        Quits the game, saving the replay if one is being recorded
         Does not transfer to any other phase
         """
         if c.DEBUGGING:
-            print("[DEBUG-main.py]: starting quit game phase for " + str(self.current_player))
+            print("[DEBUG-main.py]: starting quit game phase for " + str(self.game_state.current_player))
+
+        if self.replay_recorder is not None and self.replay_recorder.get_num_frames() > 0:
+            self.replay_recorder.save(self.replay_filename)
 
         pygame.quit()
+
+        # Closed after the window so that an error about lost records doesn't leave it open
+        if self.telemetry is not None:
+            self.telemetry.close()
+
         sys.exit()
 
-    def tick_frame(self) -> None:
+    def tick_frame(self, ball_positions: np.ndarray | None = None) -> None:
         """
         Updates and redraws every item to the display surface
+        :param ball_positions: The position to draw each ball in play at, such as between two physics steps.
+                                The balls' own positions are used if not given
         """
+        # Moving balls and animations change every frame, so they are always drawn
+        if ball_positions is None and not self.tweens.is_running():
+            frame_signature = self.get_frame_signature()
+        else:
+            frame_signature = None
+
+        if frame_signature is not None and frame_signature == self.last_frame_signature:
+            # Nothing on screen would change, so wait for an event instead of drawing the same frame again.
+            #   The event is kept for the phase to handle before the events that came after it
+            if self.waited_event is None:
+                event = pygame.event.wait(c.IDLE_WAIT_MILLISECONDS)
+                if event.type != pygame.NOEVENT:
+                    self.waited_event = event
+
+            self.clock.tick()
+            self.quality_governor.start_frame()
+            return
+
+        self.last_frame_signature = frame_signature
+
+        # When frames are over budget, some frames with moving balls are skipped while the physics keeps its own time
+        if self.quality_governor.should_draw_frame(balls_moving=ball_positions is not None):
+            self.draw_frame(ball_positions, self.quality_governor.get_level())
+
+            # Update the screen
+            pygame.display.flip()
+
+        # The frame's work is measured without the wait for the next frame
+        self.quality_governor.end_frame()
 
+        # Number of FPS
+        elapsed_milliseconds = self.clock.tick(c.MAX_FRAMERATE)
+        self.quality_governor.start_frame()
+
+        # Animations are moved forward by the time the frame took
+        self.tweens.update(elapsed_milliseconds / 1000)
+
+    def draw_frame(self, ball_positions: np.ndarray | None = None, quality: QualityLevel = QUALITY_LEVELS[0]) -> None:
+        """
+        Draws every item onto the display surface without showing it, so that frames can also be drawn offscreen
+        :param ball_positions: The position to draw each ball in play at, such as between two physics steps.
+                                The balls' own positions are used if not given
+        :param quality: The quality level to draw at
+        """
         def draw_text():
             """
             Draws the text of the current player and the winner
             """
             if self.current_phase is not GamePhases.game_over:
-                self.current_player_text = self.player_text_font.render(str(self.current_player),
-                                                                        False,
-                                                                        c.PLAYER_TEXT_COLOR)
+                current_player_text = self.render_text(self.player_text_font, str(self.game_state.current_player),
+                                                       c.PLAYER_TEXT_COLOR)
                 line_pos = util.get_text_start_position(font=self.player_text_font,
-                                                        text=str(self.current_player)).to_tuple()
+                                                        text=str(self.game_state.current_player)).to_tuple()
 
-                self.display_surface.blit(source=self.current_player_text,
-                                          dest=line_pos)
+                self.render_target.blit(source=current_player_text,
+                                        dest=line_pos)
             else:
-                winner_text_l1 = self.winner_text_font.render(str(self.winner),
-                                                              False,
-                                                              c.WINNER_TEXT_COLOR)
+                winner_text_l1 = self.render_text(self.winner_text_font, str(self.game_state.winner),
+                                                  c.WINNER_TEXT_COLOR)
 
-                winner_text_l2 = self.winner_text_font.render("WINS!",
-                                                              False,
-                                                              c.WINNER_TEXT_COLOR)
+                winner_text_l2 = self.render_text(self.winner_text_font, "WINS!", c.WINNER_TEXT_COLOR)
                 line1_pos, line2_pos = util.get_text_start_position_two_lines(font=self.winner_text_font,
-                                                                              line1=str(self.winner), line2="WINS!")
+                                                                              line1=str(self.game_state.winner), line2="WINS!")
 
-                self.display_surface.blit(source=winner_text_l1,
-                                          dest=line1_pos.to_tuple())
-                self.display_surface.blit(source=winner_text_l2,
-                                          dest=line2_pos.to_tuple())
+                self.render_target.blit(source=winner_text_l1,
+                                        dest=line1_pos.to_tuple())
+                self.render_target.blit(source=winner_text_l2,
+                                        dest=line2_pos.to_tuple())
+
+        def draw_aim_preview() -> None:
+            """
+            Draws the predicted path of the cue ball and the direction of the ball it will hit
+            """
+            prediction = self.aim_preview.predict(self.cue.angle)
+
+            self.render_target.draw_line(c.AIM_PREVIEW_COLOR, self.cue.rotation_point, prediction.contact_point)
+            self.render_target.draw_circle(c.AIM_PREVIEW_COLOR, prediction.contact_point, c.BALL_RADIUS, width=1)
+
+            if prediction.hit_ball_num is not None:
+                hit_ball = self.pool_balls.get(prediction.hit_ball_num)
+                hit_ball_center = Point(hit_ball.x_pos + c.BALL_RADIUS, hit_ball.y_pos + c.BALL_RADIUS)
+                line_end = Point(
+                    hit_ball_center.x + prediction.object_ball_direction.x * c.AIM_PREVIEW_OBJECT_BALL_LINE_LENGTH,
+                    hit_ball_center.y + prediction.object_ball_direction.y * c.AIM_PREVIEW_OBJECT_BALL_LINE_LENGTH)
+
+                self.render_target.draw_line(c.AIM_PREVIEW_COLOR, hit_ball_center, line_end)
+
+        self.render_target.set_render_scale(self.render_scale * quality.render_scale)
 
         # Draw the background to erase previous sprite positions
-        self.display_surface.blit(self.background, (0, 0))
+        self.render_target.blit(self.background, (0, 0))
 
         # Draw sprites
         if self.pool_table.visible:
-            self.pool_table_sprite.draw(self.display_surface)
+            self.render_target.blit(self.pool_table.image, self.pool_table.rect)
+
+        if self.cue.visible and self.aim_preview is not None and quality.show_overlays:
+            draw_aim_preview()
 
         if self.cue.visible:
-            self.cue_sprite.draw(self.display_surface)
+            self.render_target.blit(self.cue.image, self.cue.rect)
 
-        self.pool_balls.draw(self.display_surface)
+        self.pool_balls.draw(self.render_target, ball_positions)
 
         draw_text()
 
-        # Update the screen
-        pygame.display.flip()
+        self.render_target.present()
 
-        # Number of FPS
-        self.clock.tick(c.MAX_FRAMERATE)
+    def write_shot_telemetry(self, shooting_player: Players, num_steps: int, num_collision_steps: int,
+                             balls_pocketed: List[int]) -> None:
+        """
+        Writes the telemetry record of a shot once the balls have stopped, and of the game if it's over
+        :param shooting_player: The player who took the shot
+        :param num_steps: The number of physics steps until the balls stopped
+        :param num_collision_steps: The number of physics steps where balls collided
+        :param balls_pocketed: The numbers of the balls that went in, in the order they went in
+        """
+        record = {"record": "shot",
+                  "time": time.time(),
+                  "seed": self.seed,
+                  "shot": self.num_shots,
+                  "player": shooting_player.value + 1,
+                  **(self.shot_parameters or {}),
+                  "steps_to_rest": num_steps,
+                  "collision_steps": num_collision_steps,
+                  "pocketed": balls_pocketed,
+                  "scratch": 0 in balls_pocketed,
+                  "foul": self.game_state.need_to_place_cue_ball,
+                  "next_phase": self.current_phase.name,
+                  "next_player": self.game_state.current_player.value + 1}
+        self.telemetry.write(record)
+        self.shot_parameters = None
+
+        if self.current_phase == GamePhases.game_over:
+            self.telemetry.write({"record": "game",
+                                  "time": record["time"],
+                                  "seed": self.seed,
+                                  "shots": self.num_shots,
+                                  "winner": self.game_state.winner.value + 1,
+                                  "duration_seconds": record["time"] - self.game_start_time})
+
+    def render_text(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        """
+        Gets the image of some text, only rendering it the first time it's drawn.
+        Reusing the image also lets the render target reuse its scaled copy
+        :param font: The font of the text
+        :param text: The text
+        :param color: The color of the text
+        :return: The image of the text
+        """
+        text_image = self.text_images.get((font, text, color))
+        if text_image is None:
+            text_image = font.render(text, False, color)
+            self.text_images[(font, text, color)] = text_image
+
+        return text_image
+
+    def get_events(self) -> List[pygame.event.Event]:
+        """
+        Takes every event waiting to be handled, in the order they happened
+        :return: A list of the events, starting with the one that ended the wait on an idle frame, if there was one
+        """
+        events = pygame.event.get()
+
+        if self.waited_event is not None:
+            events.insert(0, self.waited_event)
+            self.waited_event = None
+
+        return events
+
+    def get_frame_signature(self) -> Tuple:
+        """
+        Gets everything that affects what is drawn on a frame, to tell if a frame would look the same as the last one.
+        The cursor isn't drawn, and the cue stick and cue ball that follow it are already part of the signature
+        :return: A tuple of the phase, the text, and the state of the table, cue stick, and balls
+        """
+        return (self.current_phase, self.game_state.current_player, self.game_state.winner,
+                self.pool_table.visible, self.cue.visible, self.cue.angle, self.cue.rotation_offset,
+                self.cue.rotation_point, self.pool_balls.get_draw_signature())
 
     @staticmethod
     def get_cursor_pos() -> Point:
@@ -475,6 +724,36 @@ class GameLoop:
         return Point(cursor_tuple[0], cursor_tuple[1])
 
 
+def parse_render_scale(value: str) -> float:
+    """
+    Reads the render scale given on the command line
+    :param value: The argument
+    :return: The render scale
+    """
+    render_scale = float(value)
+
+    if not 0 < render_scale <= 1:
+        raise argparse.ArgumentTypeError("must be greater than 0 and at most 1, not " + value)
+
+    return render_scale
+
+
 if __name__ == "__main__":
-    game = GameLoop()
+    parser = argparse.ArgumentParser(description="Plays a game of 8-ball pool")
+    parser.add_argument("scenario", nargs="?", help="A scenario file to start from a saved table")
+    parser.add_argument("--render-scale", type=parse_render_scale, default=c.RENDER_SCALE,
+                        help="The size of the resolution frames are drawn at compared to the window's, such as 0.5")
+    parser.add_argument("--telemetry", metavar="FILE",
+                        help="Writes a JSON record of every shot and game to a file, rotating it as it gets big")
+    parser.add_argument("--record-replay", metavar="FILE",
+                        help="Saves every shot to a replay file when the game is quit, to be drawn by replay_renderer.py")
+    arguments = parser.parse_args()
+
+    game = GameLoop(render_scale=arguments.render_scale, replay_filename=arguments.record_replay,
+                    telemetry_filename=arguments.telemetry)
+    if arguments.scenario is not None:
+        try:
+            game.load_scenario(load_scenario(arguments.scenario))
+        except ValueError as error:
+            parser.error(str(error))
     game.run_game()
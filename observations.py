@@ -0,0 +1,148 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+import constants as c
+from constants import BallTypes, Point
+from pool_ball import PoolBall
+from table_geometry import TableGeometry
+
+
+# The channel each type of ball is drawn in. The pockets are drawn in the channel after the balls
+BALL_TYPE_CHANNELS = {BallTypes.solid: 0, BallTypes.striped: 1, BallTypes.eight: 2, BallTypes.cue: 3}
+POCKET_CHANNEL = 4
+NUM_OBSERVATION_CHANNELS = 5
+
+
+class ObservationRasterizer:
+    def __init__(self, width: int = c.OBSERVATION_SIZE, height: int = c.OBSERVATION_SIZE,
+                 table_geometry: TableGeometry = None, num_balls: int = 16):
+        """
+        Draws small images of the felt for many tables at once, with a channel for each type of ball and one for the
+            pockets. A pixel is filled if its center is inside a ball. Only NumPy is used, so no display is needed
+        :param width: The width of the images in pixels
+        :param height: The height of the images in pixels
+        :param table_geometry: The table the balls are on. The table used by the game is used if not given
+        :param num_balls: The number of ball numbers in each table's state
+        """
+        if table_geometry is None:
+            table_geometry = TableGeometry.standard()
+
+        self.width: int = width
+        self.height: int = height
+
+        felt_min_x, felt_min_y, felt_max_x, felt_max_y = table_geometry.felt_bounds
+        self.felt_min_x: float = felt_min_x
+        self.felt_min_y: float = felt_min_y
+        self.x_scale: float = width / (felt_max_x - felt_min_x)
+        self.y_scale: float = height / (felt_max_y - felt_min_y)
+
+        # The radius of a ball in pixels along each axis. Balls are never smaller than the pixel they're centered in
+        self.x_radius: float = max(c.BALL_RADIUS * self.x_scale, math.sqrt(0.5))
+        self.y_radius: float = max(c.BALL_RADIUS * self.y_scale, math.sqrt(0.5))
+
+        # Every pixel a ball could cover is in a window of this size, starting from the first one it could reach
+        self.window_columns: np.ndarray = np.arange(math.floor(2 * self.x_radius) + 1)
+        self.window_rows: np.ndarray = np.arange(math.floor(2 * self.y_radius) + 1)[:, np.newaxis]
+
+        self.ball_channels: np.ndarray = np.array([BALL_TYPE_CHANNELS[PoolBall(ball_num, Point(0, 0)).type]
+                                                   for ball_num in range(num_balls)])
+
+        self.pocket_image: np.ndarray = self.draw_pockets(table_geometry)
+
+    def draw_pockets(self, table_geometry: TableGeometry) -> np.ndarray:
+        """
+        Draws the pockets, which are the same for every observation
+        :param table_geometry: The table the pockets are on
+        :return: An image of the pockets, with 1 where a pocket is
+        """
+        pixel_x = (np.arange(self.width) + 0.5) / self.x_scale + self.felt_min_x
+        pixel_y = (np.arange(self.height)[:, np.newaxis] + 0.5) / self.y_scale + self.felt_min_y
+
+        pocket_image = np.zeros((self.height, self.width), dtype=np.uint8)
+        for pocket in table_geometry.pockets:
+            pocket_image[(pixel_x - pocket.x) ** 2 + (pixel_y - pocket.y) ** 2 <= c.POCKET_RADIUS ** 2] = 1
+
+        return pocket_image
+
+    def create_observations(self, num_tables: int, dtype: np.dtype = np.uint8) -> np.ndarray:
+        """
+        Creates an array to draw observations into, which can be reused for every batch of the same size
+        :param num_tables: The number of tables drawn at a time
+        :param dtype: The type of the values, such as np.float32 to pass the observations straight to a network
+        :return: An array with an image for each table and channel
+        """
+        return np.zeros((num_tables, NUM_OBSERVATION_CHANNELS, self.height, self.width), dtype=dtype)
+
+    def rasterize(self, states: np.ndarray, observations: np.ndarray) -> np.ndarray:
+        """
+        Draws the balls of many tables at once
+        :param states: The state of each table, as an array with a row of size `BALL_STATE_SIZE` for each ball number,
+                        such as those written by `write_state`. Balls that are out of play aren't drawn
+        :param observations: The array to draw into, as made by `create_observations`
+        :return: The observations, filled with 1 where each type of ball or a pocket is and 0 everywhere else
+        """
+        num_tables, num_balls = states.shape[0:2]
+
+        observations[:, 0:POCKET_CHANNEL] = 0
+        observations[:, POCKET_CHANNEL] = self.pocket_image
+
+        # The center of each ball in pixels, with an extra two axes for the rows and columns of its window
+        center_x = ((states[:, :, 0] + (c.BALL_RADIUS - self.felt_min_x)) * self.x_scale)[:, :, np.newaxis, np.newaxis]
+        center_y = ((states[:, :, 1] + (c.BALL_RADIUS - self.felt_min_y)) * self.y_scale)[:, :, np.newaxis, np.newaxis]
+
+        columns = np.ceil(center_x - self.x_radius - 0.5) + self.window_columns
+        rows = np.ceil(center_y - self.y_radius - 0.5) + self.window_rows
+
+        # The distances are worked out for the rows and columns separately and only added for the whole window.
+        #   Pixels off the image and balls out of play are made infinitely far away
+        x_distances = (columns + 0.5 - center_x) / self.x_radius
+        x_distances *= x_distances
+        x_distances[(columns < 0) | (columns >= self.width) | (states[:, :, 4:5, np.newaxis] == 0)] = np.inf
+
+        y_distances = (rows + 0.5 - center_y) / self.y_radius
+        y_distances *= y_distances
+        y_distances[(rows < 0) | (rows >= self.height)] = np.inf
+
+        covered = x_distances + y_distances <= 1
+
+        # The index of each covered pixel in the flattened observations
+        image_indices = np.arange(num_tables)[:, np.newaxis] * NUM_OBSERVATION_CHANNELS + self.ball_channels[:num_balls]
+        image_starts = image_indices * (self.height * self.width)
+        column_indices = image_starts[:, :, np.newaxis, np.newaxis] + columns.astype(np.intp)
+        row_indices = rows.astype(np.intp) * self.width
+        window_shape = covered.shape
+        pixel_indices = (np.broadcast_to(row_indices, window_shape)[covered] +
+                         np.broadcast_to(column_indices, window_shape)[covered])
+
+        observations.reshape(-1)[pixel_indices] = 1
+
+        return observations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures how many observations are drawn per second")
+    parser.add_argument("--tables", type=int, default=1024, help="The number of tables drawn at a time")
+    parser.add_argument("--size", type=int, default=c.OBSERVATION_SIZE)
+    parser.add_argument("--batches", type=int, default=50)
+    arguments = parser.parse_args()
+
+    rasterizer = ObservationRasterizer(arguments.size, arguments.size)
+    observation_batch = rasterizer.create_observations(arguments.tables)
+
+    # Random positions on the felt, with a few balls out of play
+    generator = np.random.default_rng(0)
+    felt_min_x, felt_min_y, felt_max_x, felt_max_y = TableGeometry.standard().felt_bounds
+    table_states = np.zeros((arguments.tables, 16, c.BALL_STATE_SIZE))
+    table_states[:, :, 0] = generator.uniform(felt_min_x, felt_max_x - 2 * c.BALL_RADIUS, (arguments.tables, 16))
+    table_states[:, :, 1] = generator.uniform(felt_min_y, felt_max_y - 2 * c.BALL_RADIUS, (arguments.tables, 16))
+    table_states[:, :, 4] = generator.random((arguments.tables, 16)) < 0.8
+
+    start_time = time.perf_counter()
+    for _ in range(arguments.batches):
+        rasterizer.rasterize(table_states, observation_batch)
+    elapsed_time = time.perf_counter() - start_time
+
+    print(f"{arguments.tables * arguments.batches / elapsed_time:.0f} observations/s")
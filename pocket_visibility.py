@@ -0,0 +1,240 @@
+import math
+from typing import Dict, List, Set, Tuple
+
+import constants as c
+from pool_ball_list import PoolBallList
+
+
+# The target used for the line from the cue ball to a ball. Lines to pockets use the index of the pocket instead
+CUE_LINE = -1
+
+# A line is stored as the number of the ball it starts at and its target
+Line = Tuple[int, int]
+
+
+def segment_distance_squared(x: float, y: float, start_x: float, start_y: float, end_x: float, end_y: float) -> float:
+    """
+    Finds the squared distance from a point to the closest point on a line segment
+    :param x: The x-coordinate of the point
+    :param y: The y-coordinate of the point
+    :param start_x: The x-coordinate of the start of the segment
+    :param start_y: The y-coordinate of the start of the segment
+    :param end_x: The x-coordinate of the end of the segment
+    :param end_y: The y-coordinate of the end of the segment
+    :return: The squared distance
+    """
+    delta_x = end_x - start_x
+    delta_y = end_y - start_y
+    length_squared = delta_x * delta_x + delta_y * delta_y
+
+    portion = 0
+    if length_squared > 0:
+        portion = min(max(((x - start_x) * delta_x + (y - start_y) * delta_y) / length_squared, 0), 1)
+
+    offset_x = x - (start_x + portion * delta_x)
+    offset_y = y - (start_y + portion * delta_y)
+    return offset_x * offset_x + offset_y * offset_y
+
+
+class PocketVisibility:
+    def __init__(self, pool_balls: PoolBallList):
+        """
+        Tracks which object balls have a clear path to each pocket and which can be hit directly by the cue ball.
+        A path is blocked when another ball is close enough to it that a ball moving along it would hit that ball.
+        The lines are indexed in a grid, so that after a shot only the lines near balls that moved are checked again
+        :param pool_balls: The balls on the table
+        """
+        self.pool_balls: PoolBallList = pool_balls
+        self.pockets: List[Tuple[float, float]] = [(pocket.x, pocket.y)
+                                                   for pocket in pool_balls.table_geometry.pockets]
+
+        self.cell_size: float = c.GEOMETRY_CELL_SIZE
+
+        # The center of every ball in play, as of the last update
+        self.centers: Dict[int, Tuple[float, float]] = {}
+
+        # The balls blocking each line. A line is clear if it has no blockers
+        self.blockers: Dict[Line, Set[int]] = {}
+        # The lines that each ball is blocking
+        self.blocking: Dict[int, Set[Line]] = {}
+
+        # Maps each grid cell to the lines that a ball centered in it could block, and each line to its cells
+        self.cell_lines: Dict[Tuple[int, int], Set[Line]] = {}
+        self.line_cells: Dict[Line, List[Tuple[int, int]]] = {}
+
+        self.update()
+
+    def has_clear_path_to_pocket(self, ball_num: int, pocket_index: int) -> bool:
+        """
+        Determines if a ball can move straight into a pocket without hitting another ball
+        :param ball_num: The number of the ball
+        :param pocket_index: The index of the pocket in the table's pockets
+        :return: True if the path is clear; False otherwise or if the ball isn't in play
+        """
+        blockers = self.blockers.get((ball_num, pocket_index))
+        return blockers is not None and not blockers
+
+    def has_clear_path_from_cue(self, ball_num: int) -> bool:
+        """
+        Determines if the cue ball can move straight to a ball without hitting another ball first
+        :param ball_num: The number of the ball
+        :return: True if the path is clear; False otherwise or if either ball isn't in play
+        """
+        blockers = self.blockers.get((ball_num, CUE_LINE))
+        return blockers is not None and not blockers
+
+    def update(self) -> None:
+        """
+        Brings the index up to date with the current positions of the balls.
+        Only the lines that start or end at a ball that moved, or that pass near one, are checked again
+        """
+        moved_balls: List[int] = []
+        for ball in self.pool_balls.pool_balls:
+            if ball.num < 0:
+                continue
+
+            center = (ball.x_pos + c.BALL_RADIUS, ball.y_pos + c.BALL_RADIUS) if ball.in_play else None
+            if center != self.centers.get(ball.num):
+                moved_balls.append(ball.num)
+
+        if not moved_balls:
+            return
+
+        # Remove everything the moved balls were part of, so that they can be added again at their new positions
+        lines_to_add: Set[Line] = set()
+        for ball_num in moved_balls:
+            for line in self.blocking.pop(ball_num, set()):
+                self.blockers[line].discard(ball_num)
+
+            if ball_num == 0:
+                own_lines = [line for line in self.blockers if line[1] == CUE_LINE]
+            else:
+                own_lines = self.get_lines_of_ball(ball_num)
+
+            for line in own_lines:
+                self.remove_line(line)
+
+            self.centers.pop(ball_num, None)
+
+        for ball_num in moved_balls:
+            ball = self.pool_balls.get(ball_num)
+            if ball.in_play:
+                self.centers[ball_num] = (ball.x_pos + c.BALL_RADIUS, ball.y_pos + c.BALL_RADIUS)
+
+        for ball_num in moved_balls:
+            if ball_num not in self.centers:
+                continue
+
+            if ball_num == 0:
+                lines_to_add.update((other_ball_num, CUE_LINE) for other_ball_num in self.centers if other_ball_num != 0)
+            else:
+                lines_to_add.update(line for line in self.get_lines_of_ball(ball_num)
+                                    if line[1] != CUE_LINE or 0 in self.centers)
+
+        for line in lines_to_add:
+            self.add_line(line)
+
+        # Check the lines that weren't just added against the new positions of the moved balls
+        for ball_num in moved_balls:
+            if ball_num not in self.centers:
+                continue
+
+            x, y = self.centers[ball_num]
+            for line in self.cell_lines.get(self.get_cell(x, y), ()):
+                if line not in lines_to_add and self.is_blocked_by(line, ball_num):
+                    self.add_blocker(line, ball_num)
+
+    def get_lines_of_ball(self, ball_num: int) -> List[Line]:
+        """
+        Gets every line that starts at an object ball: one to each pocket and the one from the cue ball
+        :param ball_num: The number of the ball
+        :return: A list of the lines
+        """
+        return [(ball_num, pocket_index) for pocket_index in range(len(self.pockets))] + [(ball_num, CUE_LINE)]
+
+    def get_line_ends(self, line: Line) -> Tuple[float, float, float, float]:
+        """
+        Gets the end points of a line
+        :param line: The line
+        :return: A tuple containing the x and y of the start of the line and the x and y of the end of the line
+        """
+        ball_num, target = line
+        start_x, start_y = self.centers[ball_num]
+        end_x, end_y = self.centers[0] if target == CUE_LINE else self.pockets[target]
+
+        return start_x, start_y, end_x, end_y
+
+    def is_blocked_by(self, line: Line, ball_num: int) -> bool:
+        """
+        Determines if a ball is close enough to a line to block it
+        :param line: The line
+        :param ball_num: The number of the ball that could block it
+        :return: True if the ball blocks the line; False otherwise
+        """
+        if ball_num == line[0] or (line[1] == CUE_LINE and ball_num == 0):
+            return False
+
+        x, y = self.centers[ball_num]
+        return segment_distance_squared(x, y, *self.get_line_ends(line)) < (2 * c.BALL_RADIUS) ** 2
+
+    def add_blocker(self, line: Line, ball_num: int) -> None:
+        """
+        Records that a ball blocks a line
+        :param line: The line
+        :param ball_num: The number of the ball blocking it
+        """
+        self.blockers[line].add(ball_num)
+        self.blocking.setdefault(ball_num, set()).add(line)
+
+    def add_line(self, line: Line) -> None:
+        """
+        Adds a line to the index, finding every ball that blocks it and every grid cell it passes near
+        :param line: The line to add
+        """
+        self.blockers[line] = set()
+
+        for ball_num in self.centers:
+            if self.is_blocked_by(line, ball_num):
+                self.add_blocker(line, ball_num)
+
+        start_x, start_y, end_x, end_y = self.get_line_ends(line)
+
+        # A ball can block the line from any cell whose center is within this distance of it
+        reach = 2 * c.BALL_RADIUS + self.cell_size * math.sqrt(2) / 2
+
+        min_column, min_row = self.get_cell(min(start_x, end_x) - reach, min(start_y, end_y) - reach)
+        max_column, max_row = self.get_cell(max(start_x, end_x) + reach, max(start_y, end_y) + reach)
+
+        cells = []
+        for column in range(min_column, max_column + 1):
+            for row in range(min_row, max_row + 1):
+                cell_center_x = (column + 0.5) * self.cell_size
+                cell_center_y = (row + 0.5) * self.cell_size
+
+                if segment_distance_squared(cell_center_x, cell_center_y,
+                                            start_x, start_y, end_x, end_y) <= reach * reach:
+                    cells.append((column, row))
+                    self.cell_lines.setdefault((column, row), set()).add(line)
+
+        self.line_cells[line] = cells
+
+    def remove_line(self, line: Line) -> None:
+        """
+        Removes a line from the index
+        :param line: The line to remove
+        """
+        for ball_num in self.blockers.pop(line, set()):
+            if ball_num in self.blocking:
+                self.blocking[ball_num].discard(line)
+
+        for cell in self.line_cells.pop(line, []):
+            self.cell_lines[cell].discard(line)
+
+    def get_cell(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Gets the grid cell that contains a point
+        :param x: The x-coordinate of the point
+        :param y: The y-coordinate of the point
+        :return: A tuple containing the column and row of the cell
+        """
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
@@ -1,41 +1,26 @@
 import math
 from typing import Dict, Tuple
 
-import numpy as np
-import pygame
-
 import constants as c
 from constants import BallTypes, Point
-import utilities as util
-
+from table_geometry import TableGeometry
 
-COLORLIST = [c.colors["white"], c.colors["yellow"], c.colors["blue"], c.colors["red"], c.colors["purple"],
-             c.colors["orange"], c.colors["green"], c.colors["maroon"], c.colors["black"]]
 
+class PoolBall:
+    # The physics state of a ball. Drawing is handled separately by `PoolBallSprite`
+    __slots__ = ("num", "type", "x_pos", "y_pos", "x_velo", "y_velo", "in_play", "sleeping")
 
-class PoolBall(pygame.sprite.Sprite):
     def __init__(self, num: int, position: Point):
-        super().__init__()
-
-        self.image = pygame.Surface([2 * c.BALL_RADIUS, 2 * c.BALL_RADIUS], pygame.SRCALPHA, 32)
-        self.image = self.image.convert_alpha()
-        self.rect = self.image.get_rect()
-
-        self.x_pos = self.rect.x = position.x
-        self.y_pos = self.rect.y = position.y
-        self.x_velo = self.y_velo = 0
-
-        self.num = num
-        self.in_play = True
+        self.x_pos: float = position.x
+        self.y_pos: float = position.y
+        self.x_velo: float = 0
+        self.y_velo: float = 0
 
-        if num == 8:
-            self.color = COLORLIST[8]
-        else:
-            self.color = COLORLIST[num % 8]
+        self.num: int = num
+        self.in_play: bool = True
 
         # Flags #
-        self.visible = True
-        self.moving = False
+        self.sleeping: bool = True  # Whether the ball is at rest and being skipped by the simulation. Balls start at rest
 
         self.type: BallTypes
         if num == 0:
@@ -47,8 +32,6 @@ class PoolBall(pygame.sprite.Sprite):
         else:
             self.type = BallTypes.striped
 
-        self.create_image()
-
     def __eq__(self, other) -> bool:
         """
         Checks if the numbers of the balls are the same
@@ -66,49 +49,29 @@ class PoolBall(pygame.sprite.Sprite):
         """
         return hash(self.num)
 
-    def create_image(self) -> None:
+    def move(self, table_geometry: TableGeometry) -> None:
         """
-        Creates the ball's image based on its type
+        Moves the ball based on its current velocity and bounces it off of any cushions it hits
+        :param table_geometry: The cushions and pockets of the table the ball is on
         """
-        if self.in_play:
-            if self.type == BallTypes.striped:
-                pygame.draw.circle(self.image, c.colors["white"], [c.BALL_RADIUS, c.BALL_RADIUS], c.BALL_RADIUS)
-                pygame.draw.rect(self.image, self.color, pygame.Rect(1, c.BALL_RADIUS - c.BALL_RADIUS / 2, 2 * c.BALL_RADIUS - 2, c.BALL_RADIUS))
-
-            else:
-                pygame.draw.circle(self.image, self.color, (c.BALL_RADIUS, c.BALL_RADIUS), c.BALL_RADIUS)
-
-            pygame.draw.circle(self.image, c.colors["white"], (c.BALL_RADIUS, c.BALL_RADIUS), c.BALL_RADIUS / 2)
-
-    def move(self):
-        """
-        Moves the ball based on its current velocity
-        """
-        # Collision with top wall
-        if self.rect.y < 30 + c.SCREEN_HEIGHT_PADDING:
-            self.y_velo = -self.y_velo * c.BOUNCE_MODIFIER
-            self.rect.y = 31 + c.SCREEN_HEIGHT_PADDING
-            self.y_pos = self.rect.y
-
-        # Collision with bottom wall
-        elif self.rect.y > c.POOL_TABLE_HEIGHT - 31 - (c.BALL_RADIUS * 2) + c.SCREEN_HEIGHT_PADDING:
-            self.y_velo = -self.y_velo * c.BOUNCE_MODIFIER
-            self.rect.y = c.POOL_TABLE_HEIGHT - 31 - (c.BALL_RADIUS * 2) + c.SCREEN_HEIGHT_PADDING
-            self.y_pos = self.rect.y
-
-        # Collision with right wall
-        elif self.rect.x > c.POOL_TABLE_WIDTH - 31 - (c.BALL_RADIUS * 2) + c.SCREEN_WIDTH_PADDING:
-            self.x_velo = -self.x_velo * c.BOUNCE_MODIFIER
-            self.rect.x = c.POOL_TABLE_WIDTH - 31 - (c.BALL_RADIUS * 2) + c.SCREEN_WIDTH_PADDING
-            self.x_pos = self.rect.x
+        # A ball moving too far to be caught by the cushions in one move is moved in parts, checking them after each
+        if (-c.MAX_CUSHION_STEP <= self.x_velo <= c.MAX_CUSHION_STEP and
+                -c.MAX_CUSHION_STEP <= self.y_velo <= c.MAX_CUSHION_STEP):
+            num_parts = 1
+        else:
+            num_parts = math.ceil(max(math.fabs(self.x_velo), math.fabs(self.y_velo)) / c.MAX_CUSHION_STEP)
 
-        # Collision left wall
-        elif self.rect.x < 30 + c.SCREEN_WIDTH_PADDING:
-            self.x_velo = -self.x_velo * c.BOUNCE_MODIFIER
-            self.rect.x = 31 + c.SCREEN_WIDTH_PADDING
-            self.x_pos = self.rect.x
+        for _ in range(num_parts):
+            # The position is updated in place, since this is called for every moving ball on every step
+            self.x_pos += self.x_velo / num_parts
+            self.y_pos += self.y_velo / num_parts
 
-        self.set_position(Point(self.x_pos + self.x_velo, self.y_pos + self.y_velo))
+            bounce = table_geometry.bounce_off_cushions(self.x_pos + c.BALL_RADIUS, self.y_pos + c.BALL_RADIUS,
+                                                        self.x_velo, self.y_velo)
+            if bounce is not None:
+                center_x, center_y, self.x_velo, self.y_velo = bounce
+                self.x_pos = center_x - c.BALL_RADIUS
+                self.y_pos = center_y - c.BALL_RADIUS
 
         if self.x_velo != 0 or self.y_velo != 0:
             x_ratio = math.fabs(self.x_velo) / (math.fabs(self.x_velo) + math.fabs(self.y_velo))
@@ -132,114 +95,31 @@ class PoolBall(pygame.sprite.Sprite):
         :param ball2: The ball to check for collision with
         :return: True if the balls have collided; False otherwise
         """
-        x_distance = self.rect.x - ball2.rect.x
-        y_distance = self.rect.y - ball2.rect.y
-        side_1 = math.sqrt(x_distance * x_distance + y_distance * y_distance)
-        return side_1 < 2 * c.BALL_RADIUS
-
-    def apply_scale_value(self, scale_val: float) -> None:
-        """
-        Applies a scale value to the position of the ball. Used to help prevent clipping
-        :param scale_val: The value to change the position by
-        """
-        if scale_val < 1:
-            scale_val = 1
+        x_distance = self.x_pos - ball2.x_pos
+        y_distance = self.y_pos - ball2.y_pos
+        return x_distance * x_distance + y_distance * y_distance < (2 * c.BALL_RADIUS) ** 2
 
-        new_x = new_y = 0
-
-        if self.x_velo < 0:
-            new_x = self.x_pos + scale_val
-        elif self.x_velo >= 0:
-            new_x = self.x_pos - scale_val
-
-        if self.y_velo < 0:
-            new_y = self.y_pos + scale_val
-        elif self.y_velo >= 0:
-            new_y = self.y_pos - scale_val
-
-        self.set_position(Point(new_x, new_y))
-
-    def collision(self, ball2) -> None:
+    def get_swept_bounds(self) -> Tuple[float, float, float, float]:
         """
-        Controls the collision between two pool balls
-        :param ball2: The ball that the current ball is colliding with
+        Gets the area covering every position another ball could be in to touch this ball during its next movement.
+        Used to determine which sleeping balls a moving ball could wake
+        :return: A tuple containing the min x, min y, max x, and max y of the top-left corner of a touching ball
         """
-        def calculate_and_set_new_velocities() -> None:
-            """
-            Calculates the new velocities after the collision and sets them as the balls' velocities
-            """
-            collision_strength: np.array = position_change / distance
-
-            # Use the dot product to calculate new velocities
-            ball1_velocity = np.array([self.x_velo, self.y_velo], dtype=float)
-            ball2_velocity = np.array([ball2.x_velo, ball2.y_velo], dtype=float)
-
-            ball1_dot = np.dot(ball1_velocity, collision_strength)
-            ball2_dot = np.dot(ball2_velocity, collision_strength)
-
-            # since the masses of the balls are the same, the velocity will just switch
-            ball1_velocity = (ball2_dot - ball1_dot) * collision_strength * 0.5 * (1 + c.BOUNCE_MODIFIER)
-            ball2_velocity = (ball1_dot - ball2_dot) * collision_strength * 0.5 * (1 + c.BOUNCE_MODIFIER)
-
-            self.set_velocity(ball1_velocity)
-            ball2.set_velocity(ball2_velocity)
-
-        def prevent_and_correct_clipping() -> None:
-            """
-            Helps to prevent clipping and correct it when it occurs
-            """
-            # Move the balls a little to prevent clipping. This works pretty well I have found.
-            scale_value = (np.sqrt(self.x_velo ** 2 + self.y_velo ** 2)) / 2
-            self.apply_scale_value(scale_value)
-            ball2.apply_scale_value(scale_value)
-
-            # if this is true they are almost certainly clipping and badly
-            if distance <= 1 * c.BALL_RADIUS:
-                if c.DEBUGGING:
-                    print("[DEBUG-pool_ball.py]: clip detected with distance between balls of " + str(distance))
-                self.set_position(Point(20 - distance, 20 - distance))
-                ball2.set_position(Point(20 - distance, 20 - distance))
+        reach = 2 * c.BALL_RADIUS
 
-        # Geta the coordinates of balls for dot product
-        ball1_pos_array:  np.array = np.array([self.rect.x, self.rect.y], dtype=np.single)
-        ball2_pos_array:  np.array = np.array([ball2.rect.x, ball2.rect.y], dtype=np.single)
-        position_change: np.array = ball1_pos_array - ball2_pos_array
+        next_x = self.x_pos + self.x_velo
+        next_y = self.y_pos + self.y_velo
 
-        # distance: float = util.distance_formula(self.get_position(), ball2.get_position())
+        return (min(self.x_pos, next_x) - reach, min(self.y_pos, next_y) - reach,
+                max(self.x_pos, next_x) + reach, max(self.y_pos, next_y) + reach)
 
-        distance = util.distance_formula(self.get_position(), ball2.get_position())
-
-        # If this is true they have touched
-        if distance <= 2 * c.BALL_RADIUS:
-            prevent_and_correct_clipping()
-
-            calculate_and_set_new_velocities()
-
-        # Update the positions of the balls
-        self.set_position(Point(self.x_pos + self.x_velo, self.y_pos + self.y_velo))
-
-        ball2.set_position(Point(ball2.x_pos + ball2.x_velo, ball2.y_pos + ball2.y_velo))
-
-    def in_pocket(self) -> bool:
+    def in_pocket(self, table_geometry: TableGeometry) -> bool:
         """
         Determines if a ball is in a pocket
+        :param table_geometry: The cushions and pockets of the table the ball is on
         :return: True if the ball is in a pocket; False otherwise
         """
-        if (((self.rect.x < 35 + c.SCREEN_WIDTH_PADDING)
-             and (self.rect.y < 35 + c.SCREEN_HEIGHT_PADDING)) or
-                ((self.rect.x < 35 + c.SCREEN_WIDTH_PADDING)
-                 and (self.rect.y > 345 + c.SCREEN_HEIGHT_PADDING)) or
-                ((self.rect.x > 745 + c.SCREEN_WIDTH_PADDING)
-                 and (self.rect.y < 35 + c.SCREEN_HEIGHT_PADDING)) or
-                ((self.rect.x > 745 + c.SCREEN_WIDTH_PADDING)
-                 and (self.rect.y > 345 + c.SCREEN_HEIGHT_PADDING)) or
-                ((self.rect.x in range(375 + c.SCREEN_WIDTH_PADDING, 410 + c.SCREEN_WIDTH_PADDING))
-                 and (self.rect.y < 35 + c.SCREEN_HEIGHT_PADDING)) or
-                ((self.rect.x in range(375 + c.SCREEN_WIDTH_PADDING, 410 + c.SCREEN_WIDTH_PADDING))
-                 and (self.rect.y > 345 + c.SCREEN_HEIGHT_PADDING))):
-            return True
-        else:
-            return False
+        return table_geometry.in_pocket(self.x_pos + c.BALL_RADIUS, self.y_pos + c.BALL_RADIUS)
 
     def display_ball_below(self, num_balls_in: Dict[BallTypes, int]) -> None:
         """
@@ -262,23 +142,22 @@ class PoolBall(pygame.sprite.Sprite):
         Sets the position of the pool ball
         :param position: A tuple containing the x- and y-coordinates of the top-left corner of the ball
         """
-        self.x_pos = self.rect.x = position.x
-
-        self.y_pos = self.rect.y = position.y
+        self.x_pos = position.x
+        self.y_pos = position.y
 
     def set_x_position(self, x: float) -> None:
         """
         Sets the x-coordinate of the top-left corner of the ball
         :param x: The x-coordinate to set
         """
-        self.set_position(Point(x, self.y_pos))
+        self.x_pos = x
 
     def set_y_position(self, y: float) -> None:
         """
         Sets the y-coordinate of the top-left corner of the ball
         :param y: The y-coordinate to set
         """
-        self.set_position(Point(self.x_pos, y))
+        self.y_pos = y
 
     def set_velocity(self, velocity: Tuple[float, float]) -> None:
         """
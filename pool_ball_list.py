@@ -1,21 +1,52 @@
-import itertools
-from typing import List, Tuple
-
-import pygame.sprite
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
 
 from constants import Point
+from contact_solver import find_contact_clusters, resolve_contact_cluster
 from pool_ball import PoolBall
+from table_geometry import TableGeometry
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pygame
+
+    from pool_ball_sprite import PoolBallSprite
+    from render_target import RenderTarget
 
 
 class PoolBallList:
-    def __init__(self):
+    def __init__(self, table_geometry: TableGeometry = None, num_balls: int = 16):
         """
-        Creates a list to store the pool balls and a sprite group to allow updating and drawing the pool balls
+        Creates a list to store the pool balls and the sprites used to draw them
+        :param table_geometry: The cushions and pockets of the table the balls are on.
+                                Uses the standard table if not given
+        :param num_balls: The number of balls that can be on the table, numbered from 0. A game uses 16
         """
-        # List filled with 16 invalid balls, will be filled later
-        self.pool_balls: List[PoolBall] = [PoolBall(-1, Point(0, 0))] * 16
+        # List filled with invalid balls, will be filled later
+        self.pool_balls: List[PoolBall] = [PoolBall(-1, Point(0, 0))] * num_balls
+
+        # The sprites that draw each ball, stored at the same index as their ball.
+        #   They are only created once they are needed, so that the balls can be simulated without pygame
+        self.ball_sprites: List["PoolBallSprite | None"] = [None] * num_balls
+
+        # The sprites that are shown, ordered by number, and the image and rect of each one, drawn in a single
+        #   `blits` call. Each rect belongs to its sprite and is moved in place, so the lists are only rebuilt
+        #   when a ball is shown, hidden, or given a new sprite
+        self.visible_sprites: List["PoolBallSprite"] = []
+        self.blit_sequence: List[Tuple["pygame.Surface", "pygame.Rect"]] = []
+        self.visible_sprites_outdated: bool = True
 
-        self.sprite_group: pygame.sprite.Group = pygame.sprite.Group()
+        self.table_geometry: TableGeometry = table_geometry if table_geometry is not None else TableGeometry.standard()
+
+        # The balls that are in play, ordered by number. Pocketed balls are removed from this list
+        self.simulated_balls: List[PoolBall] = []
+        # The simulated balls that are awake. Balls at rest are put to sleep and skipped until something hits them
+        self.active_balls: List[PoolBall] = []
+
+        # Scratch storage reused on every step, so that moving the balls doesn't allocate new containers
+        self.moving_balls: List[PoolBall] = []
+        self.pocketed_balls: List[PoolBall] = []
+        # The numbers of the pairs of balls that are touching, stored as (lower number, higher number)
+        self.touching_pairs: Set[Tuple[int, int]] = set()
 
     def add_ball(self, ball_number: int, stating_position: Point) -> None:
         """
@@ -26,8 +57,86 @@ class PoolBallList:
         new_ball = PoolBall(ball_number, stating_position)
 
         self.pool_balls[ball_number] = new_ball
+        self.ball_sprites[ball_number] = None
+        self.visible_sprites_outdated = True
+
+        self.return_ball_to_play(ball_number)
+
+    def set_up_rack(self, rack: Dict[int, Point]) -> None:
+        """
+        Puts every ball in the rack at its starting position, at rest and in play.
+        Balls that already exist are reused, so that a table can be reset without recreating its sprites
+        :param rack: A dictionary mapping each ball number to its starting position
+        """
+        for ball_number, start_location in rack.items():
+            ball = self.pool_balls[ball_number]
+
+            if ball.num != ball_number:
+                self.add_ball(ball_number, start_location)
+                continue
+
+            ball.set_position(start_location)
+            ball.set_velocity((0, 0))
+            self.return_ball_to_play(ball_number)
+
+            # Balls without a sprite haven't been drawn yet, and will be visible once they are
+            if self.ball_sprites[ball_number] is not None:
+                self.show_ball(ball_number)
+
+    def write_state(self, state) -> None:
+        """
+        Writes the position, velocity, and whether it's in play of every ball into an array,
+            such as one in shared memory that is read by another process
+        :param state: An array with a row of size `BALL_STATE_SIZE` for each ball number
+        """
+        for ball_num, ball in enumerate(self.pool_balls):
+            if ball.num != ball_num:
+                continue
 
-        self.sprite_group.add(new_ball)
+            row = state[ball_num]
+            row[0] = ball.x_pos
+            row[1] = ball.y_pos
+            row[2] = ball.x_velo
+            row[3] = ball.y_velo
+            row[4] = ball.in_play
+
+    def read_state(self, state) -> None:
+        """
+        Sets the position, velocity, and whether it's in play of every ball from an array written by `write_state`.
+        Balls that are moving are woken up
+        :param state: An array with a row of size `BALL_STATE_SIZE` for each ball number
+        """
+        for ball_num, ball in enumerate(self.pool_balls):
+            if ball.num != ball_num:
+                continue
+
+            x_pos, y_pos, x_velo, y_velo, in_play = state[ball_num]
+            ball.x_pos = float(x_pos)
+            ball.y_pos = float(y_pos)
+            ball.x_velo = float(x_velo)
+            ball.y_velo = float(y_velo)
+
+            if in_play:
+                self.return_ball_to_play(ball_num)
+                if ball.is_moving():
+                    self.wake_ball(ball_num)
+            else:
+                self.remove_ball_from_play(ball)
+
+    def get_sprite(self, ball_num: int) -> "PoolBallSprite":
+        """
+        Returns the sprite of the pool ball with the given number, creating it if it doesn't exist yet
+        :param ball_num: The number of the ball to get the sprite of
+        :return: The PoolBallSprite that draws ball `ball_num`
+        """
+        if self.ball_sprites[ball_num] is None:
+            # Imported here since the sprite needs pygame, which simulating the balls doesn't
+            from pool_ball_sprite import PoolBallSprite
+
+            self.ball_sprites[ball_num] = PoolBallSprite(self.pool_balls[ball_num])
+            self.visible_sprites_outdated = True
+
+        return self.ball_sprites[ball_num]
 
     def get(self, ball_num: int) -> PoolBall:
         """
@@ -37,88 +146,219 @@ class PoolBallList:
         """
         return self.pool_balls[ball_num]
 
+    def return_ball_to_play(self, ball_num: int) -> None:
+        """
+        Puts a ball back into the simulation, such as after the cue ball has been placed. The ball starts asleep
+        :param ball_num: The number of the ball to return to play
+        """
+        ball = self.pool_balls[ball_num]
+        ball.in_play = True
+
+        if ball not in self.simulated_balls:
+            self.simulated_balls.append(ball)
+            self.simulated_balls.sort(key=lambda simulated_ball: simulated_ball.num)
+
+        self.put_ball_to_sleep(ball)
+
+    def remove_ball_from_play(self, ball: PoolBall) -> None:
+        """
+        Removes a ball from the simulation, such as when it goes into a pocket
+        :param ball: The ball to remove
+        """
+        ball.in_play = False
+
+        if ball in self.simulated_balls:
+            self.simulated_balls.remove(ball)
+
+        self.put_ball_to_sleep(ball)
+
+    def wake_ball(self, ball_num: int) -> None:
+        """
+        Wakes a ball so that it is moved and checked for collisions, such as after the cue ball has been hit
+        :param ball_num: The number of the ball to wake
+        """
+        ball = self.pool_balls[ball_num]
+
+        if ball.sleeping and ball.in_play:
+            ball.sleeping = False
+            self.active_balls.append(ball)
+
+    def put_ball_to_sleep(self, ball: PoolBall) -> None:
+        """
+        Puts a ball to sleep so that it is skipped until a moving ball reaches it
+        :param ball: The ball to put to sleep
+        """
+        if not ball.sleeping:
+            ball.sleeping = True
+            self.active_balls.remove(ball)
+
     def move_balls(self) -> Tuple[PoolBall, ]:
         """
-        Move all the balls based on their velocity
+        Move all the awake balls based on their velocity. Balls that come to rest are put to sleep
         :return: A tuple containing any balls that went into a pocket
         """
-        # A list of the balls that went into a pocket during this set of movement
-        balls_in_pocket: List[PoolBall] = []
+        # The balls that went into a pocket during this set of movement
+        balls_in_pocket = self.pocketed_balls
+        balls_in_pocket.clear()
+
+        # Iterates over a copy since balls may be put to sleep or removed while moving
+        moving_balls = self.moving_balls
+        moving_balls[:] = self.active_balls
+        for ball in moving_balls:
+            if not ball.in_play:
+                # The ball was taken out of play without going through the simulation
+                self.remove_ball_from_play(ball)
+                continue
 
-        for ball in self.pool_balls:
-            if ball.in_play:
-                ball.move()
+            ball.move(self.table_geometry)
 
-                if ball.in_pocket():
-                    balls_in_pocket.append(ball)
-                    ball.in_play = False
+            if ball.in_pocket(self.table_geometry):
+                balls_in_pocket.append(ball)
+                self.remove_ball_from_play(ball)
+            elif not ball.is_moving():
+                self.put_ball_to_sleep(ball)
 
         return tuple(balls_in_pocket)
 
-    def perform_collisions(self):
+    def perform_collisions(self) -> bool:
         """
-        Perform the collisions on all the balls
+        Perform the collisions on all the awake balls.
+        Sleeping balls are only checked if they are within the swept bounds of an awake ball.
+        Touching balls are grouped into clusters, and every collision in a cluster is resolved together
         :return: True if any balls collided; False otherwise
         """
+        touching_pairs = self.touching_pairs
+        touching_pairs.clear()
+
+        for ball in self.active_balls:
+            min_x, min_y, max_x, max_y = ball.get_swept_bounds()
+
+            for other_ball in self.simulated_balls:
+                if other_ball is ball:
+                    continue
+
+                if not (min_x <= other_ball.x_pos <= max_x and min_y <= other_ball.y_pos <= max_y):
+                    continue
+
+                if ball.has_collided_with(other_ball):
+                    touching_pairs.add((min(ball.num, other_ball.num), max(ball.num, other_ball.num)))
+
+        if not touching_pairs:
+            return False
+
         any_ball_collided = False
 
-        for ball_pair in itertools.combinations(self.pool_balls, 2):
-            if ball_pair[0].has_collided_with(ball_pair[1]):
-                ball_pair[0].collision(ball_pair[1])
+        clusters = find_contact_clusters([(self.pool_balls[ball_num_1], self.pool_balls[ball_num_2])
+                                          for ball_num_1, ball_num_2 in touching_pairs])
+
+        for cluster_balls, cluster_contacts in clusters:
+            if resolve_contact_cluster(cluster_balls, cluster_contacts):
                 any_ball_collided = True
 
+            for ball in cluster_balls:
+                self.wake_ball(ball.num)
+
         return any_ball_collided
 
     def all_balls_stationary(self) -> bool:
         """
-        Determines if all the balls are stationary
+        Determines if all the balls are stationary. Only awake balls can be moving
         :return: True if all the balls are stationary; False otherwise
         """
-        for ball in self.pool_balls:
+        for ball in self.active_balls:
             if ball.is_moving():
                 return False
 
         return True
 
-    def draw(self, display_surface: pygame.surface) -> None:
+    def update_visible_sprites(self) -> None:
+        """
+        Rebuilds the list of visible sprites and the images and rects drawn for them, creating any missing sprites
+        """
+        visible_sprites = []
+
+        for ball_num, ball in enumerate(self.pool_balls):
+            if ball.num != ball_num:
+                continue
+
+            ball_sprite = self.get_sprite(ball_num)
+            if ball_sprite.visible:
+                visible_sprites.append(ball_sprite)
+
+        # New lists are made so that a render target knows to rescale them
+        self.visible_sprites = visible_sprites
+        self.blit_sequence = [(ball_sprite.image, ball_sprite.rect) for ball_sprite in visible_sprites]
+        self.visible_sprites_outdated = False
+
+    def draw(self, display_surface: "pygame.Surface | RenderTarget", positions: "np.ndarray | None" = None) -> None:
         """
-        Draws every ball sprite
-        :param display_surface: The surface to draw the ball's onto
+        Moves every visible ball sprite to its ball's position and draws them all at once.
+        Nothing is allocated unless a ball has been shown or hidden since the last call
+        :param display_surface: The surface to draw the ball's onto, or the render target that draws them scaled
+        :param positions: The position to draw each ball number in play at, such as between two physics steps.
+                            The balls' own positions are used if not given
         """
-        draw_group = pygame.sprite.Group()
-        for ball in self.pool_balls:
-            if ball.visible:
-                draw_group.add(ball)
+        if self.visible_sprites_outdated:
+            self.update_visible_sprites()
+
+        if positions is None:
+            for ball_sprite in self.visible_sprites:
+                ball_sprite.sync()
+        else:
+            for ball_sprite in self.visible_sprites:
+                ball = ball_sprite.ball
+                if ball.in_play:
+                    ball_sprite.sync(positions.item(ball.num, 0), positions.item(ball.num, 1))
+                else:
+                    ball_sprite.sync()
+
+        display_surface.blits(self.blit_sequence, False)
 
-        draw_group.draw(display_surface)
+    def get_draw_signature(self) -> Tuple:
+        """
+        Gets everything about the balls that affects how they are drawn, to tell if they would look different
+        :return: A tuple of the position of each ball and whether it is shown
+        """
+        return tuple((ball.x_pos, ball.y_pos, ball_sprite is None or ball_sprite.visible)
+                     for ball, ball_sprite in zip(self.pool_balls, self.ball_sprites))
 
-    def hide_ball(self, ball_num: int) -> False:
+    def hide_ball(self, ball_num: int) -> None:
         """
         Hides a given ball
         :param ball_num: The number of the ball to hide
         """
-        self.pool_balls[ball_num].visible = False
+        ball_sprite = self.get_sprite(ball_num)
+
+        if ball_sprite.visible:
+            ball_sprite.visible = False
+            self.visible_sprites_outdated = True
 
     def show_ball(self, ball_num: int) -> None:
         """
         Shows a given ball
         :param ball_num: The number of the ball to show
         """
-        self.pool_balls[ball_num].visible = True
+        ball_sprite = self.get_sprite(ball_num)
+
+        if not ball_sprite.visible:
+            ball_sprite.visible = True
+            self.visible_sprites_outdated = True
 
     def hide_all_balls(self) -> None:
         """
         Hides every ball
         """
-        for ball in self.pool_balls:
-            ball.visible = False
+        for ball_num, ball in enumerate(self.pool_balls):
+            if ball.num == ball_num:
+                self.hide_ball(ball_num)
 
     def show_all_balls(self) -> None:
         """
         Shows every ball
         """
-        for ball in self.pool_balls:
-            ball.visible = True
+        for ball_num, ball in enumerate(self.pool_balls):
+            if ball.num == ball_num:
+                self.show_ball(ball_num)
 
     def get_num_balls(self):
         """
@@ -0,0 +1,61 @@
+import pygame
+
+import constants as c
+from constants import BallTypes
+from pool_ball import PoolBall
+
+
+COLORLIST = [c.colors["white"], c.colors["yellow"], c.colors["blue"], c.colors["red"], c.colors["purple"],
+             c.colors["orange"], c.colors["green"], c.colors["maroon"], c.colors["black"]]
+
+
+class PoolBallSprite(pygame.sprite.Sprite):
+    def __init__(self, ball: PoolBall):
+        """
+        Creates the sprite used to draw a pool ball
+        :param ball: The ball that the sprite shows
+        """
+        super().__init__()
+
+        self.ball: PoolBall = ball
+
+        self.image = pygame.Surface([2 * c.BALL_RADIUS, 2 * c.BALL_RADIUS], pygame.SRCALPHA, 32)
+        self.image = self.image.convert_alpha()
+        self.rect = self.image.get_rect()
+
+        if ball.num == 8:
+            self.color = COLORLIST[8]
+        else:
+            self.color = COLORLIST[ball.num % 8]
+
+        # Flags #
+        self.visible = True
+
+        self.create_image()
+        self.sync()
+
+    def create_image(self) -> None:
+        """
+        Creates the ball's image based on its type
+        """
+        if self.ball.type == BallTypes.striped:
+            pygame.draw.circle(self.image, c.colors["white"], [c.BALL_RADIUS, c.BALL_RADIUS], c.BALL_RADIUS)
+            pygame.draw.rect(self.image, self.color, pygame.Rect(1, c.BALL_RADIUS - c.BALL_RADIUS / 2, 2 * c.BALL_RADIUS - 2, c.BALL_RADIUS))
+
+        else:
+            pygame.draw.circle(self.image, self.color, (c.BALL_RADIUS, c.BALL_RADIUS), c.BALL_RADIUS)
+
+        pygame.draw.circle(self.image, c.colors["white"], (c.BALL_RADIUS, c.BALL_RADIUS), c.BALL_RADIUS / 2)
+
+    def sync(self, x: float | None = None, y: float | None = None) -> None:
+        """
+        Moves the sprite to the current position of its ball. Called once per rendered frame
+        :param x: The x-position to draw the ball at instead, such as between two physics steps
+        :param y: The y-position to draw the ball at instead
+        """
+        if x is None:
+            self.rect.x = self.ball.x_pos
+            self.rect.y = self.ball.y_pos
+        else:
+            self.rect.x = x
+            self.rect.y = y
@@ -37,18 +37,20 @@ class PoolTable(pygame.sprite.Sprite):
             Draws one of the pockets on the pool table
             :param pos: The position of the pocket
             """
-            pygame.draw.circle(self.image, c.colors["pool_black"], pos.to_tuple(), 20)
+            pygame.draw.circle(self.image, c.colors["pool_black"], pos.to_tuple(), c.POCKET_RADIUS)
 
         # Draw brown background
         pygame.draw.rect(self.image, c.colors["pool_brown"],
                          pygame.Rect(0, 0, c.POOL_TABLE_WIDTH, c.POOL_TABLE_HEIGHT))
         # Draw green center background
         pygame.draw.rect(self.image, c.colors["pool_green"],
-                         pygame.Rect(30, 30, c.POOL_TABLE_WIDTH - 60, c.POOL_TABLE_HEIGHT - 60))
+                         pygame.Rect(c.CUSHION_WIDTH, c.CUSHION_WIDTH,
+                                     c.POOL_TABLE_WIDTH - (c.CUSHION_WIDTH * 2),
+                                     c.POOL_TABLE_HEIGHT - (c.CUSHION_WIDTH * 2)))
 
         # Pockets #
-        for horizontal_offset in (30, 400, 770):
-            for vertical_offset in (30, 370):
+        for horizontal_offset in (c.CUSHION_WIDTH, c.POOL_TABLE_WIDTH / 2, c.POOL_TABLE_WIDTH - c.CUSHION_WIDTH):
+            for vertical_offset in (c.CUSHION_WIDTH, c.POOL_TABLE_HEIGHT - c.CUSHION_WIDTH):
                 draw_pocket(pos=Point(horizontal_offset, vertical_offset))
 
         # Grey Dots #
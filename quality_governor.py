@@ -0,0 +1,92 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Sequence
+
+import constants as c
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    show_overlays: bool  # Whether optional overlays, such as the aim preview, are drawn
+    frames_to_skip: int  # The number of frames not drawn after each drawn frame while the balls are moving
+    render_scale: float = 1  # The internal resolution compared to the configured one
+
+
+# From the best quality to the cheapest. Overlays are dropped first since they cost the least to lose.
+#   Half resolution is used since scaling up by a whole number is much faster than by a fraction
+QUALITY_LEVELS = (QualityLevel(show_overlays=True, frames_to_skip=0),
+                  QualityLevel(show_overlays=False, frames_to_skip=0),
+                  QualityLevel(show_overlays=False, frames_to_skip=0, render_scale=0.5),
+                  QualityLevel(show_overlays=False, frames_to_skip=1, render_scale=0.5),
+                  QualityLevel(show_overlays=False, frames_to_skip=2, render_scale=0.5))
+
+
+class QualityGovernor:
+    def __init__(self, frame_budget: float = c.FRAME_BUDGET_SECONDS, levels: Sequence[QualityLevel] = QUALITY_LEVELS,
+                 num_frames_measured: int = c.QUALITY_FRAMES_MEASURED,
+                 get_time: Callable[[], float] = time.perf_counter):
+        """
+        Lowers the quality of what is drawn when frames take longer than their budget,
+            and raises it again once there is time to spare
+        :param frame_budget: The number of seconds each frame should take at most, not counting waiting for the next
+        :param levels: The quality levels, from the best quality to the cheapest
+        :param num_frames_measured: The number of frames averaged before the quality is changed
+        :param get_time: The function that gets the current time in seconds
+        """
+        self.frame_budget: float = frame_budget
+        self.levels: Sequence[QualityLevel] = levels
+        self.get_time: Callable[[], float] = get_time
+
+        self.level_index: int = 0
+        self.frame_costs: Deque[float] = deque(maxlen=num_frames_measured)
+
+        self.frame_start_time: float = get_time()
+        self.frames_since_drawn: int = 0
+
+    def get_level(self) -> QualityLevel:
+        """
+        Gets the current quality level
+        :return: The QualityLevel to draw with
+        """
+        return self.levels[self.level_index]
+
+    def start_frame(self) -> None:
+        """
+        Marks the start of a frame's work, once the wait for the previous frame is over
+        """
+        self.frame_start_time = self.get_time()
+
+    def should_draw_frame(self, balls_moving: bool) -> bool:
+        """
+        Decides whether to draw the current frame or skip it. Only frames with moving balls are skipped,
+            since the simulation keeps its own time and the balls catch up on the next drawn frame
+        :param balls_moving: Whether the balls are moving on this frame
+        :return: True if the frame should be drawn
+        """
+        if balls_moving and self.frames_since_drawn < self.get_level().frames_to_skip:
+            self.frames_since_drawn += 1
+            return False
+
+        self.frames_since_drawn = 0
+        return True
+
+    def end_frame(self) -> None:
+        """
+        Records how long the current frame's work took, and changes the quality level
+            once enough frames have been measured
+        """
+        self.frame_costs.append(self.get_time() - self.frame_start_time)
+
+        if len(self.frame_costs) < self.frame_costs.maxlen:
+            return
+
+        average_cost = sum(self.frame_costs) / len(self.frame_costs)
+
+        # Only raise the quality with plenty of time to spare, so that the quality doesn't switch back and forth
+        if average_cost > self.frame_budget and self.level_index < len(self.levels) - 1:
+            self.level_index += 1
+            self.frame_costs.clear()
+        elif average_cost < self.frame_budget * c.QUALITY_HEADROOM and self.level_index > 0:
+            self.level_index -= 1
+            self.frame_costs.clear()
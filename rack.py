@@ -0,0 +1,22 @@
+import random
+from typing import Dict
+
+import constants as c
+from constants import Point
+
+
+def generate_rack(seed: int | None = None) -> Dict[int, Point]:
+    """
+    Generates the starting positions of every ball for a new game.
+    The cue ball and 8-ball always start in the same place, and the other balls are shuffled into the rest of the rack
+    :param seed: The seed used to shuffle the balls, so that a rack can be recreated. A random rack is used if not given
+    :return: A dictionary mapping each ball number to the position of the top-left corner of the ball
+    """
+    start_locations = list(c.REGULAR_POOL_BALL_START_LOCATIONS)
+    random.Random(seed).shuffle(start_locations)
+
+    rack: Dict[int, Point] = {0: c.CUE_BALL_START_LOCATION, 8: c.EIGHT_BALL_START_LOCATION}
+    for ball_number, start_location in zip(c.REGULAR_POOL_BALL_NUMBERS, start_locations):
+        rack[ball_number] = start_location
+
+    return rack
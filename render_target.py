@@ -0,0 +1,150 @@
+import weakref
+from typing import Dict, List, Sequence, Tuple
+
+import pygame
+
+import constants as c
+from constants import Point
+
+
+class RenderTarget:
+    def __init__(self, display_surface: pygame.Surface, render_scale: float = c.RENDER_SCALE):
+        """
+        Draws a frame at an internal resolution and scales it up to the display once it's finished.
+        Everything is drawn with screen coordinates, which are scaled to the internal resolution
+        :param display_surface: The surface of the window
+        :param render_scale: The size of the internal resolution compared to the window's, greater than 0 and up to 1
+        """
+        self.display_surface: pygame.Surface = display_surface
+
+        # The surface frames are drawn on at each render scale. The window is drawn on directly at full scale
+        self.surfaces: Dict[float, pygame.Surface] = {1: display_surface}
+        # The scaled copy of each image at each render scale. Images that are no longer used,
+        #   such as old rotations of the cue stick, are dropped with them
+        self.scaled_images: Dict[float, weakref.WeakKeyDictionary] = {}
+
+        # The last list passed to `blits`, and a copy of it with scaled images and rects that are moved on each call
+        self.blit_sequence: List[Tuple[pygame.Surface, pygame.Rect]] | None = None
+        self.scaled_blit_sequence: List[Tuple[pygame.Surface, pygame.Rect]] = []
+
+        self.render_scale: float = 1
+        self.surface: pygame.Surface = display_surface
+        self.x_scale: float = 1
+        self.y_scale: float = 1
+        self.set_render_scale(render_scale)
+
+    def set_render_scale(self, render_scale: float) -> None:
+        """
+        Changes the internal resolution used for the following frames
+        :param render_scale: The size of the internal resolution compared to the window's, greater than 0 and up to 1
+        """
+        if render_scale not in self.surfaces:
+            if not 0 < render_scale <= 1:
+                raise ValueError("The render scale must be greater than 0 and at most 1, not " + str(render_scale))
+
+            width, height = self.display_surface.get_size()
+            scaled_width, scaled_height = width * render_scale, height * render_scale
+
+            # Scaling up by a whole number is several times faster, so exact sizes are kept.
+            #   Otherwise, copying surfaces with sizes that are a multiple of 8 pixels is several times faster
+            if not (scaled_width.is_integer() and scaled_height.is_integer() and (1 / render_scale).is_integer()):
+                scaled_width = max(8, round(scaled_width / 8) * 8)
+                scaled_height = max(8, round(scaled_height / 8) * 8)
+
+            self.surfaces[render_scale] = pygame.Surface((int(scaled_width), int(scaled_height)), 0,
+                                                         self.display_surface)
+
+        self.render_scale = render_scale
+        self.surface = self.surfaces[render_scale]
+        self.blit_sequence = None
+
+        # After rounding the size, the scale of each axis is slightly different
+        self.x_scale = self.surface.get_width() / self.display_surface.get_width()
+        self.y_scale = self.surface.get_height() / self.display_surface.get_height()
+
+    def get_scaled_image(self, image: pygame.Surface) -> pygame.Surface:
+        """
+        Gets an image scaled to the internal resolution, scaling it the first time it is drawn at that resolution
+        :param image: The image at full scale
+        :return: The scaled image
+        """
+        if self.render_scale == 1:
+            return image
+
+        scaled_images = self.scaled_images.setdefault(self.render_scale, weakref.WeakKeyDictionary())
+
+        scaled_image = scaled_images.get(image)
+        if scaled_image is None:
+            width, height = image.get_size()
+            scaled_size = (max(1, round(width * self.x_scale)), max(1, round(height * self.y_scale)))
+
+            # Smooth scaling only works on images with at least 24 bits per pixel, which text isn't drawn with
+            if image.get_bitsize() >= 24:
+                scaled_image = pygame.transform.smoothscale(image, scaled_size)
+            else:
+                scaled_image = pygame.transform.scale(image, scaled_size)
+
+            scaled_images[image] = scaled_image
+
+        return scaled_image
+
+    def blit(self, source: pygame.Surface, dest: Sequence[float]) -> None:
+        """
+        Draws an image, in the same way as `pygame.Surface.blit`
+        :param source: The image at full scale
+        :param dest: The screen position of the top-left corner of the image, or a rect starting there
+        """
+        if self.render_scale == 1:
+            self.surface.blit(source, dest)
+        else:
+            self.surface.blit(self.get_scaled_image(source), (dest[0] * self.x_scale, dest[1] * self.y_scale))
+
+    def blits(self, blit_sequence: List[Tuple[pygame.Surface, pygame.Rect]], doreturn: bool = False) -> None:
+        """
+        Draws many images at once, in the same way as `pygame.Surface.blits`.
+        Nothing is allocated when the same list is drawn again, so a new list must be used when its images change
+        :param blit_sequence: A list of pairs of an image at full scale and the rect of its screen position
+        :param doreturn: Unused, since the rects drawn to are never returned
+        """
+        if self.render_scale == 1:
+            self.surface.blits(blit_sequence, False)
+            return
+
+        if blit_sequence is not self.blit_sequence:
+            self.blit_sequence = blit_sequence
+            self.scaled_blit_sequence = [(self.get_scaled_image(image), self.get_scaled_image(image).get_rect())
+                                         for image, _ in blit_sequence]
+
+        for (_, rect), (_, scaled_rect) in zip(blit_sequence, self.scaled_blit_sequence):
+            scaled_rect.x = rect.x * self.x_scale
+            scaled_rect.y = rect.y * self.y_scale
+
+        self.surface.blits(self.scaled_blit_sequence, False)
+
+    def draw_line(self, color: Tuple[int, int, int], start: Point, end: Point) -> None:
+        """
+        Draws a line one pixel wide
+        :param color: The color of the line
+        :param start: The screen position of the start of the line
+        :param end: The screen position of the end of the line
+        """
+        pygame.draw.line(self.surface, color, (start.x * self.x_scale, start.y * self.y_scale),
+                         (end.x * self.x_scale, end.y * self.y_scale))
+
+    def draw_circle(self, color: Tuple[int, int, int], center: Point, radius: float, width: int = 0) -> None:
+        """
+        Draws a circle
+        :param color: The color of the circle
+        :param center: The screen position of the center of the circle
+        :param radius: The radius of the circle on the screen
+        :param width: The width of the circle's outline in pixels, or 0 to fill it
+        """
+        pygame.draw.circle(self.surface, color, (center.x * self.x_scale, center.y * self.y_scale),
+                           radius * self.x_scale, width=width)
+
+    def present(self) -> None:
+        """
+        Scales the finished frame up to the window. The window still needs to be flipped to show it
+        """
+        if self.render_scale != 1:
+            pygame.transform.scale(self.surface, self.display_surface.get_size(), self.display_surface)
@@ -0,0 +1,206 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from typing import BinaryIO, Iterator, List, Tuple
+
+import numpy as np
+
+import constants as c
+from constants import GamePhases, Players
+from replays import load_replay, record_shot
+from scenarios import load_scenario
+import shots
+
+# Frames are drawn offscreen, so no window is opened unless a video driver was chosen
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from main import GameLoop  # noqa: E402
+
+
+# The game used to draw frames in the current process, created once so that its images aren't loaded for every range
+process_game: GameLoop | None = None
+
+
+def get_process_game() -> GameLoop:
+    """
+    Gets the game used to draw frames in the current process, creating it on the first call.
+    The cue stick is hidden and the game is kept in the `Ball in Play` phase so that only the table and balls are drawn
+    :return: The GameLoop for the current process
+    """
+    global process_game
+
+    if process_game is None:
+        process_game = GameLoop()
+        process_game.cue.visible = False
+        process_game.current_phase = GamePhases.ball_in_play
+
+    return process_game
+
+
+def draw_replay_frame(game: GameLoop, state: np.ndarray, current_player: int) -> pygame.Surface:
+    """
+    Draws one frame of a replay with the same drawing as the game
+    :param game: The game to draw with
+    :param state: The state of every ball on the frame
+    :param current_player: The number of the player whose turn it is
+    :return: The surface the frame was drawn onto, which is reused by the next frame
+    """
+    game.pool_balls.read_state(state)
+
+    # Object balls out of play are already lined up below the table, but the cue ball and 8-ball are hidden
+    for ball_num in (0, 8):
+        if state[ball_num, 4]:
+            game.pool_balls.show_ball(ball_num)
+        else:
+            game.pool_balls.hide_ball(ball_num)
+
+    game.game_state.current_player = Players(int(current_player) - 1)
+    game.draw_frame()
+
+    return game.display_surface
+
+
+def render_frame_range(task: Tuple[int, np.ndarray, np.ndarray, str | None]) -> bytes:
+    """
+    Draws a range of frames of a replay, saving each as a PNG or returning them as raw RGB frames
+    :param task: A tuple containing the index of the first frame, the states and current players of the frames,
+                    and the directory to save the PNGs to, or None to return raw frames
+    :return: The raw frames one after another, which is empty if they were saved as PNGs
+    """
+    first_frame_index, states, current_players, png_directory = task
+
+    game = get_process_game()
+    raw_frames: List[bytes] = []
+
+    for frame_offset, (state, current_player) in enumerate(zip(states, current_players)):
+        frame_surface = draw_replay_frame(game, state, current_player)
+
+        if png_directory is not None:
+            pygame.image.save(frame_surface,
+                              os.path.join(png_directory, f"frame_{first_frame_index + frame_offset:06d}.png"))
+        else:
+            raw_frames.append(pygame.image.tobytes(frame_surface, "RGB"))
+
+    # The frames are joined here so that a worker sends them back as a single object
+    return b"".join(raw_frames)
+
+
+def get_frame_range_tasks(states: np.ndarray, current_players: np.ndarray, png_directory: str | None,
+                          chunk_frames: int) -> Iterator[Tuple[int, np.ndarray, np.ndarray, str | None]]:
+    """
+    Splits a replay into ranges of frames that can be drawn independently
+    :param states: The state of every ball for each frame
+    :param current_players: The number of the current player for each frame
+    :param png_directory: The directory to save the PNGs to, or None for raw frames
+    :param chunk_frames: The number of frames in each range
+    :return: An iterator over the tasks for `render_frame_range`
+    """
+    for first_frame_index in range(0, len(states), chunk_frames):
+        last_frame_index = first_frame_index + chunk_frames
+        yield (first_frame_index, states[first_frame_index:last_frame_index],
+               current_players[first_frame_index:last_frame_index], png_directory)
+
+
+def render_replay(states: np.ndarray, current_players: np.ndarray, png_directory: str | None = None,
+                  raw_output: BinaryIO | None = None, num_workers: int = 1, chunk_frames: int = 30) -> int:
+    """
+    Draws every frame of a replay, either as numbered PNGs or as raw RGB frames written in order, such as to a video
+        encoder. Long replays are split into ranges of frames that are drawn by separate processes
+    :param states: The state of every ball for each frame
+    :param current_players: The number of the current player for each frame
+    :param png_directory: The directory to save the PNGs to
+    :param raw_output: The file to write raw frames to if PNGs aren't saved
+    :param num_workers: The number of worker processes. Frames are drawn in this process if it is 1
+    :param chunk_frames: The number of frames drawn by a worker at a time
+    :return: The number of frames drawn
+    """
+    def write_frames(raw_frames: bytes) -> None:
+        """
+        Writes raw frames to the output, if there is one
+        :param raw_frames: The frames, one after another
+        """
+        if raw_output is not None:
+            raw_output.write(raw_frames)
+
+    if png_directory is not None:
+        os.makedirs(png_directory, exist_ok=True)
+
+    tasks = get_frame_range_tasks(states, current_players, png_directory, chunk_frames)
+
+    if num_workers <= 1:
+        for task in tasks:
+            write_frames(render_frame_range(task))
+        return len(states)
+
+    with multiprocessing.Pool(num_workers) as worker_pool:
+        # Only a few ranges are handed out at a time so that raw frames waiting to be written don't fill memory
+        while True:
+            batch = list(itertools.islice(tasks, 2 * num_workers))
+            if not batch:
+                break
+
+            for raw_frames in worker_pool.imap(render_frame_range, batch):
+                write_frames(raw_frames)
+
+        # The workers are left to exit on their own, since the video driver catches the signal that would stop them
+        worker_pool.close()
+        worker_pool.join()
+
+    return len(states)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Draws a replay without a window, as PNG frames or raw RGB frames that can be piped to an encoder, "
+                    "such as: python replay_renderer.py game.npz --raw - | ffmpeg -f rawvideo -pix_fmt rgb24 "
+                    f"-s {c.SCREEN_WIDTH}x{c.SCREEN_HEIGHT} -r {c.PHYSICS_RATE} -i - game.mp4")
+    parser.add_argument("input", help="A replay saved with main.py --record-replay, or a scenario file to simulate a "
+                                      "shot from")
+    parser.add_argument("--angle", type=float, default=0, help="The cue stick angle of a simulated shot")
+    parser.add_argument("--power", type=float, default=1, help="The power of a simulated shot, from 0 to 1")
+    output_group = parser.add_mutually_exclusive_group(required=True)
+    output_group.add_argument("--png", metavar="DIRECTORY", help="The directory to save numbered PNG frames to")
+    output_group.add_argument("--raw", metavar="FILE", help="The file to write raw RGB frames to, or - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="The number of worker processes")
+    parser.add_argument("--chunk-frames", type=int, default=30,
+                        help="The number of frames drawn by a worker at a time")
+    arguments = parser.parse_args()
+
+    if arguments.input.endswith(".json"):
+        scenario = load_scenario(arguments.input)
+        # Frames are drawn with the game, so other tables and extra balls can't be drawn
+        try:
+            scenario.check_fits_game()
+        except ValueError as error:
+            parser.error(arguments.input + ": " + str(error))
+
+        pool_balls = scenario.build_pool_balls()
+        rotation_offset = shots.power_to_rotation_offset(arguments.power)
+        x_velocities, y_velocities = shots.shot_velocities(np.array([arguments.angle]), np.array([rotation_offset]))
+        recorder = record_shot(pool_balls, (float(x_velocities[0]), float(y_velocities[0])),
+                               scenario.current_player)
+        replay_states = np.array(recorder.states)
+        replay_players = np.array(recorder.current_players)
+    else:
+        replay_states, replay_players = load_replay(arguments.input)
+
+    raw_stream = None
+    if arguments.raw is not None:
+        raw_stream = sys.stdout.buffer if arguments.raw == "-" else open(arguments.raw, "wb")
+
+    start_time = time.perf_counter()
+    try:
+        num_frames = render_replay(replay_states, replay_players, arguments.png, raw_stream, arguments.workers,
+                                   arguments.chunk_frames)
+    finally:
+        if raw_stream is not None and raw_stream is not sys.stdout.buffer:
+            raw_stream.close()
+
+    elapsed_time = time.perf_counter() - start_time
+    print(f"Drew {num_frames} frames in {elapsed_time:.2f} s ({num_frames / elapsed_time:.1f} frames/s)",
+          file=sys.stderr)
@@ -0,0 +1,101 @@
+from typing import List, Tuple
+
+import numpy as np
+
+import constants as c
+from constants import BallTypes, Players
+from pool_ball_list import PoolBallList
+
+
+class ReplayRecorder:
+    def __init__(self):
+        """
+        Records the state of the balls after every physics step of a game, so that it can be drawn again later
+        """
+        self.states: List[np.ndarray] = []
+        self.current_players: List[int] = []
+
+    def record(self, state: np.ndarray, current_player: Players) -> None:
+        """
+        Stores a copy of the state of the balls after a physics step
+        :param state: An array with a row of size `BALL_STATE_SIZE` for each ball number, as written by `write_state`
+        :param current_player: The player whose turn it is
+        """
+        self.states.append(state.copy())
+        self.current_players.append(current_player.value + 1)
+
+    def get_num_frames(self) -> int:
+        """
+        Gets the number of states that have been recorded
+        :return: The number of states
+        """
+        return len(self.states)
+
+    def save(self, filename: str) -> None:
+        """
+        Saves every recorded state to a file that can be read by `load_replay`
+        :param filename: The name of the file
+        """
+        states = np.array(self.states) if self.states else np.zeros((0, 16, c.BALL_STATE_SIZE))
+        save_replay(filename, states, np.array(self.current_players, dtype=np.int8))
+
+
+def save_replay(filename: str, states: np.ndarray, current_players: np.ndarray) -> None:
+    """
+    Saves a replay in single precision, which is far more exact than a pixel
+    :param filename: The name of the file
+    :param states: The state of every ball for each frame
+    :param current_players: The number of the player whose turn it is for each frame
+    """
+    np.savez_compressed(filename, states=states.astype(np.float32), current_players=current_players)
+
+
+def load_replay(filename: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads a replay saved by `save_replay`
+    :param filename: The name of the file
+    :return: A tuple containing the state of every ball and the number of the current player for each frame
+    """
+    with np.load(filename) as replay_file:
+        return replay_file["states"].astype(float), replay_file["current_players"]
+
+
+def record_shot(pool_balls: PoolBallList, cue_ball_velocity: Tuple[float, float],
+                current_player: Players = Players.player1, max_steps: int = c.MAX_SHOT_STEPS) -> ReplayRecorder:
+    """
+    Simulates a shot without a window and records it, with pocketed balls lined up below the table like in a game
+    :param pool_balls: The balls on the table, which are left where the shot ends
+    :param cue_ball_velocity: The velocity the cue ball is hit with
+    :param current_player: The player taking the shot
+    :param max_steps: The number of steps after which the shot is cut off if the balls haven't stopped
+    :return: The ReplayRecorder holding the state before the shot and after every step
+    """
+    recorder = ReplayRecorder()
+    state = np.zeros((len(pool_balls.pool_balls), c.BALL_STATE_SIZE))
+
+    # Balls already out of play are counted so that the pocketed balls are lined up after them
+    num_balls_shown_below = {BallTypes.solid: 0, BallTypes.striped: 0}
+    for ball in pool_balls.pool_balls:
+        if not ball.in_play and ball.type in num_balls_shown_below:
+            num_balls_shown_below[ball.type] += 1
+
+    pool_balls.get(0).set_velocity(cue_ball_velocity)
+    pool_balls.wake_ball(ball_num=0)
+
+    pool_balls.write_state(state)
+    recorder.record(state, current_player)
+
+    steps = 0
+    while not pool_balls.all_balls_stationary() and steps < max_steps:
+        for ball in pool_balls.move_balls():
+            if ball.type in num_balls_shown_below:
+                ball.display_ball_below(num_balls_shown_below)
+                num_balls_shown_below[ball.type] += 1
+
+        pool_balls.perform_collisions()
+        steps += 1
+
+        pool_balls.write_state(state)
+        recorder.record(state, current_player)
+
+    return recorder
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from typing import Dict, Sequence
+
+from constants import BallTypes, GamePhases, Players
+from pool_ball import PoolBall
+
+
+@dataclass
+class GameState:
+    """
+    The state of a game that the rules depend on, kept separate from the display so that shots can be judged headlessly
+    """
+    current_player: Players = Players.player1
+
+    player_ball_types: Dict[Players, BallTypes | None] = field(
+        default_factory=lambda: {Players.player1: None, Players.player2: None})
+
+    num_balls_in: Dict[BallTypes, int] = field(default_factory=lambda: {BallTypes.solid: 0, BallTypes.striped: 0})
+
+    winner: Players | None = None
+
+    need_to_place_cue_ball: bool = False
+
+    has_ball_gone_in_pocket: bool = False  # If a ball has gone in on the current turn
+
+    def start_turn(self) -> None:
+        """
+        Clears what happened on the previous turn
+        """
+        self.need_to_place_cue_ball = False
+        self.has_ball_gone_in_pocket = False
+
+    def pocket_balls(self, balls_in_pocket: Sequence[PoolBall]) -> None:
+        """
+        Handles balls going in a pocket.
+        Decides whether there was a winner, if the cue ball needs to be placed, and assigns the ball types
+            to the players if these are the first balls in
+        :param balls_in_pocket: The balls that went in, in the order they went in
+        """
+        if len(balls_in_pocket) == 0:
+            return
+
+        # If no balls have been hit in the entire game
+        if self.num_balls_in[BallTypes.solid] == self.num_balls_in[BallTypes.striped] == 0:
+            first_ball_type = balls_in_pocket[0].type
+
+            # Handles if the eight-ball is the first ball in
+            if first_ball_type == BallTypes.eight:
+                self.winner = Players.swap_player(self.current_player)
+                return
+
+            self.player_ball_types[self.current_player] = first_ball_type
+            self.player_ball_types[Players.swap_player(self.current_player)] = BallTypes.swap_type(first_ball_type)
+
+        current_player_ball_type = self.player_ball_types[self.current_player]
+        for ball in balls_in_pocket:
+            if ball.num == 0:
+                self.need_to_place_cue_ball = True
+
+            elif ball.num == 8:
+                if self.num_balls_in.get(current_player_ball_type) == 7:
+                    self.winner = self.current_player
+                else:
+                    self.winner = Players.swap_player(self.current_player)
+
+            else:
+                self.num_balls_in[ball.type] += 1
+
+    def end_turn(self, any_ball_collided: bool) -> GamePhases:
+        """
+        Determines the phase that the game should switch to once the balls have stopped
+            and swaps the current player if needed
+        :param any_ball_collided: Whether any balls collided during the turn
+        :return: The phase to switch to
+        """
+        # If no ball collisions happened, it means the cue ball did not hit anything
+        if not any_ball_collided:
+            self.need_to_place_cue_ball = True
+
+        # Swap players if the cue ball needs to be placed or no balls have gone in
+        if not self.has_ball_gone_in_pocket or self.need_to_place_cue_ball:
+            self.current_player = self.current_player.swap_player()
+
+        if self.winner is not None:
+            return GamePhases.game_over
+
+        elif self.need_to_place_cue_ball:
+            return GamePhases.place_cue
+
+        else:
+            return GamePhases.hit_cue
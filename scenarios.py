@@ -0,0 +1,335 @@
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+
+import constants as c
+from constants import BallTypes, Players, Point
+from pool_ball_list import PoolBallList
+from rules import GameState
+from table_geometry import TableGeometry
+
+
+@dataclass
+class Scenario:
+    positions: np.ndarray  # The position of the top-left corner of each ball
+    velocities: np.ndarray  # The x- and y-velocity of each ball
+    # The number of each ball. If None, the row index is used as the ball number
+    ball_numbers: np.ndarray | None = None
+    # Whether each ball is in play. If None, every ball is in play
+    in_play: np.ndarray | None = None
+    # The width and height of the table, including the cushions, with its top-left corner at the origin.
+    #   If None, the table used by the game is used, at its place on the screen
+    table_size: Tuple[float, float] | None = None
+
+    current_player: Players = Players.player1
+    player_ball_types: Dict[Players, BallTypes | None] = field(
+        default_factory=lambda: {Players.player1: None, Players.player2: None})
+
+    def get_ball_numbers(self) -> np.ndarray:
+        """
+        Gets the number of each ball
+        :return: An array of the ball numbers
+        """
+        return self.ball_numbers if self.ball_numbers is not None else np.arange(len(self.positions))
+
+    def get_in_play(self) -> np.ndarray:
+        """
+        Gets whether each ball is in play
+        :return: An array of the in-play flags
+        """
+        return self.in_play if self.in_play is not None else np.ones(len(self.positions), dtype=bool)
+
+    def get_table_geometry(self) -> TableGeometry:
+        """
+        Creates the geometry of the scenario's table
+        :return: The TableGeometry for the table
+        """
+        if self.table_size is None:
+            return TableGeometry.standard()
+
+        return TableGeometry.rectangular(Point(0, 0), self.table_size[0], self.table_size[1])
+
+    def check_fits_game(self) -> None:
+        """
+        Checks that the scenario can be played or drawn by the game, which has balls 0 to 15 on its own table
+        :raises ValueError: If the scenario has its own table or a ball number the game doesn't have
+        """
+        if self.table_size is not None:
+            raise ValueError("The scenario is on its own " + str(self.table_size[0]) + " by " +
+                             str(self.table_size[1]) + " table, not the table used by the game")
+
+        ball_numbers = self.get_ball_numbers()
+        if len(ball_numbers) > 0 and (ball_numbers.min() < 0 or ball_numbers.max() > 15):
+            raise ValueError("The game only has balls 0 to 15, but the scenario has balls " +
+                             str(int(ball_numbers.min())) + " to " + str(int(ball_numbers.max())))
+
+    def build_pool_balls(self, table_geometry: TableGeometry = None) -> PoolBallList:
+        """
+        Creates the balls of the scenario on its table. Balls with a velocity start awake
+        :param table_geometry: The geometry of the scenario's table, which can be shared between scenarios
+                                on the same table. Created from the scenario if not given
+        :return: The PoolBallList containing the balls
+        """
+        ball_numbers = self.get_ball_numbers()
+        pool_balls = PoolBallList(table_geometry if table_geometry is not None else self.get_table_geometry(),
+                                  num_balls=max(int(ball_numbers.max()) + 1, 16) if len(ball_numbers) > 0 else 16)
+
+        for ball_num in ball_numbers:
+            pool_balls.add_ball(int(ball_num), Point(0, 0))
+
+        self.apply_to_pool_balls(pool_balls)
+
+        return pool_balls
+
+    def apply_to_pool_balls(self, pool_balls: PoolBallList) -> None:
+        """
+        Moves balls that already exist to the positions and velocities of the scenario.
+        Balls that aren't in the scenario are taken out of play
+        :param pool_balls: The balls, which must include every ball number in the scenario
+        """
+        scenario_ball_numbers = set(self.get_ball_numbers().tolist())
+        for ball in pool_balls.pool_balls:
+            # Ball numbers that were never added hold a placeholder numbered -1
+            if ball.num >= 0 and ball.num not in scenario_ball_numbers:
+                ball.set_velocity((0, 0))
+                pool_balls.remove_ball_from_play(ball)
+
+        for ball_num, position, velocity, in_play in zip(self.get_ball_numbers(), self.positions, self.velocities,
+                                                         self.get_in_play()):
+            ball = pool_balls.get(int(ball_num))
+            ball.x_pos = float(position[0])
+            ball.y_pos = float(position[1])
+            ball.x_velo = float(velocity[0])
+            ball.y_velo = float(velocity[1])
+
+            if in_play:
+                pool_balls.return_ball_to_play(ball.num)
+                if ball.is_moving():
+                    pool_balls.wake_ball(ball.num)
+            else:
+                pool_balls.remove_ball_from_play(ball)
+
+    def build_game_state(self) -> GameState:
+        """
+        Creates the state of the game, counting the object balls that are out of play or left out of the scenario
+            as having gone in
+        :return: The GameState of the scenario
+        """
+        game_state = GameState(current_player=self.current_player, player_ball_types=dict(self.player_ball_types))
+
+        balls_in_play = set(self.get_ball_numbers()[np.asarray(self.get_in_play(), dtype=bool)].tolist())
+        for ball_num in range(1, 16):
+            if ball_num != 8 and ball_num not in balls_in_play:
+                game_state.num_balls_in[BallTypes.solid if ball_num < 8 else BallTypes.striped] += 1
+
+        return game_state
+
+    def to_json(self) -> Dict:
+        """
+        Converts the scenario into the format of a scenario file
+        :return: A dictionary that can be written as JSON
+        """
+        scenario_json = {
+            "current_player": self.current_player.value + 1,
+            "player_ball_types": {str(player.value + 1): ball_type.name
+                                  for player, ball_type in self.player_ball_types.items() if ball_type is not None},
+            "balls": [[int(ball_num), float(position[0]), float(position[1]), float(velocity[0]), float(velocity[1]),
+                       int(in_play)]
+                      for ball_num, position, velocity, in_play in zip(self.get_ball_numbers(), self.positions,
+                                                                       self.velocities, self.get_in_play())]
+        }
+
+        if self.table_size is not None:
+            scenario_json["table_size"] = [float(self.table_size[0]), float(self.table_size[1])]
+
+        return scenario_json
+
+    @classmethod
+    def from_json(cls, scenario_json: Dict) -> "Scenario":
+        """
+        Creates a scenario from the contents of a scenario file
+        :param scenario_json: The scenario file's JSON object
+        :return: The Scenario
+        """
+        balls = np.array(scenario_json["balls"], dtype=float).reshape(-1, 6)
+
+        scenario = cls(positions=balls[:, 1:3], velocities=balls[:, 3:5], ball_numbers=balls[:, 0].astype(int),
+                       in_play=balls[:, 5] != 0,
+                       current_player=Players(scenario_json.get("current_player", 1) - 1))
+
+        if "table_size" in scenario_json:
+            scenario.table_size = tuple(scenario_json["table_size"])
+
+        for player_number, ball_type in scenario_json.get("player_ball_types", {}).items():
+            scenario.player_ball_types[Players(int(player_number) - 1)] = BallTypes[ball_type]
+
+        return scenario
+
+
+def load_scenario(filename: str) -> Scenario:
+    """
+    Loads a scenario file.
+    A scenario file is a JSON object with a `balls` list of [number, x, y, x velocity, y velocity, in play] rows,
+        and optionally the `current_player` (1 or 2), the `player_ball_types` (such as {"1": "solid"}),
+        and the `table_size` as [width, height]
+    :param filename: The name of the file
+    :return: The Scenario
+    """
+    with open(filename) as scenario_file:
+        return Scenario.from_json(json.load(scenario_file))
+
+
+def save_scenario(scenario: Scenario, filename: str) -> None:
+    """
+    Writes a scenario to a scenario file
+    :param scenario: The scenario
+    :param filename: The name of the file
+    """
+    with open(filename, "w") as scenario_file:
+        json.dump(scenario.to_json(), scenario_file, separators=(",", ":"))
+
+
+def load_scenario_directory(directory: str) -> Dict[str, Scenario]:
+    """
+    Loads every scenario file in a directory
+    :param directory: The directory containing the `.json` scenario files
+    :return: A dictionary mapping each file name to its Scenario, ordered by file name
+    """
+    return {filename: load_scenario(os.path.join(directory, filename))
+            for filename in sorted(os.listdir(directory)) if filename.endswith(".json")}
+
+
+def get_open_felt_bounds(table_width: float, table_height: float) -> Tuple[float, float, float, float]:
+    """
+    Gets the area that the top-left corner of a ball can be placed in without touching a cushion or a pocket
+    :param table_width: The width of the table, including the cushions
+    :param table_height: The height of the table, including the cushions
+    :return: A tuple containing the min x, min y, max x, and max y of the area
+    """
+    felt_min_x, felt_min_y, felt_max_x, felt_max_y = TableGeometry.rectangular(
+        Point(0, 0), table_width, table_height).felt_bounds
+
+    # Keeping clear of the pockets along every side also keeps the balls clear of the pocket jaws
+    margin = c.POCKET_RADIUS
+
+    return (felt_min_x + margin, felt_min_y + margin,
+            felt_max_x - margin - 2 * c.BALL_RADIUS, felt_max_y - margin - 2 * c.BALL_RADIUS)
+
+
+def generate_random_positions(num_balls: int, table_width: float, table_height: float,
+                              generator: np.random.Generator) -> np.ndarray:
+    """
+    Places balls at random without any of them touching, by putting each one at a random spot in its own
+        randomly chosen grid cell
+    :param num_balls: The number of balls
+    :param table_width: The width of the table, including the cushions
+    :param table_height: The height of the table, including the cushions
+    :param generator: The random number generator
+    :return: An array of the position of the top-left corner of each ball
+    """
+    min_x, min_y, max_x, max_y = get_open_felt_bounds(table_width, table_height)
+
+    # Each cell has room for a ball and a small gap, so balls in different cells can't touch
+    cell_size = 2 * c.BALL_RADIUS + 1
+    num_columns = int((max_x - min_x) // cell_size) + 1
+    num_rows = int((max_y - min_y) // cell_size) + 1
+
+    if num_balls > num_columns * num_rows:
+        raise ValueError(str(num_balls) + " balls don't fit on a " + str(table_width) + " by " + str(table_height) +
+                         " table")
+
+    cells = generator.choice(num_columns * num_rows, size=num_balls, replace=False)
+    jitter = generator.uniform(0, cell_size - 2 * c.BALL_RADIUS - 0.5, size=(num_balls, 2))
+
+    positions = np.stack((min_x + (cells % num_columns) * cell_size, min_y + (cells // num_columns) * cell_size),
+                         axis=1) + jitter
+
+    return np.minimum(positions, (max_x, max_y))
+
+
+def generate_packed_positions(num_balls: int, table_width: float, table_height: float) -> np.ndarray:
+    """
+    Packs balls as tightly as possible in rows from the middle of the table, like a large rack
+    :param num_balls: The number of balls
+    :param table_width: The width of the table, including the cushions
+    :param table_height: The height of the table, including the cushions
+    :return: An array of the position of the top-left corner of each ball
+    """
+    min_x, min_y, max_x, max_y = get_open_felt_bounds(table_width, table_height)
+
+    # Neighbouring balls are a tiny distance apart, so they start just out of contact
+    spacing = 2 * c.BALL_RADIUS + 1e-6
+    row_height = spacing * math.sqrt(3) / 2
+
+    num_columns = int((max_x - min_x - spacing / 2) // spacing) + 1
+    num_rows = int((max_y - min_y) // row_height) + 1
+
+    if num_balls > num_columns * num_rows:
+        raise ValueError(str(num_balls) + " balls don't fit on a " + str(table_width) + " by " + str(table_height) +
+                         " table")
+
+    # Fill the rows nearest the middle first
+    rows_used = math.ceil(num_balls / num_columns)
+    first_row = (num_rows - rows_used) // 2
+
+    indices = np.arange(num_balls)
+    rows = first_row + indices // num_columns
+    columns = indices % num_columns
+
+    # Every other row is shifted by half a ball so that it sits in the gaps of the rows around it
+    x_positions = min_x + columns * spacing + (rows % 2) * spacing / 2
+    y_positions = min_y + rows * row_height
+
+    return np.stack((x_positions, y_positions), axis=1)
+
+
+def generate_scenario(num_balls: int, table_width: float = c.POOL_TABLE_WIDTH,
+                      table_height: float = c.POOL_TABLE_HEIGHT, layout: str = "random",
+                      max_speed: float = c.MAX_CUE_BALL_VELO, moving_fraction: float = 1,
+                      seed: int | None = None) -> Scenario:
+    """
+    Generates a table with any number of balls, for measuring how the physics engine scales
+    :param num_balls: The number of balls
+    :param table_width: The width of the table, including the cushions
+    :param table_height: The height of the table, including the cushions
+    :param layout: How the balls are placed: "random" scatters them, and "packed" packs them together in the middle
+    :param max_speed: The fastest a ball can start moving
+    :param moving_fraction: The portion of the balls that start moving, each in a random direction
+    :param seed: The seed for the random layout and velocities
+    :return: The generated Scenario
+    """
+    generator = np.random.default_rng(seed)
+
+    if layout == "random":
+        positions = generate_random_positions(num_balls, table_width, table_height, generator)
+    elif layout == "packed":
+        positions = generate_packed_positions(num_balls, table_width, table_height)
+    else:
+        raise ValueError("Unknown layout " + repr(layout))
+
+    angles = generator.uniform(0, 2 * math.pi, size=num_balls)
+    speeds = generator.uniform(0, max_speed, size=num_balls)
+    speeds[generator.random(num_balls) >= moving_fraction] = 0
+
+    velocities = np.stack((speeds * np.cos(angles), speeds * np.sin(angles)), axis=1)
+
+    return Scenario(positions, velocities, table_size=(table_width, table_height))
+
+
+def get_table_size_for_density(num_balls: int, density: float) -> Tuple[float, float]:
+    """
+    Finds the size of a table with the standard proportions whose felt is covered by balls to a given amount
+    :param num_balls: The number of balls
+    :param density: The portion of the felt covered by balls
+    :return: A tuple containing the width and height of the table, including the cushions
+    """
+    felt_area = num_balls * math.pi * c.BALL_RADIUS ** 2 / density
+    aspect_ratio = (c.POOL_TABLE_WIDTH - 2 * c.CUSHION_WIDTH) / (c.POOL_TABLE_HEIGHT - 2 * c.CUSHION_WIDTH)
+
+    felt_height = math.sqrt(felt_area / aspect_ratio)
+
+    return felt_height * aspect_ratio + 2 * c.CUSHION_WIDTH, felt_height + 2 * c.CUSHION_WIDTH
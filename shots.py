@@ -0,0 +1,73 @@
+from typing import Tuple
+
+import numpy as np
+
+import constants as c
+import utilities as util
+
+
+# The signs of the x- and y-portions of the cue ball velocity for the cue stick in each quadrant
+QUADRANT_X_DIRECTIONS = np.array([-1, -1, 1, 1])
+QUADRANT_Y_DIRECTIONS = np.array([-1, 1, 1, -1])
+
+
+def power_to_rotation_offset(power: float) -> float:
+    """
+    Turns the power of a shot into how far back the cue stick is drawn
+    :param power: The power, from 0 to 1
+    :return: The rotation offset of the cue stick
+    """
+    # A power outside the range would be given a speed of `map_to_range`'s error code
+    if not 0 <= power <= 1:
+        raise ValueError("The power of a shot must be from 0 to 1, not " + str(power))
+
+    return c.MIN_ROTATION_OFFSET + power * (c.MAX_ROTATION_OFFSET - c.MIN_ROTATION_OFFSET)
+
+
+def shot_velocities(angles: np.ndarray, rotation_offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Determines the velocity the cue ball would be hit at for every pair of cue stick angles and rotation offsets
+    Gives the same results as `Cue.determine_cue_ball_velocity` without needing a Cue
+    :param angles: The angles of the cue stick, in degrees
+    :param rotation_offsets: How far the cue stick is from its center of rotation for each angle
+    :return: A tuple containing arrays of the x- and y-portions of the velocities
+    """
+    angles = np.mod(np.asarray(angles, dtype=float), 360)
+
+    speeds = util.map_to_range_array(rotation_offsets,
+                                     (c.MIN_ROTATION_OFFSET, c.MAX_ROTATION_OFFSET), (0, c.MAX_CUE_BALL_VELO))
+
+    quadrant_angles = np.radians(np.mod(angles, 90))  # relative angle in a single quadrant from [0, 90)
+    # An angle just below zero can wrap around to exactly 360, which is the same as the first quadrant
+    quadrants = (angles // 90).astype(int) % 4
+
+    sine_magnitudes = speeds * np.sin(quadrant_angles)
+    cosine_magnitudes = speeds * np.cos(quadrant_angles)
+
+    # In the first and third quadrants the angle is measured from the y-axis, and in the others from the x-axis
+    measured_from_y = quadrants % 2 == 0
+    x_magnitudes = np.where(measured_from_y, sine_magnitudes, cosine_magnitudes)
+    y_magnitudes = np.where(measured_from_y, cosine_magnitudes, sine_magnitudes)
+
+    return QUADRANT_X_DIRECTIONS[quadrants] * x_magnitudes, QUADRANT_Y_DIRECTIONS[quadrants] * y_magnitudes
+
+
+def shot_parameters(x_velocities: np.ndarray, y_velocities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Determines the cue stick angles and rotation offsets that would hit the cue ball at every given velocity
+    The inverse of `shot_velocities`. Speeds are not limited to the ones the cue stick can reach
+    :param x_velocities: The x-portions of the velocities
+    :param y_velocities: The y-portions of the velocities
+    :return: A tuple containing arrays of the angles, in degrees, and rotation offsets
+    """
+    x_velocities = np.asarray(x_velocities, dtype=float)
+    y_velocities = np.asarray(y_velocities, dtype=float)
+
+    # The cue ball moves away from the cue stick, so an angle of 0 sends it towards negative y
+    angles = np.mod(np.degrees(np.arctan2(-x_velocities, -y_velocities)), 360)
+
+    speeds = np.hypot(x_velocities, y_velocities)
+    rotation_offsets = (c.MIN_ROTATION_OFFSET
+                        + (c.MAX_ROTATION_OFFSET - c.MIN_ROTATION_OFFSET) * (speeds / c.MAX_CUE_BALL_VELO))
+
+    return angles, rotation_offsets
@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import constants as c
+from pool_ball_list import PoolBallList
+
+
+@dataclass
+class ShotResult:
+    steps: int  # The number of steps until every ball stopped
+    any_ball_collided: bool  # Whether any balls collided during the shot
+    balls_in_pocket: List[int]  # The numbers of the balls that went into a pocket, in the order they went in
+
+
+def simulate_shot(pool_balls: PoolBallList, cue_ball_velocity: Tuple[float, float],
+                  max_steps: int = c.MAX_SHOT_STEPS) -> ShotResult:
+    """
+    Hits the cue ball and moves the balls until they have all stopped, without drawing anything
+    :param pool_balls: The balls on the table, which are left where the shot ends
+    :param cue_ball_velocity: The velocity the cue ball is hit with
+    :param max_steps: The number of steps after which the shot is cut off if the balls haven't stopped
+    :return: The ShotResult of the shot
+    """
+    pool_balls.get(0).set_velocity(cue_ball_velocity)
+    pool_balls.wake_ball(ball_num=0)
+
+    steps = 0
+    any_ball_collided = False
+    balls_in_pocket: List[int] = []
+
+    while not pool_balls.all_balls_stationary() and steps < max_steps:
+        for ball in pool_balls.move_balls():
+            balls_in_pocket.append(ball.num)
+
+        if pool_balls.perform_collisions():
+            any_ball_collided = True
+
+        steps += 1
+
+    return ShotResult(steps, any_ball_collided, balls_in_pocket)
@@ -0,0 +1,191 @@
+import multiprocessing
+import pickle
+import queue
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+import numpy as np
+
+import constants as c
+from pool_ball_list import PoolBallList
+from rack import generate_rack
+from simulation import simulate_shot
+
+
+# The shared arrays, stored as (name, shape) so that each process can create its own view of the same memory
+SHARED_ARRAYS: List[Tuple[str, Tuple[int, ...]]] = [("tables", (16, c.BALL_STATE_SIZE)),
+                                                    ("shots", (2,)),
+                                                    ("results", (c.SHOT_RESULT_SIZE,))]
+
+
+def attach_arrays(memory_blocks: List[shared_memory.SharedMemory], capacity: int) -> List[np.ndarray]:
+    """
+    Creates a NumPy array over each shared memory block
+    :param memory_blocks: The shared memory blocks, in the order of `SHARED_ARRAYS`
+    :param capacity: The number of shots the blocks have room for
+    :return: A list containing the array for each block
+    """
+    return [np.ndarray((capacity,) + shape, dtype=np.float64, buffer=memory_block.buf)
+            for memory_block, (_, shape) in zip(memory_blocks, SHARED_ARRAYS)]
+
+
+def run_worker(memory_names: List[str], capacity: int, tasks: multiprocessing.Queue,
+               finished: multiprocessing.Queue) -> None:
+    """
+    Simulates ranges of shots taken from a queue until it receives None.
+    Each shot starts from its table state and is hit with its cue ball velocity,
+        then the final table state and result are written over the shot's rows in place
+    :param memory_names: The names of the shared memory blocks, in the order of `SHARED_ARRAYS`
+    :param capacity: The number of shots the blocks have room for
+    :param tasks: The queue that the id of the run and the first and last indices of each range of shots are taken
+                    from
+    :param finished: The queue that the run id and first index of each range are put on once it has been simulated,
+                        along with the error that stopped it or None
+    """
+    memory_blocks = [shared_memory.SharedMemory(name=name) for name in memory_names]
+    tables, shots, results = attach_arrays(memory_blocks, capacity)
+
+    pool_balls = PoolBallList()
+    pool_balls.set_up_rack(generate_rack(seed=0))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+
+            run_id, start, stop = task
+            try:
+                for shot_index in range(start, stop):
+                    pool_balls.read_state(tables[shot_index])
+
+                    shot_result = simulate_shot(pool_balls,
+                                                (float(shots[shot_index, 0]), float(shots[shot_index, 1])))
+
+                    pool_balls.write_state(tables[shot_index])
+                    results[shot_index, 0] = shot_result.steps
+                    results[shot_index, 1] = shot_result.any_ball_collided
+            except Exception as error:
+                # The error is sent back to be raised by `run`, and the worker carries on with the next range
+                try:
+                    pickle.dumps(error)
+                except Exception:
+                    error = RuntimeError(f"{type(error).__name__}: {error}")
+
+                finished.put((run_id, start, error))
+                continue
+
+            finished.put((run_id, start, None))
+    finally:
+        # The arrays must be released before the memory they're over can be closed
+        del tables, shots, results
+        for memory_block in memory_blocks:
+            memory_block.close()
+
+
+class SimulationPool:
+    def __init__(self, num_workers: int, capacity: int):
+        """
+        Starts worker processes that simulate shots stored in shared memory.
+        Table states, shots, and results are NumPy arrays over shared memory, so they are never pickled;
+            only the index ranges of the shots to simulate are sent between processes
+        :param num_workers: The number of worker processes
+        :param capacity: The most shots that can be simulated in a single batch
+        """
+        self.capacity: int = capacity
+
+        self.memory_blocks: List[shared_memory.SharedMemory] = [
+            shared_memory.SharedMemory(create=True, size=capacity * int(np.prod(shape)) * np.float64().itemsize)
+            for _, shape in SHARED_ARRAYS]
+
+        # The state of every ball at the start of each shot, which is replaced by the state at the end of it
+        self.tables: np.ndarray
+        # The velocity the cue ball is hit with for each shot
+        self.shots: np.ndarray
+        # The number of steps each shot took and whether any balls collided
+        self.results: np.ndarray
+        self.tables, self.shots, self.results = attach_arrays(self.memory_blocks, capacity)
+
+        self.tasks: multiprocessing.Queue = multiprocessing.Queue()
+        self.finished: multiprocessing.Queue = multiprocessing.Queue()
+
+        # Each run's ranges are tagged with its id, so that a run never counts a range left over from an earlier one
+        self.run_id: int = 0
+        # Why the pool can't be used anymore, such as a worker having stopped part way through a run
+        self.broken_reason: str | None = None
+
+        memory_names = [memory_block.name for memory_block in self.memory_blocks]
+        self.workers: List[multiprocessing.Process] = [
+            multiprocessing.Process(target=run_worker, args=(memory_names, capacity, self.tasks, self.finished),
+                                    daemon=True)
+            for _ in range(num_workers)]
+
+        for worker in self.workers:
+            worker.start()
+
+    def run(self, num_shots: int, chunk_size: int = 64) -> None:
+        """
+        Simulates the first `num_shots` shots and waits until they have all finished.
+        The final table states and results are written into `tables` and `results`.
+        If a shot raises an error, it is raised here once the other ranges have finished.
+            If a worker process stops, a RuntimeError is raised and the pool can't be used again,
+            since the ranges it didn't finish are lost
+        :param num_shots: The number of shots to simulate
+        :param chunk_size: The number of shots given to a worker at a time
+        """
+        if self.broken_reason is not None:
+            raise RuntimeError("The simulation pool can't be used after " + self.broken_reason)
+
+        if num_shots > self.capacity:
+            raise ValueError(f"Can't simulate {num_shots} shots in a pool with room for {self.capacity}")
+
+        self.run_id += 1
+
+        num_tasks = 0
+        for start in range(0, num_shots, chunk_size):
+            self.tasks.put((self.run_id, start, min(start + chunk_size, num_shots)))
+            num_tasks += 1
+
+        first_error = None
+        num_finished = 0
+        while num_finished < num_tasks:
+            try:
+                run_id, _, error = self.finished.get(timeout=c.WORKER_CHECK_SECONDS)
+            except queue.Empty:
+                for worker in self.workers:
+                    if not worker.is_alive():
+                        self.broken_reason = f"a worker stopped with exit code {worker.exitcode}"
+                        raise RuntimeError("A simulation worker stopped with exit code " + str(worker.exitcode))
+                continue
+
+            # Ranges of an earlier run that was interrupted are ignored
+            if run_id != self.run_id:
+                continue
+
+            num_finished += 1
+            if error is not None and first_error is None:
+                first_error = error
+
+        if first_error is not None:
+            raise first_error
+
+    def close(self) -> None:
+        """
+        Stops the workers and frees the shared memory. The arrays can't be used after this
+        """
+        for _ in self.workers:
+            self.tasks.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+        del self.tables, self.shots, self.results
+        for memory_block in self.memory_blocks:
+            memory_block.close()
+            memory_block.unlink()
+
+    def __enter__(self) -> "SimulationPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,218 @@
+import math
+from typing import Dict, List, Tuple
+
+import constants as c
+from constants import Point
+
+
+# A cushion segment stored as (start x, start y, change in x, change in y, length squared)
+CushionSegment = Tuple[float, float, float, float, float]
+
+
+class TableGeometry:
+    def __init__(self, cushions: List[Tuple[Point, Point]], pockets: List[Point],
+                 felt_bounds: Tuple[float, float, float, float]):
+        """
+        Stores the cushions and pockets of a table and indexes them in a grid,
+            so that a ball only has to be checked against the ones near it
+        :param cushions: The line segments that balls bounce off of, as pairs of end points
+        :param pockets: The center points of the pockets
+        :param felt_bounds: The min x, min y, max x, and max y of the playing surface
+        """
+        self.cushions: List[Tuple[Point, Point]] = cushions
+        self.pockets: List[Point] = pockets
+        self.felt_bounds: Tuple[float, float, float, float] = felt_bounds
+
+        self.cell_size: float = c.GEOMETRY_CELL_SIZE
+
+        # Maps the (column, row) of a grid cell to the cushions and pockets a ball centered in that cell could touch
+        self.cushion_cells: Dict[Tuple[int, int], Tuple[CushionSegment, ...]] = {}
+        self.pocket_cells: Dict[Tuple[int, int], Tuple[Point, ...]] = {}
+
+        self.build_index()
+
+    @classmethod
+    def rectangular(cls, position: Point, width: float, height: float) -> "TableGeometry":
+        """
+        Creates the geometry of a standard rectangular table with six pockets
+        :param position: The top-left corner of the table, including the cushions
+        :param width: The width of the table, including the cushions
+        :param height: The height of the table, including the cushions
+        :return: The TableGeometry for the table
+        """
+        left = position.x + c.CUSHION_WIDTH
+        top = position.y + c.CUSHION_WIDTH
+        right = position.x + width - c.CUSHION_WIDTH
+        bottom = position.y + height - c.CUSHION_WIDTH
+        middle = position.x + width / 2
+
+        corner_mouth = c.CORNER_POCKET_MOUTH
+        side_mouth = c.SIDE_POCKET_MOUTH
+        jaw_depth = c.POCKET_JAW_DEPTH
+
+        cushions: List[Tuple[Point, Point]] = []
+
+        # Each horizontal cushion runs from a corner pocket to a side pocket
+        for cushion_y, into_rail in ((top, -1), (bottom, 1)):
+            for start_x, end_x in ((left + corner_mouth, middle - side_mouth),
+                                   (middle + side_mouth, right - corner_mouth)):
+                cushions.append((Point(start_x, cushion_y), Point(end_x, cushion_y)))
+
+            # Corner pocket jaws run diagonally into the rail towards the pocket
+            cushions.append((Point(left + corner_mouth, cushion_y),
+                             Point(left + corner_mouth - jaw_depth, cushion_y + into_rail * jaw_depth)))
+            cushions.append((Point(right - corner_mouth, cushion_y),
+                             Point(right - corner_mouth + jaw_depth, cushion_y + into_rail * jaw_depth)))
+
+            # Side pocket jaws run almost straight into the rail
+            cushions.append((Point(middle - side_mouth, cushion_y),
+                             Point(middle - side_mouth + jaw_depth / 5, cushion_y + into_rail * jaw_depth)))
+            cushions.append((Point(middle + side_mouth, cushion_y),
+                             Point(middle + side_mouth - jaw_depth / 5, cushion_y + into_rail * jaw_depth)))
+
+        # The vertical cushions run between the corner pockets
+        for cushion_x, into_rail in ((left, -1), (right, 1)):
+            cushions.append((Point(cushion_x, top + corner_mouth), Point(cushion_x, bottom - corner_mouth)))
+
+            cushions.append((Point(cushion_x, top + corner_mouth),
+                             Point(cushion_x + into_rail * jaw_depth, top + corner_mouth - jaw_depth)))
+            cushions.append((Point(cushion_x, bottom - corner_mouth),
+                             Point(cushion_x + into_rail * jaw_depth, bottom - corner_mouth + jaw_depth)))
+
+        pockets = [Point(left, top), Point(left, bottom), Point(right, top), Point(right, bottom),
+                   Point(middle, top), Point(middle, bottom)]
+
+        return cls(cushions, pockets, (left, top, right, bottom))
+
+    @classmethod
+    def from_pool_table(cls, pool_table) -> "TableGeometry":
+        """
+        Creates the geometry that matches a drawn pool table
+        :param pool_table: The PoolTable sprite
+        :return: The TableGeometry for the table
+        """
+        return cls.rectangular(Point(pool_table.rect.x, pool_table.rect.y), c.POOL_TABLE_WIDTH, c.POOL_TABLE_HEIGHT)
+
+    @classmethod
+    def standard(cls) -> "TableGeometry":
+        """
+        Creates the geometry of the table used by the game, based on the values in `constants.py`
+        :return: The TableGeometry for the table
+        """
+        return cls.rectangular(Point(c.SCREEN_WIDTH_PADDING, c.SCREEN_HEIGHT_PADDING),
+                               c.POOL_TABLE_WIDTH, c.POOL_TABLE_HEIGHT)
+
+    def get_cell(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Gets the grid cell that contains a point
+        :param x: The x-coordinate of the point
+        :param y: The y-coordinate of the point
+        :return: A tuple containing the column and row of the cell
+        """
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def get_cells_in_bounds(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[Tuple[int, int]]:
+        """
+        Gets every grid cell that overlaps an area
+        :param min_x: The left side of the area
+        :param min_y: The top side of the area
+        :param max_x: The right side of the area
+        :param max_y: The bottom side of the area
+        :return: A list containing the column and row of every cell
+        """
+        min_column, min_row = self.get_cell(min_x, min_y)
+        max_column, max_row = self.get_cell(max_x, max_y)
+
+        return [(column, row) for column in range(min_column, max_column + 1) for row in range(min_row, max_row + 1)]
+
+    def build_index(self) -> None:
+        """
+        Puts every cushion and pocket into each grid cell that a ball touching it could be centered in
+        """
+        cushion_cells: Dict[Tuple[int, int], List[CushionSegment]] = {}
+        pocket_cells: Dict[Tuple[int, int], List[Point]] = {}
+
+        for start, end in self.cushions:
+            segment = (start.x, start.y, end.x - start.x, end.y - start.y,
+                       (end.x - start.x) ** 2 + (end.y - start.y) ** 2)
+
+            for cell in self.get_cells_in_bounds(min(start.x, end.x) - c.BALL_RADIUS,
+                                                 min(start.y, end.y) - c.BALL_RADIUS,
+                                                 max(start.x, end.x) + c.BALL_RADIUS,
+                                                 max(start.y, end.y) + c.BALL_RADIUS):
+                cushion_cells.setdefault(cell, []).append(segment)
+
+        for pocket in self.pockets:
+            for cell in self.get_cells_in_bounds(pocket.x - c.POCKET_RADIUS, pocket.y - c.POCKET_RADIUS,
+                                                 pocket.x + c.POCKET_RADIUS, pocket.y + c.POCKET_RADIUS):
+                pocket_cells.setdefault(cell, []).append(pocket)
+
+        self.cushion_cells = {cell: tuple(segments) for cell, segments in cushion_cells.items()}
+        self.pocket_cells = {cell: tuple(pockets) for cell, pockets in pocket_cells.items()}
+
+    def get_nearby_cushions(self, x: float, y: float) -> Tuple[CushionSegment, ...]:
+        """
+        Gets the cushions that a ball centered at a point could be touching
+        :param x: The x-coordinate of the center of the ball
+        :param y: The y-coordinate of the center of the ball
+        :return: A tuple of the nearby cushion segments
+        """
+        return self.cushion_cells.get(self.get_cell(x, y), ())
+
+    def bounce_off_cushions(self, x: float, y: float, x_velo: float, y_velo: float) \
+            -> Tuple[float, float, float, float] | None:
+        """
+        Bounces a ball off of every cushion it is touching, pushing it back out of the cushions
+        :param x: The x-coordinate of the center of the ball
+        :param y: The y-coordinate of the center of the ball
+        :param x_velo: The x-portion of the ball's velocity
+        :param y_velo: The y-portion of the ball's velocity
+        :return: A tuple containing the new center x, center y, x velocity, and y velocity of the ball if it
+                    touched any cushions; None otherwise
+        """
+        touched_cushion = False
+
+        for start_x, start_y, delta_x, delta_y, length_squared in self.get_nearby_cushions(x, y):
+            # Find the closest point on the cushion to the center of the ball
+            portion = ((x - start_x) * delta_x + (y - start_y) * delta_y) / length_squared
+            portion = min(max(portion, 0), 1)
+
+            normal_x = x - (start_x + portion * delta_x)
+            normal_y = y - (start_y + portion * delta_y)
+            distance = math.sqrt(normal_x * normal_x + normal_y * normal_y)
+
+            if distance >= c.BALL_RADIUS or distance == 0:
+                continue
+
+            touched_cushion = True
+
+            normal_x /= distance
+            normal_y /= distance
+
+            # Push the ball out of the cushion
+            x += normal_x * (c.BALL_RADIUS - distance)
+            y += normal_y * (c.BALL_RADIUS - distance)
+
+            # Reverse the part of the velocity going into the cushion
+            normal_velo = x_velo * normal_x + y_velo * normal_y
+            if normal_velo < 0:
+                x_velo -= (1 + c.BOUNCE_MODIFIER) * normal_velo * normal_x
+                y_velo -= (1 + c.BOUNCE_MODIFIER) * normal_velo * normal_y
+
+        if touched_cushion:
+            return x, y, x_velo, y_velo
+        else:
+            return None
+
+    def in_pocket(self, x: float, y: float) -> bool:
+        """
+        Determines if a ball centered at a point is in a pocket
+        :param x: The x-coordinate of the center of the ball
+        :param y: The y-coordinate of the center of the ball
+        :return: True if the ball is in a pocket; False otherwise
+        """
+        for pocket in self.pocket_cells.get(self.get_cell(x, y), ()):
+            if (x - pocket.x) ** 2 + (y - pocket.y) ** 2 < c.POCKET_RADIUS ** 2:
+                return True
+
+        return False
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+from typing import Dict, List, TextIO
+
+import constants as c
+
+
+class TelemetryWriter:
+    def __init__(self, filename: str, flush_interval: float = c.TELEMETRY_FLUSH_SECONDS,
+                 batch_size: int = c.TELEMETRY_BATCH_SIZE, max_buffered_records: int = c.TELEMETRY_MAX_BUFFERED_RECORDS,
+                 max_file_bytes: int = c.TELEMETRY_MAX_FILE_BYTES, num_rotated_files: int = c.TELEMETRY_ROTATED_FILES):
+        """
+        Writes structured records, such as one for every shot, to a JSON lines file from a background thread,
+            so that the game loop only ever adds a record to a list and never waits on the disk.
+        Once the file is too big it is renamed to `filename.1`, the older files are moved up by one,
+            and a new file is started
+        :param filename: The file to append the records to
+        :param flush_interval: The longest a record waits in memory before being written, in seconds
+        :param batch_size: The number of waiting records that are written without waiting for the interval
+        :param max_buffered_records: The most records that can wait at once. Any more are dropped and counted
+        :param max_file_bytes: The size at which the file is rotated
+        :param num_rotated_files: The number of old files kept
+        """
+        self.filename: str = filename
+        self.flush_interval: float = flush_interval
+        self.batch_size: int = batch_size
+        self.max_buffered_records: int = max_buffered_records
+        self.max_file_bytes: int = max_file_bytes
+        self.num_rotated_files: int = num_rotated_files
+
+        # The records waiting to be written. They are swapped out for an empty list when written
+        self.records: List[Dict] = []
+        self.records_lock: threading.Lock = threading.Lock()
+        self.records_ready: threading.Event = threading.Event()
+
+        self.dropped_records: int = 0  # The number of records dropped because too many were waiting
+        self.failed_records: int = 0  # The number of records lost because they couldn't be converted or written
+        self.write_error: Exception | None = None  # The first error that lost records, which is raised by `close`
+        self.closed: bool = False
+
+        self.file: TextIO = open(filename, "a", encoding="utf-8")
+
+        self.writer_thread: threading.Thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+        self.writer_thread.start()
+
+    def write(self, record: Dict) -> None:
+        """
+        Adds a record to be written by the background thread. Never waits on the disk
+        :param record: The record. It must be able to be converted to JSON
+        """
+        with self.records_lock:
+            if len(self.records) >= self.max_buffered_records:
+                self.dropped_records += 1
+                return
+
+            self.records.append(record)
+            batch_ready = len(self.records) >= self.batch_size
+
+        if batch_ready:
+            self.records_ready.set()
+
+    def run(self) -> None:
+        """
+        Writes the waiting records whenever a batch is ready or the flush interval has passed, until closed
+        """
+        while not self.closed:
+            self.records_ready.wait(self.flush_interval)
+            self.records_ready.clear()
+
+            self.write_records()
+
+        # Records added while closing are written before the thread ends
+        self.write_records()
+
+    def write_records(self) -> None:
+        """
+        Writes every waiting record to the file in one call and rotates the file if it has gotten too big.
+        Records that can't be converted to JSON are skipped, and an error writing the file loses the batch.
+            Either way the records are counted and the thread keeps running. A failed rotation loses nothing
+        """
+        def record_error(error: Exception, num_records: int) -> None:
+            """
+            Counts records that were lost, keeping the first error so that it can be raised by `close`
+            :param error: The error that lost the records
+            :param num_records: The number of records lost
+            """
+            self.failed_records += num_records
+            if self.write_error is None:
+                self.write_error = error
+
+        with self.records_lock:
+            records, self.records = self.records, []
+
+        if not records:
+            return
+
+        lines: List[str] = []
+        for record in records:
+            try:
+                lines.append(json.dumps(record) + "\n")
+            except Exception as error:
+                record_error(error, 1)
+
+        try:
+            self.file.write("".join(lines))
+            self.file.flush()
+        except Exception as error:
+            record_error(error, len(lines))
+            return
+
+        # The batch is already in the file, so a failed rotation doesn't lose any records
+        try:
+            if self.file.tell() >= self.max_file_bytes:
+                self.rotate()
+        except Exception as error:
+            record_error(error, 0)
+
+    def rotate(self) -> None:
+        """
+        Moves the current file to `filename.1`, moving each older file up by one and dropping the oldest,
+            then starts a new file
+        """
+        self.file.close()
+
+        # A new file is opened even if the old ones couldn't be moved, so that later records can still be written
+        try:
+            for index in range(self.num_rotated_files - 1, 0, -1):
+                if os.path.exists(f"{self.filename}.{index}"):
+                    os.replace(f"{self.filename}.{index}", f"{self.filename}.{index + 1}")
+
+            if self.num_rotated_files > 0:
+                os.replace(self.filename, f"{self.filename}.1")
+            else:
+                os.remove(self.filename)
+        finally:
+            self.file = open(self.filename, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        """
+        Writes every waiting record, then stops the background thread and closes the file.
+        Raises the first error that lost records, if there was one
+        """
+        if self.closed:
+            return
+
+        self.closed = True
+        self.records_ready.set()
+        self.writer_thread.join()
+
+        self.file.close()
+
+        if self.write_error is not None:
+            raise self.write_error
+
+    def __enter__(self) -> "TelemetryWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
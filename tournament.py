@@ -0,0 +1,526 @@
+import argparse
+import importlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, TextIO, Tuple
+
+import numpy as np
+
+import constants as c
+from batch_simulation import get_process_pool_balls
+from constants import BallTypes, GamePhases, Players, Point
+from pocket_visibility import PocketVisibility
+from pool_ball_list import PoolBallList
+from rack import generate_rack
+from rules import GameState
+import shots
+
+
+# Games that haven't been won after this many shots are counted as draws
+MAX_GAME_SHOTS = 200
+
+# The number of tries to find a spot for the cue ball that doesn't touch another ball
+CUE_BALL_PLACEMENT_TRIES = 100
+
+
+# Bots #
+class RandomBot:
+    """
+    Places the cue ball anywhere it's allowed and hits it in a random direction. Other bots can build on it
+    """
+    def place_cue_ball(self, pool_balls: PoolBallList, game_state: GameState, limits: Dict[str, float],
+                       generator: random.Random) -> Point:
+        """
+        Chooses where to place the cue ball, such as for the break or after a scratch
+        :param pool_balls: The balls on the table. The cue ball is out of play
+        :param game_state: The state of the game
+        :param limits: The min and max x- and y-positions the top-left corner of the cue ball can be placed at
+        :param generator: The random number generator of the game
+        :return: The position of the top-left corner of the cue ball
+        """
+        return find_free_position(pool_balls, limits, generator)
+
+    def choose_shot(self, pool_balls: PoolBallList, game_state: GameState,
+                    generator: random.Random) -> Tuple[float, float]:
+        """
+        Chooses how to hit the cue ball
+        :param pool_balls: The balls on the table
+        :param game_state: The state of the game
+        :param generator: The random number generator of the game
+        :return: A tuple containing the angle of the cue stick and the power from 0 to 1
+        """
+        return generator.uniform(0, 360), generator.uniform(0.3, 1)
+
+
+class AimingBot(RandomBot):
+    """
+    Aims the cue ball so that it knocks one of the player's balls straight into a pocket, choosing the easiest one.
+    Shoots randomly when there's no clear shot
+    """
+    # How many random spots are tried when placing the cue ball, keeping the one with the easiest shot
+    placement_candidates: int = 8
+
+    # The standard deviation of the aiming error, in degrees
+    aiming_error: float = 0.5
+
+    def __init__(self):
+        # Kept for the whole game, so that only the lines near balls that moved are checked before each shot
+        self.pocket_visibility: PocketVisibility | None = None
+
+    def place_cue_ball(self, pool_balls: PoolBallList, game_state: GameState, limits: Dict[str, float],
+                       generator: random.Random) -> Point:
+        cue_ball = pool_balls.get(0)
+        best_position = None
+        best_difficulty = math.inf
+
+        for _ in range(self.placement_candidates):
+            position = find_free_position(pool_balls, limits, generator)
+            cue_ball.set_position(position)
+            cue_ball.in_play = True
+
+            target = self.find_target(pool_balls, game_state)
+            cue_ball.in_play = False
+
+            if best_position is None or (target is not None and target[2] < best_difficulty):
+                best_position = position
+                best_difficulty = target[2] if target is not None else math.inf
+
+        return best_position
+
+    def choose_shot(self, pool_balls: PoolBallList, game_state: GameState,
+                    generator: random.Random) -> Tuple[float, float]:
+        target = self.find_target(pool_balls, game_state)
+        if target is None:
+            return super().choose_shot(pool_balls, game_state, generator)
+
+        (aim_x, aim_y), distance, _ = target
+        angles, _ = shots.shot_parameters(np.array([aim_x]), np.array([aim_y]))
+
+        # Longer shots need more power to reach the pocket
+        power = min(max(0.3 + distance / 1200, 0.3), 1)
+
+        return float(angles[0]) + generator.gauss(0, self.aiming_error), power
+
+    def find_target(self, pool_balls: PoolBallList,
+                    game_state: GameState) -> Tuple[Tuple[float, float], float, float] | None:
+        """
+        Finds the easiest ball to knock straight into a pocket
+        :param pool_balls: The balls on the table. The cue ball must be in play
+        :param game_state: The state of the game
+        :return: A tuple containing the direction to hit the cue ball in, the distance the balls travel,
+                    and how hard the shot is, or None if there's no clear shot
+        """
+        ball_types = get_target_ball_types(game_state)
+
+        if self.pocket_visibility is None or self.pocket_visibility.pool_balls is not pool_balls:
+            self.pocket_visibility = PocketVisibility(pool_balls)
+        else:
+            self.pocket_visibility.update()
+        pocket_visibility = self.pocket_visibility
+
+        cue_ball = pool_balls.get(0)
+        cue_x, cue_y = cue_ball.x_pos + c.BALL_RADIUS, cue_ball.y_pos + c.BALL_RADIUS
+
+        best_target = None
+        for ball in pool_balls.pool_balls:
+            if not (ball.in_play and ball.type in ball_types and pocket_visibility.has_clear_path_from_cue(ball.num)):
+                continue
+
+            ball_x, ball_y = ball.x_pos + c.BALL_RADIUS, ball.y_pos + c.BALL_RADIUS
+
+            for pocket_index, (pocket_x, pocket_y) in enumerate(pocket_visibility.pockets):
+                if not pocket_visibility.has_clear_path_to_pocket(ball.num, pocket_index):
+                    continue
+
+                pocket_distance = math.hypot(pocket_x - ball_x, pocket_y - ball_y)
+                if pocket_distance == 0:
+                    continue
+
+                # The cue ball has to touch the ball on the side away from the pocket
+                ghost_x = ball_x - (pocket_x - ball_x) / pocket_distance * 2 * c.BALL_RADIUS
+                ghost_y = ball_y - (pocket_y - ball_y) / pocket_distance * 2 * c.BALL_RADIUS
+                aim_x, aim_y = ghost_x - cue_x, ghost_y - cue_y
+                aim_distance = math.hypot(aim_x, aim_y)
+                if aim_distance == 0:
+                    continue
+
+                # How far the ball is cut, from 0 for straight in to 1 for a ball that can't be cut into the pocket
+                cut = 1 - (aim_x * (pocket_x - ball_x) + aim_y * (pocket_y - ball_y)) / (aim_distance * pocket_distance)
+                if cut >= 1:
+                    continue
+
+                difficulty = (aim_distance + pocket_distance) / (1 - cut)
+                if best_target is None or difficulty < best_target[2]:
+                    best_target = ((aim_x, aim_y), aim_distance + pocket_distance, difficulty)
+
+        return best_target
+
+
+# The bots that can be named in a tournament. Other bots can be given as `module:Class`
+BOTS = {"random": RandomBot, "aiming": AimingBot}
+
+
+def get_bot(name: str) -> RandomBot:
+    """
+    Creates a bot from its name
+    :param name: The name of one of the `BOTS`, or a `module:Class` to import
+    :return: The bot
+    """
+    if name in BOTS:
+        return BOTS[name]()
+
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def get_target_ball_types(game_state: GameState) -> Tuple[BallTypes, ...]:
+    """
+    Gets the types of balls the current player is allowed to pocket
+    :param game_state: The state of the game
+    :return: A tuple of the ball types
+    """
+    ball_type = game_state.player_ball_types[game_state.current_player]
+
+    # The table is open until the players have solids and stripes, which a scratch on the first ball in doesn't give
+    if ball_type not in game_state.num_balls_in:
+        return BallTypes.solid, BallTypes.striped
+    if game_state.num_balls_in[ball_type] == 7:
+        return BallTypes.eight,
+
+    return ball_type,
+
+
+# Game #
+def get_cue_ball_limits(pool_balls: PoolBallList, first_turn: bool) -> Dict[str, float]:
+    """
+    Determines the limits on where the cue ball can be placed, the same way as the game
+    :param pool_balls: The balls on the table
+    :param first_turn: Whether it's the break, which must be taken from behind the head string
+    :return: A Dictionary containing the min and max x- and y-values
+    """
+    felt_min_x, felt_min_y, felt_max_x, felt_max_y = pool_balls.table_geometry.felt_bounds
+
+    return {"min_x": c.TABLE_HEAD_STRING_LOCATION if first_turn else felt_min_x,
+            "max_x": felt_max_x - (c.BALL_RADIUS * 2),
+            "min_y": felt_min_y,
+            "max_y": felt_max_y - (c.BALL_RADIUS * 2)}
+
+
+def is_free_position(pool_balls: PoolBallList, position: Point) -> bool:
+    """
+    Determines if the cue ball can be placed somewhere without touching another ball
+    :param pool_balls: The balls on the table
+    :param position: The position of the top-left corner of the cue ball
+    :return: True if no other ball in play is touching it; False otherwise
+    """
+    return all(not ball.in_play or ball.num == 0 or
+               (ball.x_pos - position.x) ** 2 + (ball.y_pos - position.y) ** 2 >= (2 * c.BALL_RADIUS) ** 2
+               for ball in pool_balls.pool_balls)
+
+
+def find_free_position(pool_balls: PoolBallList, limits: Dict[str, float], generator: random.Random) -> Point:
+    """
+    Chooses a random spot within the limits that doesn't touch another ball
+    :param pool_balls: The balls on the table
+    :param limits: The min and max x- and y-positions of the top-left corner of the cue ball
+    :param generator: The random number generator of the game
+    :return: The position of the top-left corner of the cue ball
+    """
+    position = Point(limits["min_x"], limits["min_y"])
+
+    for _ in range(CUE_BALL_PLACEMENT_TRIES):
+        position = Point(generator.uniform(limits["min_x"], limits["max_x"]),
+                         generator.uniform(limits["min_y"], limits["max_y"]))
+        if is_free_position(pool_balls, position):
+            break
+
+    return position
+
+
+def place_cue_ball(pool_balls: PoolBallList, position: Point, limits: Dict[str, float],
+                   generator: random.Random) -> None:
+    """
+    Puts the cue ball back in play where a bot chose, bound to the limits like the cursor is in the game.
+    A spot that touches another ball is replaced by a random free one
+    :param pool_balls: The balls on the table
+    :param position: The position of the top-left corner of the cue ball chosen by the bot
+    :param limits: The min and max x- and y-positions of the top-left corner of the cue ball
+    :param generator: The random number generator of the game
+    """
+    position = Point(min(max(position.x, limits["min_x"]), limits["max_x"]),
+                     min(max(position.y, limits["min_y"]), limits["max_y"]))
+    if not is_free_position(pool_balls, position):
+        position = find_free_position(pool_balls, limits, generator)
+
+    cue_ball = pool_balls.get(0)
+    cue_ball.set_position(position)
+    cue_ball.set_velocity((0, 0))
+    pool_balls.return_ball_to_play(ball_num=0)
+
+
+def play_shot(pool_balls: PoolBallList, game_state: GameState, angle: float, power: float) -> Tuple[GamePhases, bool]:
+    """
+    Hits the cue ball and moves the balls step by step like the `Ball in Play` phase, applying the rules as balls go in
+    :param pool_balls: The balls on the table
+    :param game_state: The state of the game, which is updated by the shot
+    :param angle: The angle of the cue stick
+    :param power: The power of the shot, from 0 to 1
+    :return: A tuple containing the phase the game switches to and whether the shot was a foul
+    """
+    x_velocities, y_velocities = shots.shot_velocities(np.array([angle]),
+                                                       np.array([shots.power_to_rotation_offset(power)]))
+
+    game_state.start_turn()
+
+    pool_balls.get(0).set_velocity((float(x_velocities[0]), float(y_velocities[0])))
+    pool_balls.wake_ball(ball_num=0)
+
+    any_ball_collided = False
+    for _ in range(c.MAX_SHOT_STEPS):
+        balls_in_pocket = pool_balls.move_balls()
+        if balls_in_pocket:
+            game_state.pocket_balls(balls_in_pocket)
+
+            for ball in balls_in_pocket:
+                ball.set_velocity((0, 0))
+
+        if pool_balls.perform_collisions():
+            any_ball_collided = True
+
+        if pool_balls.all_balls_stationary() or game_state.winner is not None:
+            break
+
+    next_phase = game_state.end_turn(any_ball_collided)
+    return next_phase, game_state.need_to_place_cue_ball and next_phase != GamePhases.game_over
+
+
+def play_game(game: Dict) -> Dict:
+    """
+    Plays a full game between two bots without a window, from the break to the 8-ball going in
+    :param game: The scheduled game, with its `id`, the `bots` playing as player 1 and player 2, and the rack `seed`
+    :return: The result of the game, with the winning bot, or None for a draw, and the number of shots and fouls
+    """
+    pool_balls = get_process_pool_balls()
+    pool_balls.set_up_rack(generate_rack(game["seed"]))
+
+    generator = random.Random(game["seed"])
+    bots = {Players.player1: get_bot(game["bots"][0]), Players.player2: get_bot(game["bots"][1])}
+
+    game_state = GameState()
+    current_phase = GamePhases.place_cue
+    first_turn = True
+
+    num_shots = 0
+    fouls = {Players.player1: 0, Players.player2: 0}
+
+    while current_phase != GamePhases.game_over and num_shots < game.get("max_shots", MAX_GAME_SHOTS):
+        bot = bots[game_state.current_player]
+
+        # The cue ball is placed for the break and after a foul
+        if current_phase == GamePhases.place_cue:
+            limits = get_cue_ball_limits(pool_balls, first_turn)
+            first_turn = False
+
+            pool_balls.remove_ball_from_play(pool_balls.get(0))
+            position = bot.place_cue_ball(pool_balls, game_state, limits, generator)
+            place_cue_ball(pool_balls, position, limits, generator)
+            game_state.need_to_place_cue_ball = False
+
+        angle, power = bot.choose_shot(pool_balls, game_state, generator)
+        shooting_player = game_state.current_player
+
+        current_phase, foul = play_shot(pool_balls, game_state, angle, power)
+        num_shots += 1
+        if foul:
+            fouls[shooting_player] += 1
+
+    winner = game_state.winner
+    return {"id": game["id"],
+            "bots": game["bots"],
+            "seed": game["seed"],
+            "winner": game["bots"][winner.value] if winner is not None else None,
+            "winning_player": winner.value + 1 if winner is not None else None,
+            "shots": num_shots,
+            "fouls": [fouls[Players.player1], fouls[Players.player2]]}
+
+
+# Tournament #
+def schedule_games(bot_names: List[str], games_per_pairing: int, seed: int = 0) -> List[Dict]:
+    """
+    Schedules a round robin where every pair of bots plays the same number of games.
+    Each rack is played twice with the bots swapped, so neither bot gets an easier set of breaks
+    :param bot_names: The names of the bots
+    :param games_per_pairing: The number of games each pair of bots plays. Rounded up to an even number
+    :param seed: The seed used to choose the racks
+    :return: A list of the games, each with an `id`, the `bots` as player 1 and player 2, and the rack `seed`
+    """
+    generator = random.Random(seed)
+    games: List[Dict] = []
+
+    for first_bot, second_bot in itertools.combinations(bot_names, 2):
+        for _ in range((games_per_pairing + 1) // 2):
+            rack_seed = generator.randrange(2 ** 31)
+            for bots in ((first_bot, second_bot), (second_bot, first_bot)):
+                games.append({"id": len(games), "bots": list(bots), "seed": rack_seed})
+
+    return games
+
+
+@dataclass
+class Standings:
+    # The number of wins, losses, and draws of each bot
+    records: Dict[str, List[int]] = field(default_factory=dict)
+
+    def add_result(self, result: Dict) -> None:
+        """
+        Counts the result of a game
+        :param result: The result, as returned by `play_game`
+        """
+        for bot_name in result["bots"]:
+            record = self.records.setdefault(bot_name, [0, 0, 0])
+
+            if result["winner"] is None:
+                record[2] += 1
+            elif result["winner"] == bot_name:
+                record[0] += 1
+            else:
+                record[1] += 1
+
+    def get_ranking(self) -> List[Tuple[str, float, List[int]]]:
+        """
+        Ranks the bots by their score, counting a win as 1 and a draw as a half
+        :return: A list of the name, score per game, and record of each bot, from best to worst
+        """
+        ranking = []
+        for bot_name, (wins, losses, draws) in self.records.items():
+            num_games = wins + losses + draws
+            ranking.append((bot_name, (wins + draws / 2) / num_games if num_games else 0, [wins, losses, draws]))
+
+        return sorted(ranking, key=lambda bot_ranking: bot_ranking[1], reverse=True)
+
+    def format(self) -> str:
+        """
+        Formats the standings as a table
+        :return: A line for each bot, from best to worst
+        """
+        return "\n".join(f"{rank:3d}. {bot_name:<20} {score:6.1%}  {wins}-{losses}-{draws}"
+                         for rank, (bot_name, score, (wins, losses, draws)) in enumerate(self.get_ranking(), 1))
+
+
+def get_game_key(game: Dict) -> Tuple[int, Tuple[str, ...], int]:
+    """
+    Gets what a scheduled game is matched to its result by, so that a checkpoint from a tournament with other bots
+        or racks isn't taken for this one
+    :param game: The scheduled game or its result
+    :return: A tuple containing the id of the game, the bots playing, and the rack seed
+    """
+    return game["id"], tuple(game["bots"]), game.get("seed")
+
+
+def load_checkpoint(filename: str) -> List[Dict]:
+    """
+    Loads the results of the games already played. A line cut off by an interrupted run is ignored
+    :param filename: The name of the checkpoint file
+    :return: A list of the results
+    """
+    if not os.path.exists(filename):
+        return []
+
+    results: List[Dict] = []
+    with open(filename) as checkpoint_file:
+        for line in checkpoint_file:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return results
+
+
+def play_games(games: Iterable[Dict], num_workers: int) -> Iterable[Dict]:
+    """
+    Plays games, yielding each result as soon as its game is finished
+    :param games: The games to play
+    :param num_workers: The number of worker processes. Games are played in this process if it is 1
+    :return: An iterator over the results, in the order the games finish
+    """
+    if num_workers <= 1:
+        yield from map(play_game, games)
+        return
+
+    with multiprocessing.Pool(num_workers) as worker_pool:
+        yield from worker_pool.imap_unordered(play_game, games)
+
+
+def run_tournament(games: List[Dict], checkpoint_filename: str, num_workers: int = 1, report_every: int = 100,
+                   report_file: TextIO = sys.stderr) -> Standings:
+    """
+    Plays every scheduled game that doesn't already have a result with the same bots and rack in the checkpoint.
+    Each result is saved as soon as it's finished, so that an interrupted tournament can carry on where it stopped
+    :param games: The scheduled games
+    :param checkpoint_filename: The file the results are saved to, one JSON object per line
+    :param num_workers: The number of worker processes
+    :param report_every: The number of games between reports of the standings
+    :param report_file: The file the reports are written to
+    :return: The final standings
+    """
+    standings = Standings()
+
+    # Results of games that aren't scheduled, such as from an earlier tournament with other bots, are left out
+    scheduled_keys = set(map(get_game_key, games))
+    finished_keys = set()
+    for result in load_checkpoint(checkpoint_filename):
+        game_key = get_game_key(result)
+        if game_key in scheduled_keys and game_key not in finished_keys:
+            finished_keys.add(game_key)
+            standings.add_result(result)
+
+    remaining_games = [game for game in games if get_game_key(game) not in finished_keys]
+    num_finished = len(games) - len(remaining_games)
+    start_time = time.perf_counter()
+
+    with open(checkpoint_filename, "a+") as checkpoint_file:
+        # A line cut off by an interrupted run is ended so that the next result starts on its own line
+        if checkpoint_file.tell() > 0:
+            checkpoint_file.seek(checkpoint_file.tell() - 1)
+            if checkpoint_file.read(1) != "\n":
+                checkpoint_file.write("\n")
+
+        for num_played, result in enumerate(play_games(remaining_games, num_workers), 1):
+            checkpoint_file.write(json.dumps(result) + "\n")
+            checkpoint_file.flush()
+            standings.add_result(result)
+
+            if num_played % report_every == 0 or num_played == len(remaining_games):
+                games_per_minute = num_played / (time.perf_counter() - start_time) * 60
+                report_file.write(f"Games {num_finished + num_played}/{len(games)} "
+                                  f"({games_per_minute:.0f} per minute)\n{standings.format()}\n")
+                report_file.flush()
+
+    return standings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ranks bots by playing full games of 8-ball between every pair of them without a window. "
+                    "Results are saved as they finish, so running the same command again resumes the tournament")
+    parser.add_argument("bots", nargs="+", help="The bots to play, by name (" + ", ".join(BOTS) + ") or module:Class")
+    parser.add_argument("-g", "--games", type=int, default=100, help="The number of games each pair of bots plays")
+    parser.add_argument("-c", "--checkpoint", default="tournament.jsonl",
+                        help="The file the results are saved to and resumed from")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="The number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to choose the racks")
+    parser.add_argument("--report-every", type=int, default=100,
+                        help="The number of games between reports of the standings")
+    arguments = parser.parse_args()
+
+    final_standings = run_tournament(schedule_games(arguments.bots, arguments.games, arguments.seed),
+                                     arguments.checkpoint, arguments.workers, arguments.report_every)
+    print(final_standings.format())
@@ -0,0 +1,93 @@
+from typing import Callable, List
+
+
+class Tween:
+    def __init__(self, start_value: float, end_value: float, duration: float, set_value: Callable[[float], None],
+                 on_finish: Callable[[], None] | None = None):
+        """
+        Changes a value from a start to an end value at a steady rate over a set amount of time
+        :param start_value: The value at the start
+        :param end_value: The value at the end
+        :param duration: The number of seconds the change takes
+        :param set_value: The function called with the new value each time the tween is updated
+        :param on_finish: The function called once the end value has been reached
+        """
+        self.start_value: float = start_value
+        self.end_value: float = end_value
+        self.duration: float = duration
+        self.set_value: Callable[[float], None] = set_value
+        self.on_finish: Callable[[], None] | None = on_finish
+
+        self.elapsed_time: float = 0
+
+    def update(self, elapsed_time: float) -> bool:
+        """
+        Moves the tween forward in time and sets the value for the new time
+        :param elapsed_time: The number of seconds since the last update
+        :return: Whether the tween has finished
+        """
+        self.elapsed_time += elapsed_time
+
+        if self.duration <= 0 or self.elapsed_time >= self.duration:
+            self.set_value(self.end_value)
+            return True
+
+        fraction = self.elapsed_time / self.duration
+        self.set_value(self.start_value + (self.end_value - self.start_value) * fraction)
+
+        return False
+
+
+class TweenScheduler:
+    def __init__(self):
+        """
+        Runs animations a little on every frame so that the game loop keeps handling events while they play
+        """
+        self.tweens: List[Tween] = []
+
+    def add(self, start_value: float, end_value: float, duration: float, set_value: Callable[[float], None],
+            on_finish: Callable[[], None] | None = None) -> Tween:
+        """
+        Starts a tween, which is first updated on the next frame
+        :param start_value: The value at the start
+        :param end_value: The value at the end
+        :param duration: The number of seconds the change takes
+        :param set_value: The function called with the new value each time the tween is updated
+        :param on_finish: The function called once the end value has been reached
+        :return: The new Tween
+        """
+        tween = Tween(start_value, end_value, duration, set_value, on_finish)
+        self.tweens.append(tween)
+
+        return tween
+
+    def update(self, elapsed_time: float) -> None:
+        """
+        Moves every tween forward in time, removing the ones that have finished
+        :param elapsed_time: The number of seconds since the last update
+        """
+        if not self.tweens:
+            return
+
+        finished_tweens = [tween for tween in self.tweens if tween.update(elapsed_time)]
+
+        for tween in finished_tweens:
+            self.tweens.remove(tween)
+
+        # Finishing a tween can start another one, so the callbacks are run once the list has been updated
+        for tween in finished_tweens:
+            if tween.on_finish is not None:
+                tween.on_finish()
+
+    def is_running(self) -> bool:
+        """
+        Checks if any tweens are still playing
+        :return: True if a tween hasn't finished
+        """
+        return len(self.tweens) > 0
+
+    def cancel_all(self) -> None:
+        """
+        Stops every tween without setting its end value or running its finish callback
+        """
+        self.tweens.clear()
@@ -1,8 +1,11 @@
 import math
+import os
+import tracemalloc
 from math import pi, sin, cos
 import unittest
+from typing import List
 import constants as c
-from constants import Point
+from constants import Point, GamePhases, Players, BallTypes
 import utilities as util
 import pygame
 
@@ -183,5 +186,1354 @@ class TestCue(unittest.TestCase):
         self.assertEqual(self.cue_stick.determine_cue_ball_velocity(), (5, 0))
 
 
+# Shots #
+import numpy as np
+import shots
+
+
+class TestShots(unittest.TestCase):
+    def setUp(self) -> None:
+        self.angles = np.concatenate((np.arange(-360, 720, 7.5), [0, 90, 180, 270]))
+        self.rotation_offsets = np.linspace(c.MIN_ROTATION_OFFSET, c.MAX_ROTATION_OFFSET, len(self.angles))
+
+    def test_shot_velocities_match_cue(self):
+        cue_stick = cue.Cue(Point(2, 2))
+        x_velocities, y_velocities = shots.shot_velocities(self.angles, self.rotation_offsets)
+
+        for angle, rotation_offset, x_velo, y_velo in zip(self.angles, self.rotation_offsets,
+                                                          x_velocities, y_velocities):
+            cue_stick.angle = angle
+            cue_stick.rotation_offset = rotation_offset
+            self.assertEqual(cue_stick.determine_cue_ball_velocity(), (x_velo, y_velo))
+
+    def test_shot_parameters_inverse(self):
+        # Skip the minimum offset, since a shot with no speed has no direction
+        x_velocities, y_velocities = shots.shot_velocities(self.angles[1:], self.rotation_offsets[1:])
+        angles, rotation_offsets = shots.shot_parameters(x_velocities, y_velocities)
+
+        np.testing.assert_allclose(rotation_offsets, self.rotation_offsets[1:])
+        np.testing.assert_allclose(np.cos(np.radians(angles)), np.cos(np.radians(self.angles[1:])), atol=1e-12)
+        np.testing.assert_allclose(np.sin(np.radians(angles)), np.sin(np.radians(self.angles[1:])), atol=1e-12)
+
+
+# Pool Ball Class #
+from pool_ball import PoolBall
+
+
+class TestPoolBall(unittest.TestCase):
+    def test_slotted(self):
+        ball = PoolBall(3, Point(100.5, 200.25))
+
+        self.assertFalse(hasattr(ball, "__dict__"))
+        with self.assertRaises(AttributeError):
+            ball.image = None
+
+    def test_has_collided_with_uses_float_positions(self):
+        # These would both be truncated to be 20 apart if integer positions were used
+        self.assertTrue(PoolBall(1, Point(100.9, 100)).has_collided_with(PoolBall(2, Point(120.1, 100))))
+        self.assertFalse(PoolBall(1, Point(100, 100)).has_collided_with(PoolBall(2, Point(120.5, 100))))
+
+
+# Pool Ball List Class #
+from pool_ball_list import PoolBallList
+
+
+def setUpModule() -> None:
+    # The ball images need a display mode to be set, which doesn't need a real window for testing
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+
+
+class TestPoolBallList(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool_balls = PoolBallList()
+        self.pool_balls.add_ball(0, Point(300, 300))
+        self.pool_balls.add_ball(1, Point(400, 301))
+        self.pool_balls.add_ball(2, Point(600, 400))
+
+    def test_balls_start_asleep(self):
+        self.assertEqual(self.pool_balls.active_balls, [])
+        self.assertTrue(self.pool_balls.all_balls_stationary())
+
+        self.assertEqual(self.pool_balls.move_balls(), ())
+        self.assertFalse(self.pool_balls.perform_collisions())
+
+    def test_moving_ball_wakes_ball_it_hits(self):
+        self.pool_balls.get(0).set_velocity((4, 0))
+        self.pool_balls.wake_ball(0)
+
+        any_ball_collided = False
+        while not self.pool_balls.all_balls_stationary():
+            self.pool_balls.move_balls()
+            any_ball_collided = self.pool_balls.perform_collisions() or any_ball_collided
+
+        self.assertTrue(any_ball_collided)
+        self.assertNotEqual(self.pool_balls.get(1).get_position(), Point(400, 301))
+        # The ball that was never reached is never woken or moved
+        self.assertEqual(self.pool_balls.get(2).get_position(), Point(600, 400))
+
+        # Balls are put back to sleep after a full step at rest
+        self.pool_balls.move_balls()
+        self.assertEqual(self.pool_balls.active_balls, [])
+
+    def test_pocketed_ball_removed_from_simulation(self):
+        pocket_position = Point(c.SCREEN_WIDTH_PADDING + 32, c.SCREEN_HEIGHT_PADDING + 32)
+        self.pool_balls.get(2).set_position(pocket_position)
+        self.pool_balls.get(2).set_velocity((-1, -1))
+        self.pool_balls.wake_ball(2)
+
+        self.assertEqual(self.pool_balls.move_balls(), (self.pool_balls.get(2),))
+        self.assertFalse(self.pool_balls.get(2).in_play)
+        self.assertNotIn(self.pool_balls.get(2), self.pool_balls.simulated_balls)
+        self.assertNotIn(self.pool_balls.get(2), self.pool_balls.active_balls)
+
+        self.pool_balls.return_ball_to_play(2)
+        self.assertIn(self.pool_balls.get(2), self.pool_balls.simulated_balls)
+        self.assertTrue(self.pool_balls.get(2).sleeping)
+
+    def test_steps_without_contacts_do_not_allocate(self):
+        def run_steps(num_steps: int) -> int:
+            """
+            Runs physics steps without any contacts
+            :param num_steps: The number of steps
+            :return: The memory allocated by the physics code that is still in use afterwards
+            """
+            for _ in range(num_steps):
+                self.pool_balls.move_balls()
+                self.assertFalse(self.pool_balls.perform_collisions())
+
+            snapshot = tracemalloc.take_snapshot().filter_traces(physics_filters)
+            return sum(statistic.size for statistic in snapshot.statistics("filename"))
+
+        physics_filters = [tracemalloc.Filter(True, os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+                           for filename in ("pool_ball.py", "pool_ball_list.py", "table_geometry.py")]
+
+        self.pool_balls.get(0).set_velocity((0, 3))
+        self.pool_balls.wake_ball(0)
+        self.pool_balls.get(2).set_velocity((-2, 3))
+        self.pool_balls.wake_ball(2)
+
+        tracemalloc.start()
+        try:
+            # The first steps create any scratch storage
+            run_steps(10)
+            memory_after_50_steps = run_steps(40)
+            memory_after_200_steps = run_steps(150)
+        finally:
+            tracemalloc.stop()
+
+        # Temporary values are reused from step to step, so nothing that a step allocates outlives it.
+        #   Anything kept on every step would add at least 16 bytes per step
+        self.assertLess(memory_after_200_steps - memory_after_50_steps, 150)
+
+    def test_draw_only_rebuilds_after_visibility_changes(self):
+        surface = pygame.Surface((c.SCREEN_WIDTH, c.SCREEN_HEIGHT))
+        self.pool_balls.draw(surface)
+        blit_sequence = self.pool_balls.blit_sequence
+        self.assertEqual(len(blit_sequence), 3)
+
+        tracemalloc.start()
+        try:
+            for _ in range(50):
+                self.pool_balls.draw(surface)
+
+            end_memory, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Only the iterators over the list of visible sprites are created, and nothing outlives a draw
+        self.assertIs(self.pool_balls.blit_sequence, blit_sequence)
+        self.assertEqual(end_memory, 0)
+        self.assertLess(peak_memory, 256)
+
+        self.pool_balls.hide_ball(1)
+        surface.fill(c.colors["black"])
+        self.pool_balls.draw(surface)
+
+        self.assertEqual([ball_sprite.ball.num for ball_sprite in self.pool_balls.visible_sprites], [0, 2])
+        self.assertEqual(surface.get_at((300 + c.BALL_RADIUS, 300 + c.BALL_RADIUS))[:3], c.colors["white"])
+        self.assertEqual(surface.get_at((400 + c.BALL_RADIUS, 301 + c.BALL_RADIUS))[:3], c.colors["black"])
+
+# Contact Solver #
+import contact_solver
+
+
+class TestContactSolver(unittest.TestCase):
+    @staticmethod
+    def create_rack() -> List[PoolBall]:
+        """
+        Creates a moving ball hitting a row of three touching balls at an angle
+        """
+        balls = [PoolBall(0, Point(300, 300)), PoolBall(1, Point(319, 294)),
+                 PoolBall(2, Point(320, 314)), PoolBall(3, Point(339, 304))]
+        balls[0].set_velocity((4, 1))
+        return balls
+
+    def test_head_on_collision(self):
+        balls = [PoolBall(0, Point(300, 300)), PoolBall(1, Point(319, 300))]
+        balls[0].set_velocity((4, 0))
+
+        self.assertTrue(contact_solver.resolve_contact_cluster(balls, [(0, 1)]))
+
+        # The moving ball gives almost all of its velocity to the ball it hit
+        self.assertAlmostEqual(balls[0].x_velo, 4 * (1 - c.BOUNCE_MODIFIER) / 2)
+        self.assertAlmostEqual(balls[1].x_velo, 4 * (1 + c.BOUNCE_MODIFIER) / 2)
+        # The overlap is removed
+        self.assertAlmostEqual(util.distance_formula(balls[0].get_position(), balls[1].get_position()),
+                               2 * c.BALL_RADIUS)
+
+    def test_separating_balls_not_collided(self):
+        balls = [PoolBall(0, Point(300, 300)), PoolBall(1, Point(320, 300))]
+        balls[0].set_velocity((-4, 0))
+
+        self.assertFalse(contact_solver.resolve_contact_cluster(balls, [(0, 1)]))
+        self.assertEqual((balls[1].x_velo, balls[1].y_velo), (0, 0))
+
+    def test_cluster_order_independent(self):
+        forward_balls = self.create_rack()
+        forward_pairs = [(forward_balls[0], forward_balls[1]), (forward_balls[0], forward_balls[2]),
+                         (forward_balls[1], forward_balls[3]), (forward_balls[2], forward_balls[3])]
+
+        reversed_balls = self.create_rack()
+        reversed_pairs = [(reversed_balls[2], reversed_balls[3]), (reversed_balls[1], reversed_balls[3]),
+                          (reversed_balls[0], reversed_balls[2]), (reversed_balls[0], reversed_balls[1])]
+
+        forward_clusters = contact_solver.find_contact_clusters(forward_pairs)
+        reversed_clusters = contact_solver.find_contact_clusters(reversed_pairs)
+        self.assertEqual(len(forward_clusters), 1)
+
+        for cluster_balls, cluster_contacts in forward_clusters + reversed_clusters:
+            contact_solver.resolve_contact_cluster(cluster_balls, cluster_contacts)
+
+        for forward_ball, reversed_ball in zip(forward_balls, reversed_balls):
+            self.assertEqual((forward_ball.x_velo, forward_ball.y_velo), (reversed_ball.x_velo, reversed_ball.y_velo))
+            self.assertEqual(forward_ball.get_position(), reversed_ball.get_position())
+
+
+# Table Geometry #
+from table_geometry import TableGeometry
+
+
+class TestTableGeometry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geometry = TableGeometry.rectangular(Point(0, 0), c.POOL_TABLE_WIDTH, c.POOL_TABLE_HEIGHT)
+        self.left, self.top, self.right, self.bottom = self.geometry.felt_bounds
+
+    def test_no_cushions_in_middle_of_table(self):
+        self.assertEqual(self.geometry.get_nearby_cushions(c.POOL_TABLE_WIDTH / 4, c.POOL_TABLE_HEIGHT / 2), ())
+        self.assertIsNone(self.geometry.bounce_off_cushions(c.POOL_TABLE_WIDTH / 4, c.POOL_TABLE_HEIGHT / 2, 3, 3))
+
+    def test_bounce_off_cushion(self):
+        x, y, x_velo, y_velo = self.geometry.bounce_off_cushions(200, self.top + c.BALL_RADIUS - 2, 1, -2)
+
+        self.assertAlmostEqual(y, self.top + c.BALL_RADIUS)
+        self.assertEqual(x_velo, 1)
+        self.assertAlmostEqual(y_velo, 2 * c.BOUNCE_MODIFIER)
+
+    def test_bounce_off_two_cushions(self):
+        # Near the corner of the felt a ball can touch a side cushion and the end of a pocket jaw at once
+        x, y, x_velo, y_velo = self.geometry.bounce_off_cushions(self.left + c.BALL_RADIUS - 1,
+                                                                 self.top + c.CORNER_POCKET_MOUTH + 2, -2, -2)
+
+        self.assertGreater(x_velo, 0)
+        self.assertGreater(x, self.left + c.BALL_RADIUS - 1)
+
+    def test_in_pocket(self):
+        # Corner and side pockets
+        self.assertTrue(self.geometry.in_pocket(self.left + 5, self.top + 5))
+        self.assertTrue(self.geometry.in_pocket(c.POOL_TABLE_WIDTH / 2, self.bottom - 5))
+
+        # Touching a cushion away from the pockets
+        self.assertFalse(self.geometry.in_pocket(200, self.top + c.BALL_RADIUS))
+        self.assertFalse(self.geometry.in_pocket(c.POOL_TABLE_WIDTH / 2, c.POOL_TABLE_HEIGHT / 2))
+
+    def test_fast_ball_does_not_pass_through_cushion(self):
+        table_geometry = TableGeometry.standard()
+        felt_min_x, felt_min_y, felt_max_x, felt_max_y = table_geometry.felt_bounds
+
+        # Each of these moves more than a ball's width in a step, straight at the top cushion away from the pockets
+        for speed in (19, 25, 60):
+            ball = PoolBall(0, Point(345, 300))
+            ball.set_velocity((0, -speed))
+
+            ball.move(table_geometry)
+            while ball.is_moving():
+                ball.move(table_geometry)
+
+            self.assertGreaterEqual(ball.y_pos + c.BALL_RADIUS, felt_min_y + c.BALL_RADIUS - 1e-9)
+            self.assertLessEqual(ball.y_pos + c.BALL_RADIUS, felt_max_y - c.BALL_RADIUS + 1e-9)
+
+
+# Aim Preview #
+from aim_preview import AimPreview
+
+
+class TestAimPreview(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool_balls = PoolBallList()
+        self.pool_balls.add_ball(0, Point(600, 300))
+        self.pool_balls.add_ball(1, Point(400, 300))
+        self.pool_balls.add_ball(2, Point(400, 350))
+
+        self.cue_ball_center = Point(600 + c.BALL_RADIUS, 300 + c.BALL_RADIUS)
+        self.aim_preview = AimPreview(self.pool_balls, self.cue_ball_center)
+
+    def test_predict_ball_hit(self):
+        # A cue angle of 90 degrees shoots the cue ball to the left
+        prediction = self.aim_preview.predict(90)
+
+        self.assertEqual(prediction.hit_ball_num, 1)
+        self.assertAlmostEqual(prediction.contact_point.x, 400 + 3 * c.BALL_RADIUS)
+        self.assertAlmostEqual(prediction.contact_point.y, self.cue_ball_center.y)
+        self.assertAlmostEqual(prediction.object_ball_direction.x, -1)
+
+    def test_predict_cushion_hit(self):
+        # A cue angle of 270 degrees shoots the cue ball to the right, where there are no balls
+        prediction = self.aim_preview.predict(270)
+        felt_max_x = self.pool_balls.table_geometry.felt_bounds[2]
+
+        self.assertIsNone(prediction.hit_ball_num)
+        self.assertAlmostEqual(prediction.contact_point.x, felt_max_x - c.BALL_RADIUS)
+
+    def test_prediction_cached(self):
+        self.assertIs(self.aim_preview.predict(90), self.aim_preview.predict(90 + c.AIM_PREVIEW_ANGLE_STEP / 4))
+
+
+# Rack #
+from rack import generate_rack
+from main import GameLoop
+
+
+class TestRack(unittest.TestCase):
+    def test_seeded_rack_repeats(self):
+        self.assertEqual(generate_rack(seed=5), generate_rack(seed=5))
+        self.assertNotEqual(generate_rack(seed=5), generate_rack(seed=6))
+
+    def test_rack_contains_every_ball(self):
+        rack = generate_rack(seed=1)
+
+        self.assertEqual(sorted(rack), list(range(16)))
+        self.assertEqual(len(set(rack.values())), 16)
+        self.assertEqual(rack[8], c.EIGHT_BALL_START_LOCATION)
+
+    def test_set_up_rack_reuses_balls(self):
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=1))
+        ball_5 = pool_balls.get(5)
+
+        ball_5.set_velocity((3, 1))
+        pool_balls.wake_ball(5)
+        pool_balls.remove_ball_from_play(pool_balls.get(6))
+        pool_balls.hide_ball(6)
+
+        rack = generate_rack(seed=2)
+        pool_balls.set_up_rack(rack)
+
+        self.assertIs(pool_balls.get(5), ball_5)
+        self.assertEqual(ball_5.get_position(), rack[5])
+        self.assertFalse(ball_5.is_moving())
+        self.assertEqual(pool_balls.active_balls, [])
+        self.assertEqual(len(pool_balls.simulated_balls), 16)
+        self.assertTrue(pool_balls.get_sprite(6).visible)
+
+
+class TestGameSession(unittest.TestCase):
+    def test_games_in_same_process(self):
+        first_game = GameLoop(seed=3)
+        second_game = GameLoop(seed=3)
+
+        for ball_num in range(16):
+            self.assertEqual(first_game.pool_balls.get(ball_num).get_position(),
+                             second_game.pool_balls.get(ball_num).get_position())
+
+    def test_reset_game(self):
+        game = GameLoop(seed=3)
+        display_surface = game.display_surface
+
+        game.current_phase = GamePhases.game_over
+        game.game_state.winner = Players.player2
+        game.pool_balls.hide_all_balls()
+        game.pool_table.visible = False
+
+        game.reset_game(seed=4)
+
+        self.assertIs(game.display_surface, display_surface)
+        self.assertEqual(game.current_phase, GamePhases.place_cue)
+        self.assertIsNone(game.game_state.winner)
+        self.assertTrue(game.pool_table.visible)
+        rack = generate_rack(seed=4)
+        for ball_num in range(16):
+            self.assertEqual(game.pool_balls.get(ball_num).get_position(), rack[ball_num])
+
+    def test_idle_frames_are_not_drawn(self):
+        game = GameLoop(seed=3)
+        flip = pygame.display.flip
+        num_flips = [0]
+
+        def count_flip():
+            num_flips[0] += 1
+            flip()
+
+        pygame.display.flip = count_flip
+        try:
+            game.tick_frame()
+            game.tick_frame()
+            self.assertEqual(num_flips[0], 1)
+
+            # Any change on screen is drawn
+            game.pool_balls.get(0).set_x_position(game.pool_balls.get(0).x_pos + 1)
+            game.tick_frame()
+            self.assertEqual(num_flips[0], 2)
+        finally:
+            pygame.display.flip = flip
+
+    def test_event_that_ends_idle_wait_is_handled_first(self):
+        game = GameLoop(seed=3)
+        game.tick_frame()
+
+        # The wait takes the click off the queue, but the release after it is still handled second
+        pygame.event.clear()
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(0, 0)))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=(0, 0)))
+        game.tick_frame()
+
+        self.assertEqual([event.type for event in game.get_events()], [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP])
+        self.assertEqual(game.get_events(), [])
+
+        # Moving the mouse alone doesn't change the frame
+        get_pos = pygame.mouse.get_pos
+        pygame.mouse.get_pos = lambda: (123, 45)
+        try:
+            self.assertEqual(game.get_frame_signature(), game.last_frame_signature)
+        finally:
+            pygame.mouse.get_pos = get_pos
+
+
+# Simulation #
+from simulation import simulate_shot
+from simulation_pool import SimulationPool
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool_balls = PoolBallList()
+        self.pool_balls.set_up_rack(generate_rack(seed=1))
+        self.pool_balls.get(0).set_position(Point(700, 300))
+
+    def test_state_round_trip(self):
+        self.pool_balls.get(3).set_velocity((1.5, -2))
+        self.pool_balls.wake_ball(3)
+        self.pool_balls.remove_ball_from_play(self.pool_balls.get(9))
+
+        state = np.zeros((16, c.BALL_STATE_SIZE))
+        self.pool_balls.write_state(state)
+
+        other_pool_balls = PoolBallList()
+        other_pool_balls.set_up_rack(generate_rack(seed=2))
+        other_pool_balls.read_state(state)
+
+        other_state = np.zeros((16, c.BALL_STATE_SIZE))
+        other_pool_balls.write_state(other_state)
+
+        np.testing.assert_array_equal(state, other_state)
+        self.assertEqual(other_pool_balls.active_balls, [other_pool_balls.get(3)])
+        self.assertNotIn(other_pool_balls.get(9), other_pool_balls.simulated_balls)
+
+    def test_simulate_shot(self):
+        shot_result = simulate_shot(self.pool_balls, (-5, 0.2))
+
+        self.assertTrue(shot_result.any_ball_collided)
+        self.assertGreater(shot_result.steps, 0)
+        self.assertTrue(self.pool_balls.all_balls_stationary())
+
+    def test_pool_matches_simulate_shot(self):
+        shots = [(-5, 0.2), (-4, -1), (2, 3)]
+
+        with SimulationPool(num_workers=2, capacity=len(shots)) as pool:
+            for shot_index, cue_ball_velocity in enumerate(shots):
+                self.pool_balls.write_state(pool.tables[shot_index])
+                pool.shots[shot_index] = cue_ball_velocity
+
+            start_state = pool.tables.copy()
+            # A range left over from an interrupted earlier run isn't counted as one of this run's
+            pool.finished.put((pool.run_id, 0, None))
+            pool.run(len(shots), chunk_size=1)
+
+            for shot_index, cue_ball_velocity in enumerate(shots):
+                self.pool_balls.read_state(start_state[shot_index])
+                shot_result = simulate_shot(self.pool_balls, cue_ball_velocity)
+
+                end_state = np.zeros((16, c.BALL_STATE_SIZE))
+                self.pool_balls.write_state(end_state)
+
+                np.testing.assert_array_equal(pool.tables[shot_index], end_state)
+                self.assertEqual(pool.results[shot_index, 0], shot_result.steps)
+                self.assertEqual(pool.results[shot_index, 1], shot_result.any_ball_collided)
+
+    def test_pool_raises_worker_errors(self):
+        with SimulationPool(num_workers=2, capacity=4) as pool:
+            for shot_index in range(4):
+                self.pool_balls.write_state(pool.tables[shot_index])
+            pool.shots[:] = (-5, 0.2)
+            pool.shots[2] = (np.inf, 0)
+
+            with self.assertRaises(OverflowError):
+                pool.run(4, chunk_size=1)
+
+            # The workers keep running after an error
+            pool.shots[2] = (-5, 0.2)
+            for shot_index in range(4):
+                self.pool_balls.write_state(pool.tables[shot_index])
+            pool.run(4, chunk_size=1)
+            self.assertTrue(np.all(pool.results[:, 1]))
+
+    def test_pool_fails_if_worker_stops(self):
+        with SimulationPool(num_workers=1, capacity=1) as pool:
+            self.pool_balls.write_state(pool.tables[0])
+            pool.shots[0] = (-5, 0.2)
+
+            pool.workers[0].kill()
+            pool.workers[0].join()
+
+            with self.assertRaises(RuntimeError):
+                pool.run(1)
+
+            # The range the stopped worker never finished would be lost, so the pool can't be used again
+            with self.assertRaises(RuntimeError):
+                pool.run(1)
+
+
+# Pocket Visibility #
+from pocket_visibility import PocketVisibility
+
+
+class TestPocketVisibility(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool_balls = PoolBallList()
+        self.pool_balls.add_ball(0, Point(600, 300))
+        self.pool_balls.add_ball(1, Point(300, 300))
+        self.pool_balls.add_ball(2, Point(450, 305))
+
+        self.visibility = PocketVisibility(self.pool_balls)
+
+    def test_blocked_path_from_cue(self):
+        self.assertFalse(self.visibility.has_clear_path_from_cue(1))
+        self.assertTrue(self.visibility.has_clear_path_from_cue(2))
+
+    def test_update_after_ball_moves(self):
+        self.pool_balls.get(2).set_position(Point(450, 200))
+        self.visibility.update()
+        self.assertTrue(self.visibility.has_clear_path_from_cue(1))
+
+        self.pool_balls.remove_ball_from_play(self.pool_balls.get(1))
+        self.visibility.update()
+        self.assertFalse(self.visibility.has_clear_path_from_cue(1))
+        self.assertFalse(self.visibility.has_clear_path_to_pocket(1, 0))
+
+    def test_update_matches_rebuild(self):
+        self.pool_balls.set_up_rack(generate_rack(seed=4))
+        self.pool_balls.get(0).set_position(Point(700, 300))
+        self.visibility.update()
+
+        simulate_shot(self.pool_balls, (-5, 0.4))
+        self.visibility.update()
+
+        self.assertEqual(self.visibility.blockers, PocketVisibility(self.pool_balls).blockers)
+
+
+# Golden Traces #
+import golden_traces
+
+
+class TestGoldenTraces(unittest.TestCase):
+    def test_physics_matches_corpus(self):
+        # Whole shots are only compared with the NumPy and BLAS the corpus was recorded with
+        corpus = golden_traces.load_corpus()
+
+        for comparison in golden_traces.check_corpus(corpus, num_steps=golden_traces.get_comparable_steps(corpus)):
+            self.assertIsNone(comparison.first_divergent_step,
+                              "Shot " + str(comparison.shot_index) + " diverged from its golden trace. It was "
+                              "recorded with " + str(corpus["environment"]) + ", and can be recorded again with "
+                              "`python golden_traces.py record`")
+
+    def test_comparable_steps_depend_on_environment(self):
+        corpus = golden_traces.record_corpus(1)
+        self.assertIsNone(golden_traces.get_comparable_steps(corpus))
+
+        corpus["environment"] = np.array("NumPy 1.0, reference 1.0")
+        self.assertEqual(golden_traces.get_comparable_steps(corpus), golden_traces.GOLDEN_TRACE_PORTABLE_STEPS)
+
+        comparison, = golden_traces.check_corpus(corpus, num_steps=5)
+        self.assertIsNone(comparison.first_divergent_step)
+
+    def test_compare_trace_finds_first_divergent_step(self):
+        reference = np.zeros((10, 16, 2))
+        candidate = reference.copy()
+        candidate[6:, 3, 0] = 0.5
+
+        self.assertEqual(golden_traces.compare_trace(reference, candidate, 0.1, 0), (6, 0.5))
+        self.assertEqual(golden_traces.compare_trace(reference, candidate, 0.1, 0.1), (None, 0.5))
+
+    def test_compare_trace_pocketed_ball(self):
+        reference = np.zeros((10, 16, 2))
+        candidate = reference.copy()
+        reference[4:, 7] = np.nan
+
+        first_divergent_step, _ = golden_traces.compare_trace(reference, candidate[:8], 0.1, 0)
+        self.assertEqual(first_divergent_step, 4)
+
+
+# Rules #
+from rules import GameState
+
+
+class TestRules(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game_state = GameState()
+        self.game_state.start_turn()
+
+    def test_first_ball_in_assigns_types(self):
+        self.game_state.pocket_balls([PoolBall(11, Point(0, 0)), PoolBall(0, Point(0, 0))])
+
+        self.assertEqual(self.game_state.player_ball_types[Players.player1], BallTypes.striped)
+        self.assertEqual(self.game_state.player_ball_types[Players.player2], BallTypes.solid)
+        self.assertEqual(self.game_state.num_balls_in[BallTypes.striped], 1)
+
+        # Scratching gives the turn to the other player even though a ball went in
+        self.assertEqual(self.game_state.end_turn(any_ball_collided=True), GamePhases.place_cue)
+        self.assertEqual(self.game_state.current_player, Players.player2)
+
+    def test_players_alternate(self):
+        self.game_state.pocket_balls([PoolBall(3, Point(0, 0))])
+
+        self.assertEqual(self.game_state.end_turn(any_ball_collided=True), GamePhases.hit_cue)
+        self.assertEqual(self.game_state.current_player, Players.player2)
+
+        self.game_state.start_turn()
+        self.game_state.pocket_balls([PoolBall(10, Point(0, 0))])
+
+        self.assertEqual(self.game_state.end_turn(any_ball_collided=True), GamePhases.hit_cue)
+        self.assertEqual(self.game_state.current_player, Players.player1)
+
+    def test_eight_ball_first_loses(self):
+        self.game_state.pocket_balls([PoolBall(8, Point(0, 0))])
+
+        self.assertEqual(self.game_state.end_turn(any_ball_collided=True), GamePhases.game_over)
+        self.assertEqual(self.game_state.winner, Players.player2)
+
+
+# Batch Simulation #
+import io
+import json
+import batch_simulation
+
+
+class TestBatchSimulation(unittest.TestCase):
+    def test_simulate_request(self):
+        result = json.loads(batch_simulation.simulate_request(
+            json.dumps({"id": 7, "seed": 2, "angle": 90, "power": 1})))
+
+        self.assertEqual(result["id"], 7)
+        self.assertEqual(len(result["positions"]), 16)
+        self.assertTrue(result["any_ball_collided"])
+        self.assertIn(result["outcome"]["next_phase"], ["hit_cue", "place_cue", "game_over"])
+
+    def test_table_state_request(self):
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=2))
+        pool_balls.get(0).set_position(Point(700, 300))
+        pool_balls.remove_ball_from_play(pool_balls.get(4))
+
+        state = np.zeros((16, c.BALL_STATE_SIZE))
+        pool_balls.write_state(state)
+
+        result = json.loads(batch_simulation.simulate_request(
+            json.dumps({"balls": state.tolist(), "angle": 0, "power": 0.2, "current_player": 2})))
+
+        self.assertIsNone(result["positions"][4])
+        self.assertEqual(result["outcome"]["next_player"], 1)
+
+    def test_bad_requests_do_not_stop_batch(self):
+        requests = io.StringIO("not json\n\n" + json.dumps({"seed": 1, "angle": 45, "power": 0.5}) + "\n")
+        results = io.StringIO()
+
+        batch_simulation.run_batch_simulation(requests, results, num_workers=1, batch_size=1)
+
+        result_lines = results.getvalue().splitlines()
+        self.assertEqual(len(result_lines), 2)
+        self.assertIn("error", json.loads(result_lines[0]))
+        self.assertIn("outcome", json.loads(result_lines[1]))
+
+    def test_non_object_requests(self):
+        requests = io.StringIO("[1, 2]\n3\n\"x\"\nnull\n" + json.dumps({"id": 4, "angle": 0}) + "\n")
+        results = io.StringIO()
+
+        batch_simulation.run_batch_simulation(requests, results, num_workers=1, batch_size=2)
+
+        results = [json.loads(result_line) for result_line in results.getvalue().splitlines()]
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all("error" in result for result in results))
+        self.assertEqual([result["id"] for result in results], [None, None, None, None, 4])
+
+    def test_out_of_range_requests(self):
+        requests = [{"id": 0, "seed": 1, "angle": 0, "power": 2},
+                    {"id": 1, "seed": 1, "angle": 0, "power": -1},
+                    {"id": 2, "seed": 1, "angle": 0, "power": 0.5, "cue_ball": [100000, 300]},
+                    {"id": 3, "seed": 1, "angle": 0, "power": 0.5, "cue_ball": [300]},
+                    {"id": 4, "seed": 1, "angle": 0, "power": 0.5, "cue_ball": ["300", 300]},
+                    {"id": 5, "seed": 1, "angle": 0, "power": 1}]
+
+        results = [json.loads(batch_simulation.simulate_request(json.dumps(request))) for request in requests]
+
+        self.assertEqual([result["id"] for result in results if "error" in result], [0, 1, 2, 3, 4])
+        self.assertIn("outcome", results[5])
+
+
+# Scenarios #
+import scenarios
+
+
+class TestScenarios(unittest.TestCase):
+    def assert_no_balls_touching(self, positions: np.ndarray):
+        distances = np.hypot(*(positions[:, np.newaxis] - positions[np.newaxis]).transpose(2, 0, 1))
+        np.fill_diagonal(distances, np.inf)
+        self.assertGreaterEqual(distances.min(), 2 * c.BALL_RADIUS)
+
+    def test_layouts_do_not_overlap(self):
+        table_width, table_height = scenarios.get_table_size_for_density(200, 0.3)
+
+        for layout in ["random", "packed"]:
+            scenario = scenarios.generate_scenario(200, table_width, table_height, layout, seed=1)
+            self.assertEqual(scenario.positions.shape, (200, 2))
+            self.assert_no_balls_touching(scenario.positions)
+
+    def test_build_pool_balls(self):
+        scenario = scenarios.generate_scenario(40, 1000, 600, moving_fraction=0.5, seed=3)
+        pool_balls = scenario.build_pool_balls()
+
+        self.assertEqual(pool_balls.get_num_balls(), 40)
+        self.assertEqual(len(pool_balls.simulated_balls), 40)
+        self.assertEqual(len(pool_balls.active_balls), np.count_nonzero(np.any(scenario.velocities != 0, axis=1)))
+
+        # The balls start clear of the cushions and pockets
+        self.assertEqual(pool_balls.move_balls(), ())
+
+    def test_too_many_balls(self):
+        with self.assertRaises(ValueError):
+            scenarios.generate_scenario(2000, layout="packed")
+
+
+    def get_game_scenario(self) -> scenarios.Scenario:
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=5))
+        state = np.zeros((16, c.BALL_STATE_SIZE))
+        pool_balls.write_state(state)
+
+        # Balls 3 and 12 are in, and ball 1 is still moving
+        state[[3, 12], 4] = 0
+        state[1, 2:4] = (1.5, -0.5)
+
+        return scenarios.Scenario(positions=state[:, 0:2], velocities=state[:, 2:4], ball_numbers=np.arange(16),
+                                  in_play=state[:, 4] != 0, current_player=Players.player2,
+                                  player_ball_types={Players.player1: BallTypes.striped,
+                                                     Players.player2: BallTypes.solid})
+
+    def test_save_and_load_scenario(self):
+        scenario = self.get_game_scenario()
+        filename = "test_scenario.json"
+
+        try:
+            scenarios.save_scenario(scenario, filename)
+            loaded_scenario = scenarios.load_scenario(filename)
+        finally:
+            os.remove(filename)
+
+        np.testing.assert_array_equal(loaded_scenario.positions, scenario.positions)
+        np.testing.assert_array_equal(loaded_scenario.velocities, scenario.velocities)
+        np.testing.assert_array_equal(loaded_scenario.ball_numbers, scenario.ball_numbers)
+        np.testing.assert_array_equal(loaded_scenario.in_play, scenario.in_play)
+        self.assertIsNone(loaded_scenario.table_size)
+        self.assertEqual(loaded_scenario.current_player, Players.player2)
+        self.assertEqual(loaded_scenario.player_ball_types, scenario.player_ball_types)
+
+    def test_build_game_state(self):
+        game_state = self.get_game_scenario().build_game_state()
+
+        self.assertEqual(game_state.current_player, Players.player2)
+        self.assertEqual(game_state.player_ball_types[Players.player2], BallTypes.solid)
+        self.assertEqual(game_state.num_balls_in, {BallTypes.solid: 1, BallTypes.striped: 1})
+
+    def test_load_scenario_into_game(self):
+        game = GameLoop(seed=3)
+        scenario = self.get_game_scenario()
+
+        game.load_scenario(scenario)
+
+        self.assertEqual(game.current_phase, GamePhases.ball_in_play)
+        self.assertEqual(game.game_state.current_player, Players.player2)
+        self.assertFalse(game.first_turn)
+        self.assertEqual(game.pool_balls.get(0).get_position(), Point(*scenario.positions[0]))
+        self.assertIn(game.pool_balls.get(1), game.pool_balls.active_balls)
+        self.assertNotIn(game.pool_balls.get(3), game.pool_balls.simulated_balls)
+
+        # The balls that are out of play are below the table
+        self.assertGreater(game.pool_balls.get(12).y_pos, c.POOL_TABLE_HEIGHT + c.SCREEN_HEIGHT_PADDING)
+
+    def test_load_partial_scenario_into_game(self):
+        game = GameLoop(seed=3)
+        scenario = scenarios.Scenario(positions=np.array([[300.0, 300.0], [700.0, 300.0], [800.0, 350.0]]),
+                                      velocities=np.zeros((3, 2)), ball_numbers=np.array([0, 2, 8]))
+
+        game.load_scenario(scenario)
+
+        # Only the listed balls are left on the table, and the object balls left out count as having gone in
+        self.assertEqual([ball.num for ball in game.pool_balls.simulated_balls], [0, 2, 8])
+        self.assertEqual(game.game_state.num_balls_in, {BallTypes.solid: 6, BallTypes.striped: 7})
+        self.assertEqual(game.current_phase, GamePhases.hit_cue)
+        for ball_num in (1, 3, 9, 15):
+            self.assertGreater(game.pool_balls.get(ball_num).y_pos, c.POOL_TABLE_HEIGHT + c.SCREEN_HEIGHT_PADDING)
+
+    def test_load_scenario_that_does_not_fit_game(self):
+        game = GameLoop(seed=3)
+        ball_position = game.pool_balls.get(0).get_position()
+
+        # A generated scenario is on its own table rather than the game's
+        with self.assertRaises(ValueError):
+            game.load_scenario(scenarios.generate_scenario(8, seed=0))
+
+        with self.assertRaises(ValueError):
+            game.load_scenario(scenarios.Scenario(positions=np.array([[300.0, 300.0], [700.0, 300.0]]),
+                                                  velocities=np.zeros((2, 2)), ball_numbers=np.array([0, 16])))
+
+        # The game is left as it was
+        self.assertEqual(game.pool_balls.get(0).get_position(), ball_position)
+
+    def test_load_scenario_directory(self):
+        directory = "test_scenarios"
+        os.makedirs(directory, exist_ok=True)
+        scenario = self.get_game_scenario()
+
+        try:
+            for index in range(3):
+                scenarios.save_scenario(scenario, os.path.join(directory, "scenario_" + str(index) + ".json"))
+
+            loaded_scenarios = scenarios.load_scenario_directory(directory)
+        finally:
+            for filename in os.listdir(directory):
+                os.remove(os.path.join(directory, filename))
+            os.rmdir(directory)
+
+        self.assertEqual(list(loaded_scenarios), ["scenario_0.json", "scenario_1.json", "scenario_2.json"])
+
+
+
+# Fixed Timestep #
+from fixed_timestep import FixedTimestep, StateBuffer
+
+
+class TestFixedTimestep(unittest.TestCase):
+    def test_steps_follow_time_not_frames(self):
+        current_time = [0.0]
+        timestep = FixedTimestep(step_rate=60, max_steps_per_frame=8, get_time=lambda: current_time[0])
+
+        # Fast frames take a step only once enough time has passed
+        num_steps = 0
+        for _ in range(144):
+            current_time[0] += 1 / 144
+            num_steps += timestep.advance()
+        self.assertIn(num_steps, (59, 60))
+
+        # A slow frame takes several steps at once
+        current_time[0] += 0.1
+        self.assertEqual(timestep.advance(), 6)
+        self.assertTrue(0 <= timestep.get_interpolation_fraction() < 1)
+
+    def test_long_frame_is_capped(self):
+        current_time = [0.0]
+        timestep = FixedTimestep(step_rate=60, max_steps_per_frame=8, get_time=lambda: current_time[0])
+
+        current_time[0] += 5
+        self.assertEqual(timestep.advance(), 8)
+        self.assertEqual(timestep.advance(), 0)
+
+    def test_interpolate_between_steps(self):
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=1))
+        state_buffer = StateBuffer()
+        state_buffer.reset(pool_balls)
+
+        cue_ball = pool_balls.get(0)
+        start_x = cue_ball.x_pos
+        cue_ball.set_x_position(start_x + 4)
+        pool_balls.remove_ball_from_play(pool_balls.get(5))
+        pool_balls.get(5).set_position(Point(0, 0))
+        state_buffer.publish(pool_balls)
+
+        positions = state_buffer.interpolate(0.25)
+
+        self.assertAlmostEqual(positions[0, 0], start_x + 1)
+        # A ball that left play is not drawn part way to where it was moved
+        self.assertEqual(tuple(positions[5]), (0, 0))
+
+
+
+# Tweens #
+from tweens import TweenScheduler
+
+
+class TestTweens(unittest.TestCase):
+    def test_tween_values_follow_time(self):
+        scheduler = TweenScheduler()
+        values: List[float] = []
+        finished: List[bool] = []
+
+        scheduler.add(10, 0, 0.2, values.append, on_finish=lambda: finished.append(True))
+
+        scheduler.update(0.05)
+        scheduler.update(0.05)
+        self.assertAlmostEqual(values[-1], 5)
+        self.assertTrue(scheduler.is_running())
+        self.assertEqual(finished, [])
+
+        # A long frame finishes the tween exactly at its end value
+        scheduler.update(1)
+        self.assertEqual(values[-1], 0)
+        self.assertEqual(finished, [True])
+        self.assertFalse(scheduler.is_running())
+
+    def test_finish_can_start_another_tween(self):
+        scheduler = TweenScheduler()
+        values: List[float] = []
+
+        scheduler.add(0, 1, 0.1, values.append, on_finish=lambda: scheduler.add(1, 2, 0.1, values.append))
+
+        scheduler.update(0.1)
+        self.assertTrue(scheduler.is_running())
+        scheduler.update(0.1)
+        self.assertEqual(values, [1, 2])
+
+    def test_cancel_all(self):
+        scheduler = TweenScheduler()
+        finished: List[bool] = []
+        scheduler.add(0, 1, 0.1, lambda value: None, on_finish=lambda: finished.append(True))
+
+        scheduler.cancel_all()
+        scheduler.update(1)
+
+        self.assertEqual(finished, [])
+
+
+
+# Quality Governor #
+from quality_governor import QualityGovernor
+
+
+class TestQualityGovernor(unittest.TestCase):
+    def run_frames(self, governor: QualityGovernor, current_time: List[float], num_frames: int, frame_cost: float):
+        for _ in range(num_frames):
+            governor.start_frame()
+            current_time[0] += frame_cost
+            governor.end_frame()
+
+    def test_quality_drops_and_recovers(self):
+        current_time = [0.0]
+        governor = QualityGovernor(frame_budget=0.01, num_frames_measured=5, get_time=lambda: current_time[0])
+        self.assertTrue(governor.get_level().show_overlays)
+
+        # Frames over budget lower the quality one level for each set of frames measured
+        self.run_frames(governor, current_time, 10, 0.02)
+        self.assertEqual(governor.level_index, 2)
+        self.assertFalse(governor.get_level().show_overlays)
+
+        # Frames just under budget keep the quality where it is
+        self.run_frames(governor, current_time, 10, 0.008)
+        self.assertEqual(governor.level_index, 2)
+
+        # Fast frames raise the quality back up
+        self.run_frames(governor, current_time, 10, 0.001)
+        self.assertEqual(governor.level_index, 0)
+
+    def test_skipped_frames(self):
+        governor = QualityGovernor()
+        governor.level_index = 2
+        frames_to_skip = governor.get_level().frames_to_skip
+
+        drawn_frames = [governor.should_draw_frame(balls_moving=True) for _ in range(3 * (frames_to_skip + 1))]
+        self.assertEqual(drawn_frames.count(True), 3)
+
+        # Frames without moving balls are always drawn
+        self.assertTrue(all(governor.should_draw_frame(balls_moving=False) for _ in range(3)))
+
+
+
+# Render Target #
+import argparse
+
+from main import parse_render_scale
+from render_target import RenderTarget
+
+
+class TestRenderTarget(unittest.TestCase):
+    def test_internal_resolution(self):
+        display_surface = pygame.Surface((c.SCREEN_WIDTH, c.SCREEN_HEIGHT))
+
+        self.assertIs(RenderTarget(display_surface, 1).surface, display_surface)
+        self.assertEqual(RenderTarget(display_surface, 0.5).surface.get_size(),
+                         (c.SCREEN_WIDTH / 2, c.SCREEN_HEIGHT / 2))
+
+        # Sizes that aren't exact are rounded to a multiple of 8 pixels
+        width, height = RenderTarget(display_surface, 0.75).surface.get_size()
+        self.assertEqual((width % 8, height % 8), (0, 0))
+
+    def test_render_scale_out_of_range(self):
+        display_surface = pygame.Surface((c.SCREEN_WIDTH, c.SCREEN_HEIGHT))
+
+        for render_scale in (0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                RenderTarget(display_surface, render_scale)
+
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_render_scale(str(render_scale))
+
+        self.assertEqual(parse_render_scale("0.5"), 0.5)
+
+    def test_images_are_scaled_once(self):
+        render_target = RenderTarget(pygame.Surface((c.SCREEN_WIDTH, c.SCREEN_HEIGHT)), 0.5)
+        image = pygame.Surface((40, 20))
+
+        scaled_image = render_target.get_scaled_image(image)
+        self.assertEqual(scaled_image.get_size(), (20, 10))
+        self.assertIs(render_target.get_scaled_image(image), scaled_image)
+
+        # Images that are no longer used are dropped from the cache
+        del image
+        self.assertEqual(len(render_target.scaled_images[0.5]), 0)
+
+    def test_frame_is_scaled_up(self):
+        display_surface = pygame.Surface((c.SCREEN_WIDTH, c.SCREEN_HEIGHT))
+        render_target = RenderTarget(display_surface, 0.5)
+        image = pygame.Surface((40, 40))
+        image.fill(c.colors["red"])
+
+        render_target.blit(image, (100, 200))
+        render_target.present()
+
+        self.assertEqual(display_surface.get_at((100, 200))[:3], c.colors["red"])
+        self.assertEqual(display_surface.get_at((139, 239))[:3], c.colors["red"])
+        self.assertNotEqual(display_surface.get_at((141, 241))[:3], c.colors["red"])
+
+
+# Replays #
+import tempfile
+import replays
+import replay_renderer
+
+
+class TestReplays(unittest.TestCase):
+    def record_break(self) -> replays.ReplayRecorder:
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=5))
+        pool_balls.get(0).set_position(Point(c.TABLE_HEAD_STRING_LOCATION, pool_balls.get(1).y_pos))
+
+        return replays.record_shot(pool_balls, golden_traces.get_cue_ball_velocity(94.5, c.MAX_ROTATION_OFFSET))
+
+    def test_record_shot(self):
+        recorder = self.record_break()
+        states = np.array(recorder.states)
+
+        self.assertTrue(np.all(states[0, :, 4] == 1))
+        self.assertEqual(recorder.current_players, [1] * recorder.get_num_frames())
+
+        # The pocketed ball is lined up below the table like in a game
+        pocketed_ball_nums = np.flatnonzero(states[-1, :, 4] == 0)
+        self.assertEqual(len(pocketed_ball_nums), 1)
+        self.assertEqual(states[-1, pocketed_ball_nums[0], 1], 440 + c.SCREEN_WIDTH_PADDING)
+
+    def test_save_and_load_replay(self):
+        recorder = self.record_break()
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "replay.npz")
+            recorder.save(filename)
+            states, current_players = replays.load_replay(filename)
+
+        np.testing.assert_allclose(states, np.array(recorder.states), atol=1e-3)
+        np.testing.assert_array_equal(current_players, recorder.current_players)
+
+    def test_record_more_than_sixteen_balls(self):
+        scenario = scenarios.generate_scenario(20, seed=1)
+        recorder = replays.record_shot(scenario.build_pool_balls(), (3, 1), max_steps=20)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "replay.npz")
+            recorder.save(filename)
+            states, _ = replays.load_replay(filename)
+
+        self.assertEqual(states.shape[1:], (20, c.BALL_STATE_SIZE))
+
+        # The game can only draw its own table and balls
+        with self.assertRaises(ValueError):
+            scenario.check_fits_game()
+
+    def test_render_replay(self):
+        recorder = self.record_break()
+        states = np.array(recorder.states[:40:10])
+        current_players = np.array(recorder.current_players[:40:10])
+        frame_size = c.SCREEN_WIDTH * c.SCREEN_HEIGHT * 3
+
+        raw_output = io.BytesIO()
+        self.assertEqual(replay_renderer.render_replay(states, current_players, raw_output=raw_output,
+                                                       chunk_frames=3), 4)
+
+        raw_frames = raw_output.getvalue()
+        self.assertEqual(len(raw_frames), 4 * frame_size)
+        # The cue ball moves between the frames
+        self.assertNotEqual(raw_frames[:frame_size], raw_frames[frame_size:2 * frame_size])
+
+        with tempfile.TemporaryDirectory() as directory:
+            replay_renderer.render_replay(states[:2], current_players[:2], png_directory=directory)
+            self.assertEqual(sorted(os.listdir(directory)), ["frame_000000.png", "frame_000001.png"])
+
+
+# Observations #
+from observations import BALL_TYPE_CHANNELS, POCKET_CHANNEL, ObservationRasterizer
+
+
+class TestObservations(unittest.TestCase):
+    def get_rack_state(self) -> np.ndarray:
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=5))
+        pool_balls.get(0).set_position(Point(c.TABLE_HEAD_STRING_LOCATION, pool_balls.get(1).y_pos))
+
+        state = np.zeros((16, c.BALL_STATE_SIZE))
+        pool_balls.write_state(state)
+        return state
+
+    def test_balls_are_drawn_by_type(self):
+        rasterizer = ObservationRasterizer()
+        state = self.get_rack_state()
+        state[3, 4] = 0
+
+        observations = rasterizer.rasterize(state[np.newaxis], rasterizer.create_observations(1))
+
+        for ball_num in (0, 1, 8, 9):
+            center_x = int((state[ball_num, 0] + c.BALL_RADIUS - rasterizer.felt_min_x) * rasterizer.x_scale)
+            center_y = int((state[ball_num, 1] + c.BALL_RADIUS - rasterizer.felt_min_y) * rasterizer.y_scale)
+            channel = BALL_TYPE_CHANNELS[PoolBall(ball_num, Point(0, 0)).type]
+
+            self.assertEqual(observations[0, :POCKET_CHANNEL, center_y, center_x].tolist(),
+                             [int(other_channel == channel) for other_channel in range(POCKET_CHANNEL)])
+
+        # The corner pockets are at the corners of the felt
+        self.assertEqual(observations[0, POCKET_CHANNEL, 0, 0], 1)
+        self.assertEqual(observations[0, POCKET_CHANNEL, -1, -1], 1)
+        self.assertEqual(observations[0, POCKET_CHANNEL, c.OBSERVATION_SIZE // 2, 20], 0)
+
+    def test_matches_pixel_by_pixel_drawing(self):
+        rasterizer = ObservationRasterizer(width=40, height=30)
+        generator = np.random.default_rng(1)
+
+        # Random tables, including balls partly off the felt and balls out of play
+        felt_min_x, felt_min_y, felt_max_x, felt_max_y = TableGeometry.standard().felt_bounds
+        states = np.zeros((8, 16, c.BALL_STATE_SIZE))
+        states[:, :, 0] = generator.uniform(felt_min_x - 2 * c.BALL_RADIUS, felt_max_x, (8, 16))
+        states[:, :, 1] = generator.uniform(felt_min_y - 2 * c.BALL_RADIUS, felt_max_y, (8, 16))
+        states[:, :, 4] = generator.random((8, 16)) < 0.8
+
+        observations = rasterizer.create_observations(8, dtype=np.float32)
+        # Drawing twice into the same array must not keep the balls of the first drawing
+        rasterizer.rasterize(states[::-1], observations)
+        rasterizer.rasterize(states, observations)
+
+        pixel_x = np.arange(40) + 0.5
+        pixel_y = np.arange(30)[:, np.newaxis] + 0.5
+        for table_index, state in enumerate(states):
+            expected = np.zeros((POCKET_CHANNEL, 30, 40))
+            for ball_num, (x_pos, y_pos, _, _, in_play) in enumerate(state):
+                center_x = (x_pos + c.BALL_RADIUS - rasterizer.felt_min_x) * rasterizer.x_scale
+                center_y = (y_pos + c.BALL_RADIUS - rasterizer.felt_min_y) * rasterizer.y_scale
+                covered = (((pixel_x - center_x) / rasterizer.x_radius) ** 2 +
+                           ((pixel_y - center_y) / rasterizer.y_radius) ** 2 <= 1)
+                if in_play:
+                    expected[rasterizer.ball_channels[ball_num]][covered] = 1
+
+            np.testing.assert_array_equal(observations[table_index, :POCKET_CHANNEL], expected)
+
+
+# Tournament #
+import random
+import tournament
+
+
+class TestTournament(unittest.TestCase):
+    def get_short_games(self):
+        games = tournament.schedule_games(["random", "aiming"], games_per_pairing=4, seed=2)
+        for game in games:
+            game["max_shots"] = 6
+        return games
+
+    def test_schedule_games(self):
+        games = tournament.schedule_games(["random", "aiming", "tournament:RandomBot"], games_per_pairing=3)
+
+        # Each of the three pairs plays every rack twice with the bots swapped
+        self.assertEqual(len(games), 3 * 4)
+        self.assertEqual([game["id"] for game in games], list(range(12)))
+        self.assertEqual(games[0]["seed"], games[1]["seed"])
+        self.assertEqual(games[0]["bots"], games[1]["bots"][::-1])
+
+    def test_break_is_placed_behind_head_string(self):
+        pool_balls = PoolBallList()
+        pool_balls.set_up_rack(generate_rack(seed=1))
+        limits = tournament.get_cue_ball_limits(pool_balls, first_turn=True)
+
+        tournament.place_cue_ball(pool_balls, Point(0, 0), limits, random.Random(0))
+
+        self.assertEqual(pool_balls.get(0).get_position(), Point(c.TABLE_HEAD_STRING_LOCATION, limits["min_y"]))
+        self.assertTrue(pool_balls.get(0).in_play)
+
+    def test_play_game(self):
+        game = {"id": 0, "bots": ["aiming", "random"], "seed": 4}
+
+        result = tournament.play_game(game)
+
+        self.assertEqual(result, tournament.play_game(game))
+        self.assertIn(result["winner"], ["aiming", "random", None])
+        self.assertLessEqual(result["shots"], tournament.MAX_GAME_SHOTS)
+
+    def test_resume_from_checkpoint(self):
+        games = self.get_short_games()
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_filename = os.path.join(directory, "tournament.jsonl")
+            complete_standings = tournament.run_tournament(games, checkpoint_filename, report_file=io.StringIO())
+
+            # Interrupt the tournament after two games, part way through writing the third
+            with open(checkpoint_filename) as checkpoint_file:
+                lines = checkpoint_file.readlines()
+            with open(checkpoint_filename, "w") as checkpoint_file:
+                checkpoint_file.write("".join(lines[:2]) + lines[2][:10])
+
+            resumed_standings = tournament.run_tournament(games, checkpoint_filename, report_file=io.StringIO())
+            results = tournament.load_checkpoint(checkpoint_filename)
+
+        self.assertEqual(sorted(result["id"] for result in results), [game["id"] for game in games])
+        self.assertEqual(resumed_standings.records, complete_standings.records)
+
+    def test_checkpoint_from_other_tournament_is_not_resumed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_filename = os.path.join(directory, "tournament.jsonl")
+            tournament.run_tournament(self.get_short_games(), checkpoint_filename, report_file=io.StringIO())
+
+            # The same ids with other bots and racks are played, rather than taken from the old results
+            other_games = tournament.schedule_games(["aiming", "tournament:RandomBot"], games_per_pairing=2, seed=7)
+            for game in other_games:
+                game["max_shots"] = 6
+            standings = tournament.run_tournament(other_games, checkpoint_filename, report_file=io.StringIO())
+
+            self.assertEqual(set(standings.records), {"aiming", "tournament:RandomBot"})
+            self.assertEqual(sum(standings.records["aiming"]), len(other_games))
+
+            missing_bot_games = tournament.schedule_games(["aiming", "missing_bot_module:Bot"], 2, seed=7)
+            with self.assertRaises(ModuleNotFoundError):
+                tournament.run_tournament(missing_bot_games, checkpoint_filename, report_file=io.StringIO())
+
+
+# Telemetry #
+import time
+from telemetry import TelemetryWriter
+
+
+class TestTelemetry(unittest.TestCase):
+    def read_records(self, filename: str):
+        with open(filename) as telemetry_file:
+            return [json.loads(line) for line in telemetry_file]
+
+    def test_records_are_written_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "telemetry.jsonl")
+
+            with TelemetryWriter(filename, batch_size=10) as telemetry:
+                for shot in range(25):
+                    telemetry.write({"record": "shot", "shot": shot})
+
+            self.assertEqual([record["shot"] for record in self.read_records(filename)], list(range(25)))
+
+    def test_files_are_rotated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "telemetry.jsonl")
+
+            with TelemetryWriter(filename, batch_size=1, max_file_bytes=100, num_rotated_files=2) as telemetry:
+                for shot in range(40):
+                    telemetry.write({"record": "shot", "shot": shot})
+                    # Waits for each record to be written, so that the file is rotated between them
+                    while telemetry.records:
+                        time.sleep(0.001)
+
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ["telemetry.jsonl", "telemetry.jsonl.1", "telemetry.jsonl.2"])
+
+            # The newest records are kept, with the oldest in the last file
+            shots = [record["shot"] for suffix in (".2", ".1", "") for record in self.read_records(filename + suffix)]
+            self.assertEqual(shots, list(range(40 - len(shots), 40)))
+            self.assertLess(len(shots), 40)
+
+    def test_records_past_the_limit_are_dropped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "telemetry.jsonl")
+
+            telemetry = TelemetryWriter(filename, flush_interval=60, batch_size=100, max_buffered_records=5)
+            for shot in range(8):
+                telemetry.write({"record": "shot", "shot": shot})
+            telemetry.close()
+
+            self.assertEqual(telemetry.dropped_records, 3)
+            self.assertEqual(len(self.read_records(filename)), 5)
+
+    def test_write_errors_are_counted_and_raised(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "telemetry.jsonl")
+
+            telemetry = TelemetryWriter(filename, batch_size=1)
+            telemetry.write({"record": "shot", "shot": 0})
+            telemetry.write({"record": "shot", "shot": object()})
+            telemetry.write({"record": "shot", "shot": 2})
+            while os.path.getsize(filename) < len(json.dumps({"record": "shot", "shot": 0}) + "\n") * 2:
+                time.sleep(0.001)
+
+            # A failed write loses its batch, but the thread carries on with the records after it
+            file = telemetry.file
+            telemetry.file = io.StringIO()
+            telemetry.file.close()
+            telemetry.write({"record": "shot", "shot": 3})
+            while telemetry.failed_records < 2:
+                time.sleep(0.001)
+            telemetry.file = file
+
+            telemetry.write({"record": "shot", "shot": 4})
+
+            with self.assertRaises(TypeError):
+                telemetry.close()
+
+            self.assertEqual(telemetry.failed_records, 2)
+            self.assertEqual([record["shot"] for record in self.read_records(filename)], [0, 2, 4])
+
+    def test_failed_rotation_does_not_lose_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "telemetry.jsonl")
+            # The file can't be moved onto a directory
+            os.mkdir(filename + ".1")
+
+            telemetry = TelemetryWriter(filename, batch_size=1, max_file_bytes=10, num_rotated_files=1)
+            for shot in range(3):
+                telemetry.write({"record": "shot", "shot": shot})
+
+            with self.assertRaises(OSError):
+                telemetry.close()
+
+            self.assertEqual(telemetry.failed_records, 0)
+            self.assertEqual([record["shot"] for record in self.read_records(filename)], [0, 1, 2])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,13 @@
 import math
-import pygame
-from typing import Tuple
+import numpy as np
+from typing import Tuple, TYPE_CHECKING
 
 import constants as c
 from constants import Point
 
+if TYPE_CHECKING:
+    import pygame
+
 
 def distance_formula(point1: Point, point2: Point) -> float:
     """
@@ -57,7 +60,35 @@ def map_to_range(input_value: float, input_range: Tuple[float, float], output_ra
     return output_value
 
 
-def get_text_start_position(font: pygame.font.Font, text: str, center_vertically: bool = None) -> Point:
+def map_to_range_array(input_values: np.ndarray, input_range: Tuple[float, float],
+                       output_range: Tuple[float, float]) -> np.ndarray:
+    """
+    Maps every value in an array in a given range to the equivalent value in a second range
+    Works the same as `map_to_range`, including the negative numbers returned for invalid inputs
+    :param input_values: The values to map
+    :param input_range: The range to map from
+    :param output_range: The range to map to
+    :return: An array of the equivalents of the inputs in the output range, with negative numbers for invalid inputs
+    """
+    input_values = np.asarray(input_values, dtype=float)
+
+    invalid_ranges = input_range[1] < input_range[0] or output_range[1] < output_range[0]
+    negative_ranges = input_range[0] < 0 or input_range[1] < 0 or output_range[0] < 0 or output_range[1] < 0
+
+    input_range_len = input_range[1] - input_range[0]
+    output_range_len = output_range[1] - output_range[0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        output_values = output_range[0] + (output_range_len * ((input_values - input_range[0]) / input_range_len))
+
+    return np.select([input_values < 0,
+                      np.full(input_values.shape, invalid_ranges),
+                      (input_values < input_range[0]) | (input_values > input_range[1]),
+                      np.full(input_values.shape, negative_ranges)],
+                     [-1, -2, -3, -4], output_values)
+
+
+def get_text_start_position(font: "pygame.font.Font", text: str, center_vertically: bool = None) -> Point:
     """
     Gets the start position of a given string in a given font to center it at the top of the screen
     :param font: The font object to use
@@ -76,7 +107,7 @@ def get_text_start_position(font: pygame.font.Font, text: str, center_vertically
         return Point(x_pos, 0)
 
 
-def get_text_start_position_two_lines(font: pygame.font.Font, line1: str, line2: str) -> Tuple[Point, Point]:
+def get_text_start_position_two_lines(font: "pygame.font.Font", line1: str, line2: str) -> Tuple[Point, Point]:
     """
     Gets the start positions of two strings in a given font to center them in the center of the screen
         with spacing between them